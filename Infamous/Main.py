@@ -1,6 +1,7 @@
 import asyncio
 import datetime
 import os
+import signal
 import sys
 import traceback
 import aiohttp
@@ -8,6 +9,19 @@ import asyncpg
 import discord
 from discord.ext import commands
 
+from cogs.utils import migrations, queries
+from cogs.utils.cards import ProfileCards
+from cogs.utils.cooldowns import CooldownStore
+from cogs.utils.db import Database
+from cogs.utils.economy import Economy
+from cogs.utils.ledger import Ledger
+from cogs.utils.members import MemberIndex
+from cogs.utils.message_cache import MessageCache
+from cogs.utils.metrics import Metrics, TimedContext, trace_config
+from cogs.utils.notify import Notifier
+from cogs.utils.settings import PrefixMatcher, SettingsCache
+from cogs.utils.stats import BotStats
+
 
 initial_extensions = (
     'cogs.Developer',
@@ -23,45 +37,60 @@ initial_extensions = (
 )
 
 
+def shard_options():
+    """The shards assigned by the launcher, otherwise discord.py picks the recommended count."""
+    shard_ids = os.getenv('SHARD_IDS')
+    if not shard_ids:
+        return {}
+    return {'shard_ids': [int(i) for i in shard_ids.split(',')], 'shard_count': int(os.getenv('SHARD_COUNT'))}
+
+
 async def run():
     credentials = os.getenv('DATABASE_URL')
-    db = await asyncpg.create_pool(credentials)
-    prefixes = {}
-    disabled = {}
-    alerts = {}
-
-    async with db.acquire() as conn:
-        settings = await conn.fetch("SELECT * FROM settings")
-        block = await conn.fetch("SELECT * FROM blocked")
-
-    for i in settings:
-        prefixes[i[0]] = i[1]
-        if i[2] is None:
-            disabled[i[0]] = []
-        else:
-            disabled[i[0]] = i[2].split(', ')
-        alerts[i[0]] = i[3]
-
-    blocked = {}
-    for i in block:
-        blocked[i[0]] = i[1]
-
-    bot = Bot(description='A community bot for the server Fame', db=db, prefixes=prefixes,
-              disabled=disabled, blocked=blocked, alerts=alerts)
+
+    # The schema has to be final before the pool prepares its statements.
+    connection = await asyncpg.connect(credentials)
+    try:
+        await migrations.migrate(connection)
+    finally:
+        await connection.close()
+
+    db = await Database.create(credentials, max_size=int(os.getenv('DB_POOL_SIZE', 10)),
+                               slow_query=int(os.getenv('SLOW_QUERY_MS', 500)) / 1000, init=queries.prepare)
+
+    bot = Bot(description='A community bot for the server Fame', db=db, dsn=credentials)
+    await bot.load_blocked()
+
+    # The launcher stops workers with SIGTERM; either signal logs out, which ends ``start`` below.
+    loop = asyncio.get_event_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, lambda: loop.create_task(bot.logout()))
+        except NotImplementedError:
+            pass
+
     try:
         await bot.start(os.getenv('TOKEN'))
-    except KeyboardInterrupt:
+    finally:
+        if not bot.is_closed():
+            await bot.logout()
+        # Buffered cooldowns and ledger entries are written while the pool is still open.
+        await bot.cooldowns.close()
+        await bot.notifier.close()
+        bot.economy.close()
+        await bot.ledger.close()
+        await bot.metrics.close()
         await db.close()
-        await bot.logout()
 
 
-class Bot(commands.Bot):
+class Bot(commands.AutoShardedBot):
     def __init__(self, **kwargs):
         super().__init__(
             command_prefix=self.get_prefix_,
             description=kwargs.pop('description'),
-            max_messages=1000000,
-            case_insensitive=True
+            max_messages=int(os.getenv('MAX_MESSAGES', 1000)),
+            case_insensitive=True,
+            **shard_options()
         )
 
         self.app_info = None
@@ -69,25 +98,83 @@ class Bot(commands.Bot):
         self.loop.create_task(self.playing_status())
         self.remove_command("help")
         self.add_check(self.check_if_disabled)
+        self.before_invoke(self.start_timing)
+        self.after_invoke(self.finish_timing)
         self.path = os.path.dirname(os.path.realpath(__file__))
         self.launch_time = datetime.datetime.utcnow()
+        self.cluster_id = int(os.getenv('CLUSTER_ID', 0))
         self.db = kwargs.pop("db")
-        self.prefixes = kwargs.pop("prefixes")
+        self.notifier = Notifier(kwargs.pop("dsn"), self.db, self.loop)
+        self.settings = SettingsCache(self.db, self.loop, notifier=self.notifier)
+        self.default_matcher = None
         self.embed_color = 0x101010
-        self.disabled_commands = kwargs.pop("disabled")
-        self.blocked = kwargs.pop("blocked")
-        self.alerts = kwargs.pop("alerts")
-        self.lines = self.lines_of_code()
-        self.session = aiohttp.ClientSession(loop=self.loop)
+        self.blocked = {}
+        self.notifier.register('settings', self.settings.evict)
+        self.notifier.register('block', lambda user_id, reason: self.blocked.__setitem__(user_id, reason))
+        self.notifier.register('unblock', lambda user_id: self.blocked.pop(user_id, None))
+        self.notifier.on_resync(self.resync)
+        self.cooldowns = CooldownStore(self.db, self.notifier)
+        self.notifier.register('cooldowns', self.cooldowns.apply)
+        self.notifier.on_resync(self.cooldowns.load)
+        self.cooldowns.start(self.loop)
+        self.notifier.start()
+        self.ledger = Ledger(self.db)
+        self.ledger.start(self.loop)
+        self.economy = Economy(self.db, ledger=self.ledger)
+        self.economy.start(self.loop)
+        self.member_index = MemberIndex()
+        self.message_cache = MessageCache(max_bytes=int(os.getenv('MESSAGE_CACHE_BYTES', 8 * 1024 ** 2)),
+                                          per_channel=int(os.getenv('MESSAGE_CACHE_PER_CHANNEL', 200)))
+        self.stats = BotStats()
+        self.stats.start(self.loop, self.path)
+        self.session = aiohttp.ClientSession(loop=self.loop, trace_configs=[trace_config()])
+        self.cards = ProfileCards(self.session, self.loop)
+        self.metrics = Metrics()
+        if os.getenv('METRICS_PORT'):
+            self.loop.create_task(self.metrics.serve(int(os.getenv('METRICS_PORT')) + self.cluster_id))
+
+    async def get_matcher(self, message):
+        if self.default_matcher is None:
+            self.default_matcher = PrefixMatcher(['>'], self.user.id)
 
-    async def get_prefix_(self, bot, message):
         if not message.guild:
-            prefix = ['>']
-        elif self.prefixes[message.guild.id]:
-            prefix = [self.prefixes[message.guild.id]]
-        else:
-            prefix = ['>']
-        return commands.when_mentioned_or(*prefix)(bot, message)
+            return self.default_matcher
+
+        settings = await self.settings.get(message.guild.id)
+        if not settings.prefixes:
+            return self.default_matcher
+        if settings.matcher is None:
+            settings.matcher = PrefixMatcher(settings.prefixes, self.user.id)
+        return settings.matcher
+
+    def add_cog(self, cog):
+        super().add_cog(cog)
+        for command in self.get_cog_commands(type(cog).__name__):
+            self.cooldowns.attach(command)
+
+    async def get_context(self, message, *, cls=TimedContext):
+        return await super().get_context(message, cls=cls)
+
+    async def start_timing(self, ctx):
+        self.metrics.start(ctx)
+
+    async def finish_timing(self, ctx):
+        self.metrics.finish(ctx)
+
+    async def get_prefix_(self, bot, message):
+        return (await self.get_matcher(message)).as_list
+
+    async def load_blocked(self):
+        async with self.db.acquire() as db:
+            block = await db.fetch("SELECT * FROM blocked")
+
+        self.blocked.clear()
+        for i in block:
+            self.blocked[i[0]] = i[1]
+
+    async def resync(self):
+        self.settings.clear()
+        await self.load_blocked()
 
     async def load_all_extensions(self):
         await self.wait_until_ready()
@@ -99,21 +186,6 @@ class Bot(commands.Bot):
                 print(f'Failed to load extension {extension}.', file=sys.stderr)
                 traceback.print_exc()
 
-    def lines_of_code(self):
-        count_dict = {}
-        total_count = 0
-        for root, dirs, files in os.walk(os.path.join(self.path)):
-            for file in files:
-                if file.endswith(".py"):
-                    with open(os.path.join(root, file)) as f:
-                        file_name = f.name
-                        for i, l in enumerate(f):
-                            pass
-                    count_dict[file_name] = i + 1
-                    total_count += i
-
-        return total_count
-
     async def playing_status(self):
         await self.wait_until_ready()
         await self.change_presence(activity=discord.Game(
@@ -122,33 +194,36 @@ class Bot(commands.Bot):
 
     async def on_ready(self):
         self.app_info = await self.application_info()
+        self.stats.rebuild(self)
         print(f'Bot Online\n'
               f'Name: {self.user.name}\n'
               f'ID: {self.user.id}\n'
+              f'Cluster: {self.cluster_id} (shards {", ".join(map(str, sorted(self.shards)))})\n'
               f'{discord.__version__} \n'
               f'Last Updated: 15/12/18')
 
     async def on_message(self, message):
         if message.author.bot:
             return
-        await self.process_commands(message)
+        self.message_cache.add(message)
+        if (await self.get_matcher(message)).matches(message.content):
+            await self.process_commands(message)
 
     async def check_if_disabled(self, ctx):
-        if ctx.guild:
-            if ctx.guild.id in self.disabled_commands:
-                if ctx.command.qualified_name in self.disabled_commands[ctx.guild.id]:
-                    raise commands.CheckFailure("I'm sorry a server moderator has disabled this command.")
-                else:
-                    return True
-
-            else:
-                if ctx.author.id in self.blocked:
-                    raise commands.CheckFailure(f"You have been blocked for: {self.blocked[ctx.author.id]}")
-                else:
-                    return True
-        else:
+        if not ctx.guild:
             raise commands.CheckFailure("You can't use the bot here.")
 
+        if ctx.author.id in self.blocked:
+            raise commands.CheckFailure(f"You have been blocked for: {self.blocked[ctx.author.id]}")
+
+        settings = await self.settings.get(ctx.guild.id)
+        names = {ctx.command.qualified_name}
+        if ctx.command.root_parent is not None:
+            names.add(ctx.command.root_parent.qualified_name)
+        if any(settings.is_disabled(name, ctx.channel.id, ctx.author) for name in names):
+            raise commands.CheckFailure("I'm sorry a server moderator has disabled this command.")
+        return True
+
 
 loop = asyncio.get_event_loop()
 loop.run_until_complete(run())
@@ -0,0 +1,191 @@
+"""Monte Carlo balance report for superhuman abilities.
+
+Plays every ability against every other one at the given ability levels with
+the same rules as ``combat.resolve_turn``, batching all the duels of a level
+into NumPy arrays so each turn is a handful of vector operations. A fighter
+here uses their ability twice, so their health is twice its durability.
+
+Writes to the output directory:
+
+- ``matchups.csv``: level, ability, opponent, win rate and mean fight length;
+- ``win_matrix_<level>.csv``: the win rates of a level as a matrix;
+- ``cost_effectiveness.csv``: what reaching a level costs against the win rate.
+
+Needs NumPy, which the bot itself doesn't: ``pip install -r requirements-dev.txt``.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+
+import numpy as np
+
+from cogs.utils import combat
+from cogs.utils.constants import MASTER_PRICE_DIVISOR, MASTER_TIERS, shop_items
+from cogs.utils.progression import ABILITY
+
+HIT_CHANCE = 1 / 2
+
+
+def masters_for(level):
+    """How many times an ability is mastered on average to reach ``level``."""
+    xp_per_master = sum((low + high) / 2 for low, high, _ in MASTER_TIERS) / len(MASTER_TIERS)
+    return ABILITY.threshold(level) / xp_per_master
+
+
+def stats(ability, level):
+    """The average damage and durability of an ability at ``level``."""
+    points = masters_for(level) * sum(p for *_, p in MASTER_TIERS) / len(MASTER_TIERS)
+    damage, durability = shop_items[ability][3:5]
+    return int(damage + points), int(durability + points)
+
+
+def cost(ability, level):
+    price = shop_items[ability][0]
+    return price + masters_for(level) * (price // MASTER_PRICE_DIVISOR)
+
+
+def engine_fighter(fighter_id, ability, level):
+    damage, durability = stats(ability, level)
+    row = {'ability': ability, 'damage': damage, 'durability': durability}
+    return combat.ability_fighter(fighter_id, [row, row])
+
+
+def fighter(ability, level):
+    """The damage range and health the real engine gives a fighter with this ability twice."""
+    f = engine_fighter(0, ability, level)
+    move = f.moves[ability]
+    return move.low, move.high, f.hp
+
+
+def simulate(low, high, hp, rng):
+    """Plays one duel per column of the ``(2, n)`` arrays, each side starting at random.
+
+    Returns whether side 0 won and the number of turns, both per duel.
+    """
+    n = hp.shape[1]
+    hp = hp.copy()
+    attacker = rng.integers(0, 2, n)
+    won = np.zeros(n, dtype=bool)
+    turns = np.zeros(n, dtype=np.int64)
+
+    active = np.arange(n)
+    turn = 0
+    while active.size:
+        turn += 1
+        a = attacker[active]
+        d = 1 - a
+
+        damage = rng.integers(low[a, active], high[a, active] + 1)
+        hit = rng.random(active.size) < HIT_CHANCE
+        hp[np.where(hit, d, a), active] -= damage
+
+        defender_down = hp[d, active] <= 0
+        attacker_down = hp[a, active] <= 0
+        done = defender_down | attacker_down
+        winner = np.where(defender_down, a, d)
+
+        won[active[done]] = winner[done] == 0
+        turns[active[done]] = turn
+        attacker[active] = d
+        active = active[~done]
+
+    return won, turns
+
+
+def run_level(abilities, level, duels, rng):
+    fighters = [fighter(a, level) for a in abilities]
+    pairs = [(i, j) for i in range(len(abilities)) for j in range(len(abilities))]
+
+    def side(index):
+        values = np.array([[fighters[pair[s]][index] for pair in pairs] for s in (0, 1)], dtype=np.int64)
+        return np.repeat(values, duels, axis=1)
+
+    won, turns = simulate(side(0), side(1), side(2), rng)
+    won = won.reshape(len(pairs), duels).mean(axis=1)
+    turns = turns.reshape(len(pairs), duels).mean(axis=1)
+
+    matrix = np.empty((len(abilities), len(abilities)))
+    length = np.empty_like(matrix)
+    for (i, j), w, t in zip(pairs, won, turns):
+        matrix[i, j] = w
+        length[i, j] = t
+    return matrix, length
+
+
+def verify(a, b, level, duels, seed):
+    """How often ``a`` beats ``b`` when played through the bot's engine, one duel at a time."""
+    wins = 0
+    for n in range(duels):
+        pair = [engine_fighter(0, a, level), engine_fighter(1, b, level)]
+        duel = combat.Duel(pair if n % 2 else pair[::-1], seed=seed + n)
+        while not duel.over:
+            combat.resolve_turn(duel, next(iter(duel.attacker.moves)))
+        wins += duel.winner.id == 0
+    return wins / duels
+
+
+def main(args):
+    abilities = list(shop_items)
+    rng = np.random.default_rng(args.seed)
+    os.makedirs(args.out, exist_ok=True)
+
+    matchups = []
+    effectiveness = []
+    matrices = {}
+    start = time.perf_counter()
+    for level in args.levels:
+        matrix, length = matrices[level] = run_level(abilities, level, args.duels, rng)
+
+        with open(os.path.join(args.out, f'win_matrix_{level}.csv'), 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['ability'] + abilities)
+            for ability, row in zip(abilities, matrix):
+                writer.writerow([ability] + [f'{w:.4f}' for w in row])
+
+        for i, ability in enumerate(abilities):
+            for j, opponent in enumerate(abilities):
+                matchups.append((level, ability, opponent, f'{matrix[i, j]:.4f}', f'{length[i, j]:.2f}'))
+
+            win_rate = matrix[i].mean()
+            spent = cost(ability, level)
+            effectiveness.append((level, ability, round(spent), f'{win_rate:.4f}',
+                                  f'{win_rate / spent * 10000:.4f}'))
+
+        print(f'Level {level}: {len(abilities) ** 2 * args.duels:,} duels')
+        for i in np.argsort(-matrix.mean(axis=1)):
+            print(f'  {abilities[i]:<20} {matrix[i].mean():6.1%} win rate, {length[i].mean():5.1f} turns, '
+                  f'${cost(abilities[i], level):,.0f}')
+
+    with open(os.path.join(args.out, 'matchups.csv'), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['level', 'ability', 'opponent', 'win_rate', 'mean_turns'])
+        writer.writerows(matchups)
+
+    with open(os.path.join(args.out, 'cost_effectiveness.csv'), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['level', 'ability', 'cost', 'win_rate', 'win_rate_per_10k'])
+        writer.writerows(effectiveness)
+
+    print(f'Done in {time.perf_counter() - start:.1f}s, written to {args.out}')
+
+    if args.verify:
+        level = args.levels[0]
+        a, b = abilities[0], abilities[-1]
+        rate = verify(a, b, level, args.verify, args.seed)
+        print(f'Engine check at level {level}: {a} beat {b} in {rate:.1%} of {args.verify} duels, '
+              f'simulated {matrices[level][0][0, -1]:.1%}')
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulates duels between every pair of abilities.')
+    parser.add_argument('--duels', type=int, default=10000, help="duels per matchup and level")
+    parser.add_argument('--levels', type=lambda s: [int(x) for x in s.split(',')], default=[1, 5, 10],
+                        help="comma separated ability levels")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='balance', help="output directory")
+    parser.add_argument('--verify', type=int, default=0, metavar='DUELS',
+                        help="also play this many duels of one matchup through the bot's engine")
+    sys.exit(main(parser.parse_args()))
@@ -1,11 +1,14 @@
 import asyncio
 import datetime
 import logging
+import os
 
 import aiohttp
 import discord
 from discord.ext import commands
 
+from .utils import queries
+from .utils.trivia import QuestionBuffer, TriviaSession, load_bank
 from .utils.paginator import Pages
 
 logging.basicConfig(level=logging.INFO)
@@ -16,6 +19,11 @@ class Community:
 
     def __init__(self, bot):
         self.bot = bot
+        self.trivia_sessions = {}
+        self.questions = QuestionBuffer(bot.session, load_bank(os.path.join(bot.path, 'data', 'trivia.json')))
+
+    def __unload(self):
+        self.questions.stop()
 
     @commands.group(case_insensitive=True, invoke_without_command=True)
     async def wiki(self, ctx, *, page=None):
@@ -42,8 +50,7 @@ class Community:
             else:
                 await ctx.send("There are no wiki pages.")
 
-        async with ctx.bot.db.acquire() as db:
-            wiki = await db.fetchrow("SELECT * FROM wiki WHERE name=$1 AND guild_id=$2", page, ctx.guild.id)
+        wiki = await queries.wiki_page(ctx.bot.db, ctx.guild.id, page)
 
         if wiki:
             if str(wiki['image']).startswith('https:'):
@@ -86,8 +93,7 @@ class Community:
                 embed.set_thumbnail(url=user.avatar_url)
 
             await ctx.send(embed=embed)
-            async with ctx.bot.db.acquire() as db:
-                await db.execute("UPDATE wiki SET views = views + 1 WHERE name=$1 AND guild_id=$2", page, ctx.guild.id)
+            await queries.wiki_view(ctx.bot.db, ctx.guild.id, page)
 
     @wiki.error
     async def wiki_handler(self, ctx, error):
@@ -105,8 +111,7 @@ class Community:
 
         name_ = await self.bot.wait_for('message', check=name)
         name_ = name_.content
-        async with ctx.bot.db.acquire() as db:
-            wiki_page = await db.fetchrow("SELECT name FROM wiki WHERE name=$1 AND guild_id=$2", name_, ctx.guild.id)
+        wiki_page = await queries.wiki_page(ctx.bot.db, ctx.guild.id, name_)
 
         if wiki_page is None:
             await ctx.send(f"So the wiki page is named {name_}? \n"
@@ -247,8 +252,7 @@ class Community:
         page_ = await self.bot.wait_for('message', check=page)
         page_ = page_.content
 
-        async with ctx.bot.db.acquire() as db:
-            wiki = await db.fetchrow("SELECT * FROM wiki WHERE name=$1 AND guild_id=$2", page_, ctx.guild.id)
+        wiki = await queries.wiki_page(ctx.bot.db, ctx.guild.id, page_)
 
         time = datetime.datetime.now()
         if wiki:
@@ -272,7 +276,7 @@ class Community:
 
                 await ctx.send(f"I have set the quote for **{page_}** to {content_}")
                 async with ctx.bot.db.acquire() as db:
-                    info = await db.fetchrow("SELECT * FROM wiki WHERE name = $1", page_)
+                    info = await queries.wiki_page(db, ctx.guild.id, page_)
                     await db.execute("UPDATE wiki SET last_modified = $1 WHERE name=$2 AND guild_id=$3",
                                      time.strftime("%c"), page_, ctx.guild.id)
 
@@ -296,7 +300,7 @@ class Community:
 
                 await ctx.send(f"I have set the aliases for **{page_}** to {content_}")
                 async with ctx.bot.db.acquire() as db:
-                    info = await db.fetchrow("SELECT * FROM wiki WHERE name = $1", page_)
+                    info = await queries.wiki_page(db, ctx.guild.id, page_)
                     await db.execute("UPDATE wiki SET last_modified = $1 WHERE name=$2 AND guild_id=$3",
                                      time.strftime("%c"), page_, ctx.guild.id)
 
@@ -321,7 +325,7 @@ class Community:
 
                 await ctx.send(f"I have set the bio for **{page_}** to {content_}")
                 async with ctx.bot.db.acquire() as db:
-                    info = await db.fetchrow("SELECT * FROM wiki WHERE name = $1", page_)
+                    info = await queries.wiki_page(db, ctx.guild.id, page_)
                     await db.execute("UPDATE wiki SET last_modified = $1 WHERE name=$2 AND guild_id=$3",
                                      time.strftime("%c"), page_, ctx.guild.id)
 
@@ -346,7 +350,7 @@ class Community:
                 await ctx.send(f"I have set the role(s) for **{page_}** to {content_}")
 
                 async with ctx.bot.db.acquire() as db:
-                    info = await db.fetchrow("SELECT * FROM wiki WHERE name = $1", page_)
+                    info = await queries.wiki_page(db, ctx.guild.id, page_)
                     await db.execute("UPDATE wiki SET last_modified = $1 WHERE name=$2 AND guild_id=$3",
                                      time.strftime("%c"), page_, ctx.guild.id)
 
@@ -372,7 +376,7 @@ class Community:
                 await ctx.send(f"I have set the games for **{page_}** to {content_}")
 
                 async with ctx.bot.db.acquire() as db:
-                    info = await db.fetchrow("SELECT * FROM wiki WHERE name = $1", page_)
+                    info = await queries.wiki_page(db, ctx.guild.id, page_)
                     await db.execute("UPDATE wiki SET last_modified = $1 WHERE name=$2 AND guild_id=$3",
                                      time.strftime("%c"), page_, ctx.guild.id)
 
@@ -418,7 +422,7 @@ class Community:
                 await ctx.send(f"I have set the color for **{page_}** to {content_}")
 
                 async with ctx.bot.db.acquire() as db:
-                    info = await db.fetchrow("SELECT * FROM wiki WHERE name = $1", page_)
+                    info = await queries.wiki_page(db, ctx.guild.id, page_)
                     await db.execute("UPDATE wiki SET last_modified = $1 WHERE name=$2 AND guild_id=$3",
                                      time.strftime("%c"), page_, ctx.guild.id)
 
@@ -452,7 +456,7 @@ class Community:
 
                 await ctx.send(f"I have set the image for **{page_}** to {image}")
                 async with ctx.bot.db.acquire() as db:
-                    info = await db.fetchrow("SELECT * FROM wiki WHERE name = $1", page_)
+                    info = await queries.wiki_page(db, ctx.guild.id, page_)
                     await db.execute("UPDATE wiki SET last_modified = $1 WHERE name=$2 AND guild_id=$3",
                                      time.strftime("%c"), page_)
 
@@ -469,8 +473,7 @@ class Community:
     @wiki.command()
     async def delete(self, ctx, *, page):
         """Deletes existing wiki pages"""
-        async with ctx.bot.db.acquire() as db:
-            wiki = await db.fetchrow("SELECT * FROM wiki WHERE name = $1 AND guild_id=$2", page, ctx.guild.id)
+        wiki = await queries.wiki_page(ctx.bot.db, ctx.guild.id, page)
 
         if wiki:
             if ctx.author.id == wiki['creator'] or ctx.author.guild_permissions.manage_guild:
@@ -490,7 +493,7 @@ class Community:
                 else:
                     if str(reaction.emoji) == '<:BlurpleCheck:452390337382449153>':
                         await ctx.send(f"Deleted the {page.title()} wiki page from database.")
-                        await db.execute("DELETE FROM wiki WHERE name= $1 AND guild_id=$2", page, ctx.guild.id)
+                        await ctx.bot.db.execute("DELETE FROM wiki WHERE name= $1 AND guild_id=$2", page, ctx.guild.id)
                     else:
                         return await ctx.send("So you changed your mind.")
             else:
@@ -501,8 +504,7 @@ class Community:
     @wiki.command()
     async def info(self, ctx, *, page):
         """Shows information about a wiki page."""
-        async with ctx.bot.db.acquire() as db:
-            wiki = await db.fetchrow("SELECT * FROM wiki WHERE name=$1 AND guild_id=$2", page, ctx.guild.id)
+        wiki = await queries.wiki_page(ctx.bot.db, ctx.guild.id, page)
 
         if str(wiki['image']).startswith('https:'):
             user = wiki['image']
@@ -540,36 +542,16 @@ class Community:
     async def trivia(self, ctx):
         """Answer trivia questions."""
 
-        if ctx.author == self.bot.user:
-            return
-
-        async with self.bot.session.get("http://jservice.io/api/random?json") as r:
-            question = await r.json()
-            question = question[0]
-
-        embed = discord.Embed(color=self.bot.embed_color)
-        embed.title = 'Trivia Question'
-        embed.description = question['question']
-        text = question['answer']
-        vowels = ('a', 'e', 'i', 'o', 'u')
-        for c in text:
-            if c in vowels:
-                text = text.replace(c, "-")
-
-        embed.set_footer(text=f'Clue: {text}')
-        await ctx.send(embed=embed)
-
-        def check(m):
-            return m.content.lower() == question['answer'].lower() and m.channel == ctx.message.channel
+        if ctx.channel.id in self.trivia_sessions:
+            return await ctx.send("There is already a trivia game running in this channel.")
 
+        self.questions.start(ctx.bot.loop)
+        session = TriviaSession(ctx, self.questions)
+        self.trivia_sessions[ctx.channel.id] = session
         try:
-            right = await self.bot.wait_for('message', check=check, timeout=30)
-        except asyncio.TimeoutError:
-            await ctx.send(f"Time's up! The answer was {question['answer']}!")
-        else:
-            await ctx.send(f"{right.author.mention} is correct! The answer was {question['answer']}!")
-            command = self.bot.get_command('trivia')
-            await ctx.invoke(command)
+            await session.run()
+        finally:
+            del self.trivia_sessions[ctx.channel.id]
 
 
 def setup(bot):
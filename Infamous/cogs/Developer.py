@@ -3,7 +3,6 @@ import datetime
 import inspect
 import logging
 import os
-import random
 
 import aiohttp
 import asyncpg
@@ -74,6 +73,7 @@ class Developer:
         embed.set_author(name=self.bot.user, icon_url=self.bot.user.avatar_url)
         embed.description = f'Well that was a good {days}d {hours}h {minutes}m {seconds}s of activity.'
         await ctx.send(embed=embed)
+        await self.bot.notifier.close()
         await self.bot.db.close()
         await self.bot.logout()
 
@@ -182,7 +182,7 @@ class Developer:
         """Imitate a random person."""
 
         await ctx.message.delete()
-        user = random.choice([x for x in ctx.guild.members if not x.bot])
+        user = ctx.bot.member_index.sample(ctx.guild)
         url = 'https://discordapp.com/api/webhooks/432064261120851979/' \
               '6Ems0Op4A2rEGSG5b0lGjVd1n1qxcYLvFJUxdweUKs3dNGDD8BKn6LgpFsAWnLkWtUb7'
 
@@ -254,24 +254,24 @@ class Developer:
         try:
             async with ctx.bot.db.acquire() as db:
                 await db.execute("INSERT INTO blocked VALUES($1, $2)", user.id, reason)
-
-            self.bot.blocked[ctx.author.id] = reason
         except asyncpg.exceptions.UniqueViolationError:
             return await ctx.send(f"{user.name} is already blocked")
 
+        self.bot.blocked[user.id] = reason
+        await self.bot.notifier.publish('block', user_id=user.id, reason=reason)
         await ctx.send(f"Blocked {user.name} from using the bot because: {reason}")
 
     @commands.command(hidden=True)
     @checks.is_admin()
     async def unblock(self, ctx, user: discord.Member):
-        try:
-            async with ctx.bot.db.acquire() as db:
-                await db.execute("DELETE FROM blocked WHERE id=$1", user.id)
+        async with ctx.bot.db.acquire() as db:
+            deleted = await db.execute("DELETE FROM blocked WHERE id=$1", user.id)
 
-            del self.bot.blocked[ctx.author.id]
-        except asyncpg.exceptions.UniqueViolationError:
+        if deleted == "DELETE 0":
             return await ctx.send(f"{user.name} was never blocked")
 
+        self.bot.blocked.pop(user.id, None)
+        await self.bot.notifier.publish('unblock', user_id=user.id)
         await ctx.send(f"{user.name} has been unblocked.")
 
     @commands.command(hidden=True)
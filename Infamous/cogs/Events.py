@@ -1,11 +1,11 @@
 import logging
 import sys
 import os
-import aiohttp
 import traceback
 import discord
 from discord.ext import commands
 from .utils import functions as func
+from .utils.economy import EconomyError
 
 logging.basicConfig(level=logging.INFO)
 
@@ -16,6 +16,16 @@ class Events:
     def __init__(self, bot):
         self.bot = bot
 
+    async def post_server_count(self, shard_id):
+        """Posts the guild count of a shard, DBL sums the shards reported by every process."""
+        url = f"https://discordbots.org/api/bots/{self.bot.user.id}/stats"
+        headers = {"Authorization": os.getenv("DBL")}
+        payload = {"server_count": self.bot.stats.shard_guilds[shard_id],
+                   "shard_id": shard_id,
+                   "shard_count": self.bot.shard_count}
+        async with self.bot.session.post(url, data=payload, headers=headers):
+            pass
+
     # Meant for speaking through bot
     async def on_message(self, message):
         if not message.guild:
@@ -34,14 +44,24 @@ class Events:
                 except discord.Forbidden:
                     await message.channel.send("Don't post invite links.")
 
-    async def on_message_edit(self, before, after):
-        if after.author.id in [299879858572492802, 507490400534265856]:
-            if before.content != after.content:
+    async def on_raw_message_edit(self, payload):
+        content = payload.data.get('content')
+        before = self.bot.message_cache.get(payload.message_id)
+        if content is None or before is None:
+            return
+
+        if before.author_id in [299879858572492802, 507490400534265856]:
+            if before.changed(content):
+                self.bot.message_cache.update(payload.message_id, content)
+                after = await self.bot.get_channel(before.channel_id).get_message(payload.message_id)
                 ctx = await self.bot.get_context(after)
                 if f"{ctx.prefix}eval" in after.content:
                     command = self.bot.get_command("eval")
                     await ctx.invoke(command, body=after.content.strip(f"{ctx.prefix}eval "))
 
+    async def on_raw_message_delete(self, payload):
+        self.bot.message_cache.remove(payload.message_id)
+
     async def on_command_error(self, ctx, error):
         error = getattr(error, 'original', error)
         ignored = (commands.CommandNotFound, commands.UserInputError)
@@ -84,7 +104,7 @@ class Events:
             embed.title = ctx.command.signature
             embed.description = ctx.command.help
             await ctx.send(embed=embed)
-        elif isinstance(error, commands.CheckFailure):
+        elif isinstance(error, (commands.CheckFailure, EconomyError)):
             return await ctx.send(error)
 
         await ctx.send("An error has occurred, don't worry this will be troubleshooted directly to the owner.")
@@ -101,12 +121,8 @@ class Events:
         traceback.print_exception(type(error), error, error.__traceback__, file=sys.stderr)
 
     async def on_guild_join(self, guild):
-        self.bot.prefixes[guild.id] = None
-        self.bot.disabled_commands[guild.id] = []
-        self.bot.alerts[guild.id] = True
-        async with self.bot.db.acquire() as db:
-            await db.execute("INSERT INTO settings VALUES($1)", guild.id)
-            await db.execute("UPDATE settings SET alerts=TRUE WHERE guild=$1", guild.id)
+        self.bot.stats.add_guild(guild)
+        await self.bot.settings.get(guild.id)
 
         number = len(guild.text_channels)
         for channel in guild.text_channels:
@@ -118,11 +134,7 @@ class Events:
         if number == 0:
             return await guild.owner.send(embed=func.welcome())
 
-        url = f"https://discordbots.org/api/bots/{self.bot.user.id}/stats"
-        headers = {"Authorization": os.getenv("DBL")}
-        payload = {"server_count": len(self.bot.guilds)}
-        async with aiohttp.ClientSession() as s:
-            await s.post(url, data=payload, headers=headers)
+        await self.post_server_count(guild.shard_id)
 
         if not discord.utils.get(guild.roles, name="Muted"):
             try:
@@ -132,19 +144,33 @@ class Events:
             except discord.Forbidden:
                 pass
 
+    async def on_member_join(self, member):
+        self.bot.member_index.add(member)
+        self.bot.stats.add_member(member)
+
+    async def on_member_remove(self, member):
+        self.bot.member_index.remove(member)
+        self.bot.stats.remove_member(member)
+
+    async def on_member_update(self, before, after):
+        self.bot.member_index.update(before, after)
+
+    async def on_guild_channel_create(self, channel):
+        self.bot.stats.add_channel(channel)
+
+    async def on_guild_channel_delete(self, channel):
+        self.bot.stats.remove_channel(channel)
+        self.bot.message_cache.remove_channel(channel.id)
+
     async def on_guild_remove(self, guild):
-        del self.bot.prefixes[guild.id]
-        del self.bot.disabled_commands[guild.id]
-        del self.bot.alerts[guild.id]
+        self.bot.member_index.drop(guild)
+        self.bot.stats.remove_guild(guild)
+        self.bot.settings.evict(guild.id)
         async with self.bot.db.acquire() as db:
             await db.execute("DELETE FROM settings WHERE guild=$1", guild.id)
             await db.execute("DELETE FROM wiki WHERE guild_id=$1", guild.id)
 
-        url = f"https://discordbots.org/api/bots/{self.bot.user.id}/stats"
-        headers = {"Authorization": os.getenv("DBL")}
-        payload = {"server_count": len(self.bot.guilds)}
-        async with aiohttp.ClientSession() as s:
-            await s.post(url, data=payload, headers=headers)
+        await self.post_server_count(guild.shard_id)
 
 
 def setup(bot):
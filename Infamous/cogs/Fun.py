@@ -6,6 +6,8 @@ import discord
 from PIL import Image
 from discord.ext import commands
 
+from .utils.content import ContentPool
+
 logging.basicConfig(level=logging.INFO)
 
 
@@ -18,6 +20,14 @@ class Fun:
 
     def __init__(self, bot):
         self.bot = bot
+        self.quote_pool = ContentPool(bot.db, bot.loop, 'quotes', 'quote', notifier=bot.notifier)
+        self.question_pool = ContentPool(bot.db, bot.loop, 'questions', 'question', notifier=bot.notifier)
+        bot.notifier.register('quotes', self.quote_pool.receive)
+        bot.notifier.register('questions', self.question_pool.receive)
+
+    def __unload(self):
+        self.bot.notifier.unregister('quotes')
+        self.bot.notifier.unregister('questions')
 
     # Random Quotes
     @commands.group(
@@ -28,17 +38,15 @@ class Fun:
     async def quotes(self, ctx):
         """Shows a random quote from the community."""
 
-        async with ctx.bot.db.acquire() as db:
-            quotes = await db.fetchrow("SELECT quote FROM quotes WHERE guild=$1 ORDER BY RANDOM() LIMIT 1",
-                                       ctx.guild.id)
+        quote = await self.quote_pool.draw(ctx.guild.id)
 
-        if quotes:
+        if quote:
             embed = discord.Embed(title="Some random quote",
                                   color=self.bot.embed_color,
                                   timestamp=datetime.datetime.utcnow()
                                   )
 
-            embed.set_image(url=quotes[0])
+            embed.set_image(url=quote)
             await ctx.send(embed=embed)
         else:
             return await ctx.send(f"Insert screenshots of your fellow server members saying memorable things by "
@@ -49,8 +57,7 @@ class Fun:
         if not link:
             link = ctx.message.attachments[0].url
 
-        async with ctx.bot.db.acquire() as db:
-            await db.execute("INSERT INTO quotes VALUES($1, $2)", link, ctx.guild.id)
+        await self.quote_pool.add(ctx.guild.id, link)
 
         await ctx.message.add_reaction(':FAXcheck:428160543975800833')
 
@@ -59,13 +66,11 @@ class Fun:
     async def question(self, ctx):
         """Asks community provided questions."""
 
-        async with ctx.bot.db.acquire() as db:
-            question = await db.fetchrow("SELECT * FROM questions WHERE guild=$1 ORDER BY RANDOM() LIMIT 1",
-                                         ctx.guild.id)
+        question = await self.question_pool.draw(ctx.guild.id)
 
         if question:
             embed = discord.Embed(title="Random Question",
-                                  description=question[0],
+                                  description=question,
                                   color=self.bot.embed_color)
 
             await ctx.send(embed=embed)
@@ -76,10 +81,9 @@ class Fun:
     async def add(self, ctx, *, string):
         """Adds a question to the question pool."""
 
-        async with ctx.bot.db.acquire() as db:
-            await db.execute("INSERT INTO questions VALUES($1, $2)", string, ctx.guild.id)
+        await self.question_pool.add(ctx.guild.id, string)
 
-        await ctx.author.add_reaction('👌')
+        await ctx.message.add_reaction('👌')
 
     # Ask a Question That Gets Answered by a Randomly Picked User
     @commands.command()
@@ -90,7 +94,7 @@ class Fun:
                               color=self.bot.embed_color,
                               timestamp=datetime.datetime.utcnow()
                               )
-        roulette = random.choice([x for x in ctx.guild.members if not x.bot])
+        roulette = ctx.bot.member_index.sample(ctx.guild)
         embed.set_image(url=roulette.avatar_url_as(
             format='png',
             size=1024)
@@ -110,12 +114,8 @@ class Fun:
              'http://www.wehoville.com/wp-content/uploads/2014/03/FirstKiss6.png'
              ])
 
-        gay = random.choice(
-            [x for x in ctx.guild.members if not x.bot]
-        )
-        gay2 = random.choice(
-            [x for x in ctx.guild.members if not x.bot]
-        )
+        gay = ctx.bot.member_index.sample(ctx.guild)
+        gay2 = ctx.bot.member_index.sample(ctx.guild)
         embed = discord.Embed(title="Random Gay Couple",
                               description=f"<@{gay.id}> and <@{gay2.id}> have a gay/lesbian "
                                           f"relationship with each other.",
@@ -1,7 +1,6 @@
 import asyncio
 import logging
 import os
-import random
 from io import BytesIO
 
 import discord
@@ -61,7 +60,7 @@ class Original:
     async def nick(self, ctx, *, string):
         """Set's the nick of a random person, with nick of choice."""
 
-        user = random.choice([x for x in ctx.guild.members if not x.bot])
+        user = ctx.bot.member_index.sample(ctx.guild)
         try:
             await user.edit(nick=string)
             embed = discord.Embed(
@@ -84,16 +83,10 @@ class Original:
     async def guess(self, ctx):
         """Guess who this person is."""
 
-        user1 = [x for x in ctx.guild.members if not x.bot]
-        user = random.choice(user1)
+        user = ctx.bot.member_index.sample(ctx.guild, 'avatar')
         discrim = str(user).split(user.name)
         discrim = ''.join(discrim)
 
-        if not user.avatar:
-            user = random.choice(user1)
-            discrim = str(user).split(user.name)
-            discrim = ''.join(discrim)
-
         embed = discord.Embed(color=self.bot.embed_color)
         embed.set_author(name='Can you guess who this is?')
         embed.description = f'Their discriminant is `{discrim}`'
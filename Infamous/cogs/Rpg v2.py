@@ -1,9 +1,16 @@
 import discord
 import asyncio
+import logging
 import random
+from io import BytesIO
 from discord.ext import commands
 from .utils import rpg_tools as rpg
 from .utils import checks
+from .utils import combat
+from .utils.constants import (EXPEDITIONS, GAMBLE_COOLDOWN, MASTER_COOLDOWN, MASTER_PRICE_DIVISOR, MASTER_TIERS,
+                              RAFFLE_LEVEL, RAFFLE_MASTER, RAFFLE_PRIZES, REWARDS, shop_items)
+from .utils import queries
+from .utils.economy import AlreadyOwned, InsufficientFunds
 from .utils.paginator import SimplePaginator
 
 monologue = """
@@ -22,41 +29,8 @@ the term used for the ones who took the Kleric drug.
 You can be a superhero or supervillian and interact in the city of Sterben 
 where you can take on other superheroes or supervillians.
             """
-shop_items = {"Super Strength": [12000, 'https://imgur.com/vbtnxdi.png',
-                                 "Allows you to lift 10x your weight.", 250, 300],
 
-              "Flight": [15000, 'https://imgur.com/jr8CyIk.png',
-                         "Allows you to fly without an aircraft.", 200, 250],
-
-              "Telekinesis": [18000, 'https://imgur.com/2UWGYBq.png',
-                              "Control objects with your mind.", 300, 350],
-
-              "Super Speed": [21000, 'https://imgur.com/bBJujmH.png',
-                              "Run faster than a speeding bullet.", 280, 330],
-
-              "Super Intelligence": [24000, 'https://imgur.com/k9V9ywi.png',
-                                     "Outsmart your opponents.", 180, 230],
-
-              "Fast Regeneration": [27000, 'https://imgur.com/97ZtaFe.gif',
-                                    "Wounds won't stop you.", 220, 270],
-
-              "Heat Vision": [30000, 'https://imgur.com/fV8pIJo.png',
-                              "Destroy things with your vision.", 320, 370],
-
-              "Telepathy": [33000, 'https://imgur.com/0gbfMDG.png',
-                            "Control other people's minds.", 100, 150],
-
-              "Invisibility": [36000, 'https://imgur.com/v6MbTV5.gif',
-                               "Become the ultimate spy.", 120, 170],
-
-              "Freeze Breath": [39000, 'https://imgur.com/ot2zakO.gif',
-                                "Freeze things with your breath.", 350, 400],
-
-              "Sonic Scream": [41000, 'https://imgur.com/El8Xh9Y.gif',
-                               "Break glass with just your voice.", 400, 450],
-
-              "Electrokinesis": [44000, 'https://imgur.com/Y8eBb18.png',
-                                 "Harness the power of electricity.", 420, 470]}
+log = logging.getLogger(__name__)
 
 
 class Rpg2:
@@ -80,8 +54,13 @@ class Rpg2:
     def __init__(self, bot):
         self.bot = bot
 
+    def expedition(self, ctx):
+        """The expedition the author is on, other than the invoking command, if any."""
+        active = ctx.bot.cooldowns.active(ctx.author.id)
+        return next((name for name in EXPEDITIONS if name != ctx.command.name and name in active), None)
+
     async def __before_invoke(self, ctx):
-        if self.bot.alerts[ctx.guild.id] is True:
+        if (await self.bot.settings.get(ctx.guild.id)).alerts:
             await ctx.send(
                 f"This RPG is being actively developed, which means there could be some errors that "
                 f"haven't been discovered or I haven't noticed in the code. Please report it via "
@@ -130,23 +109,22 @@ class Rpg2:
                 active = False
 
     @commands.command(aliases=['quest', 'adv'])
-    @commands.cooldown(1, 600, commands.BucketType.user)
+    @commands.cooldown(1, REWARDS['adventure'].cooldown, commands.BucketType.user)
     @checks.registered2()
     async def adventure(self, ctx):
         """Patrol the streets to get rewards."""
 
-        mission_ = ['mission', 'odyssey']
-        for i in mission_:
-            cmd = self.bot.get_command(i)
-            if cmd.is_on_cooldown(ctx):
-                await ctx.send(f"You can't use `{ctx.prefix}mission` and `{ctx.prefix}adventure` at the same time.")
-                ctx.command.reset_cooldown(ctx)
-                return
+        running = self.expedition(ctx)
+        if running:
+            await ctx.send(f"You can't use `{ctx.prefix}{ctx.command}` and `{ctx.prefix}{running}` at the same time.")
+            ctx.command.reset_cooldown(ctx)
+            return
 
+        reward = REWARDS['adventure']
         await ctx.send("You went on a adventure; you will return in 10 minutes.")
-        await asyncio.sleep(600)
-        money = random.randint(20, 100)
-        xp = random.randint(20, 100)
+        await asyncio.sleep(reward.cooldown)
+        money = random.randint(*reward.money)
+        xp = random.randint(*reward.xp)
         await ctx.send(random.choice([
             f'You stopped a robbery and apprehended a supervillian; you were rewarded with ${money} and {xp}xp.',
             f'You defeated a supervillian and stole their ${money} and {xp}xp.',
@@ -160,24 +138,23 @@ class Rpg2:
 
     @commands.command()
     @checks.registered2()
-    @commands.cooldown(1, 3600, commands.BucketType.user)
+    @commands.cooldown(1, REWARDS['odyssey'].cooldown, commands.BucketType.user)
     async def odyssey(self, ctx):
         """Go on a long journey."""
 
-        mission_ = ['mission', 'adventure']
-        for i in mission_:
-            cmd = self.bot.get_command(i)
-            if cmd.is_on_cooldown(ctx):
-                await ctx.send(f"You can't use `{ctx.prefix}mission` and `{ctx.prefix}adventure` at the same time.")
-                ctx.command.reset_cooldown(ctx)
-                return
+        running = self.expedition(ctx)
+        if running:
+            await ctx.send(f"You can't use `{ctx.prefix}{ctx.command}` and `{ctx.prefix}{running}` at the same time.")
+            ctx.command.reset_cooldown(ctx)
+            return
 
         await ctx.send("You have to find the oldest and purebred superhuman in existence who was said to have had "
                        "the gift of immortality; making her ageless. She also possesses the power of super speed and "
                        "is one of the fastest speedsters.")
-        await asyncio.sleep(3600)
-        xp = random.randint(250, 750)
-        mon = random.randint(250, 750)
+        reward = REWARDS['odyssey']
+        await asyncio.sleep(reward.cooldown)
+        xp = random.randint(*reward.xp)
+        mon = random.randint(*reward.money)
         await ctx.send(
             f"You found the immortal and she gave you insight about your powers; she gave you {xp}xp and ${mon}")
         await rpg.level2(ctx, mon, xp)
@@ -188,41 +165,44 @@ class Rpg2:
         """View the stats of fellow superhumans."""
         if not user:
             user = ctx.author
-        stats = (await rpg.fetch_user2(ctx, user))
-        async with ctx.bot.db.acquire() as db:
-            abilities_ = await db.fetch("SELECT * FROM abilities WHERE id=$1", user.id)
+        stats, abilities_ = await queries.profile_full(ctx.bot.db, user.id)
+        if not stats:
+            return await ctx.send("This user isn't registered.")
 
+        main = "None"
         ability = []
         for i in abilities_:
-            if i[1] == stats[4]:
-                main = f"{i[1]} - Level {i[2]}"
+            if i['ability'] == stats[4]:
+                main = f"{i['ability']} - Level {i['level']}"
             else:
-                ability.append(f"**{i[1]}** - Level {i[2]}")
+                ability.append(f"**{i['ability']}** - Level {i['level']}")
 
         if ability:
             ability = '\n'.join(ability)
         else:
             ability = 'None'
+
+        async with ctx.typing():
+            file = discord.File(filename="profile.png", fp=BytesIO(await ctx.bot.cards.render(user, stats)))
         await ctx.send(embed=discord.Embed(color=self.bot.embed_color, description=f"Accumulated XP: {stats[2]}")
                        .set_author(name=f"{user.display_name} | Level {stats[1]}", icon_url=user.avatar_url)
                        .add_field(name="Info", value=f"**Main Ability:** {main} \n"
                                                      f"**Balance:** {stats[3]}")
                        .add_field(name="Other Abilities", value=ability, inline=False)
-                       )
+                       .set_image(url="attachment://profile.png"),
+                       file=file)
 
     @commands.command()
     @checks.registered2()
-    @commands.cooldown(1, 900, commands.BucketType.user)
+    @commands.cooldown(1, REWARDS['mission'].cooldown, commands.BucketType.user)
     async def mission(self, ctx):
         """Participate in an assigned mission."""
 
-        adventure_ = ['adventure', 'odyssey']
-        for i in adventure_:
-            cmd = self.bot.get_command(i)
-            if cmd.is_on_cooldown(ctx):
-                await ctx.send(f"You can't use `{ctx.prefix}{ctx.command}` and `{ctx.prefix}{i}` at the same time.")
-                ctx.command.reset_cooldown(ctx)
-                return
+        running = self.expedition(ctx)
+        if running:
+            await ctx.send(f"You can't use `{ctx.prefix}{ctx.command}` and `{ctx.prefix}{running}` at the same time.")
+            ctx.command.reset_cooldown(ctx)
+            return
 
         mission = random.choice([
             "Gather intel about a infamous supervillian gang.",
@@ -234,9 +214,10 @@ class Rpg2:
             "Stop a Kleric drug deal from happening."
         ])
         await ctx.send(f"**You've been sent to:** {mission} \nYou will return in 15 minutes.")
-        await asyncio.sleep(900)
-        money = random.randint(100, 250)
-        xp = random.randint(100, 250)
+        reward = REWARDS['mission']
+        await asyncio.sleep(reward.cooldown)
+        money = random.randint(*reward.money)
+        xp = random.randint(*reward.xp)
         await ctx.send(f"You have been awarded ${money} and {xp}xp for completing the mission.")
         await rpg.level2(ctx, money, xp)
         await rpg.guild_level(ctx, xp)
@@ -264,62 +245,53 @@ class Rpg2:
     async def acquire(self, ctx, *, ability):
         """Buy new abilities from the shop."""
 
-        user = (await rpg.fetch_user2(ctx))
-        abilities = await rpg.fetch_abilities(ctx)
-        if ability.title() in abilities:
+        ability = ability.title()
+        price, image, description, damage, durability = shop_items[ability]
+        try:
+            await ctx.bot.economy.acquire_ability(ctx.message.id, ctx.author.id, ability, price, damage, durability)
+        except AlreadyOwned:
             return await ctx.send(f"You already have this ability, use `{ctx.prefix}master <ability>`")
+        except InsufficientFunds as e:
+            return await ctx.send(f"{ctx.author.mention} you need ${e.needed} more to acquire **{ability}**.")
 
-        if user[3] >= shop_items[ability.title()][0]:
-            async with ctx.bot.db.acquire() as db:
-                await db.execute("INSERT INTO abilities VALUES($1, $2, $3, $4, $5, $6)",
-                                 ctx.author.id, ability.title(), 1, 0, shop_items[ability.title()][3],
-                                 shop_items[ability.title()][4])
-
-                await db.execute("UPDATE profiles SET bal = bal - $1 WHERE id=$2",
-                                 shop_items[ability.title()][0], ctx.author.id)
-
-            await ctx.send(f"**You have acquired:** {ability.title()}",
-                           embed=discord.Embed(color=self.bot.embed_color, description=shop_items[ability.title()][2])
-                           .set_author(name=f"You have acquired: {ability.title()}")
-                           .set_image(url=shop_items[ability.title()][1])
-                           )
-        else:
-            await ctx.send(f"{ctx.author.mention} you need ${shop_items[ability.title()][0] - user[3]} more to acquire"
-                           f" **{ability.title()}**.")
+        await ctx.send(f"**You have acquired:** {ability}",
+                       embed=discord.Embed(color=self.bot.embed_color, description=description)
+                       .set_author(name=f"You have acquired: {ability}")
+                       .set_image(url=image)
+                       )
 
     @commands.command()
     @checks.registered2()
-    @commands.cooldown(1, 3600, commands.BucketType.user)
+    @commands.cooldown(1, REWARDS['loot'].cooldown, commands.BucketType.user)
     async def loot(self, ctx):
         """Get hourly loot."""
 
-        loot_ = ['adventure', 'mission', 'odyssey']
-        for i in loot_:
-            cmd = self.bot.get_command(i)
-            if cmd.is_on_cooldown(ctx):
-                await ctx.send(f"You cannot use `{ctx.prefix}{ctx.command}` and `{ctx.prefix}{i}`")
-                ctx.command.reset_cooldown(ctx)
-                return
+        running = self.expedition(ctx)
+        if running:
+            await ctx.send(f"You cannot use `{ctx.prefix}{ctx.command}` and `{ctx.prefix}{running}`")
+            ctx.command.reset_cooldown(ctx)
+            return
 
-        await ctx.send("You have been given $250 and 250xp")
-        await rpg.level2(ctx, 250, 250)
-        await rpg.guild_level(ctx, 250)
+        money, xp = random.randint(*REWARDS['loot'].money), random.randint(*REWARDS['loot'].xp)
+        await ctx.send(f"You have been given ${money} and {xp}xp")
+        await rpg.level2(ctx, money, xp)
+        await rpg.guild_level(ctx, xp)
 
     @commands.command()
     @checks.registered2()
-    @commands.cooldown(1, 84600, commands.BucketType.user)
+    @commands.cooldown(1, REWARDS['daily'].cooldown, commands.BucketType.user)
     async def daily(self, ctx):
         """Get daily loot."""
-        daily_ = ['adventure', 'mission', 'odyssey']
-        for i in daily_:
-            cmd = self.bot.get_command(i)
-            if cmd.is_on_cooldown(ctx):
-                await ctx.send(f"You can't use `{ctx.prefix}{ctx.command}` and `{ctx.prefix}{i}` at the same time.")
-                return
+        running = self.expedition(ctx)
+        if running:
+            await ctx.send(f"You can't use `{ctx.prefix}{ctx.command}` and `{ctx.prefix}{running}` at the same time.")
+            ctx.command.reset_cooldown(ctx)
+            return
 
-        await ctx.send("You have been given $500 and 500xp")
-        await rpg.level2(ctx, 500, 500)
-        await rpg.guild_level(ctx, 500)
+        money, xp = random.randint(*REWARDS['daily'].money), random.randint(*REWARDS['daily'].xp)
+        await ctx.send(f"You have been given ${money} and {xp}xp")
+        await rpg.level2(ctx, money, xp)
+        await rpg.guild_level(ctx, xp)
 
     @daily.error
     async def daily_handler(self, ctx, error):
@@ -333,12 +305,11 @@ class Rpg2:
 
     @commands.command()
     @checks.registered2()
-    @commands.cooldown(1, 900, commands.BucketType.user)
+    @commands.cooldown(1, MASTER_COOLDOWN, commands.BucketType.user)
     async def master(self, ctx):
         """Upgrade your abilities."""
 
         abilities = await rpg.fetch_abilities(ctx)
-        user = (await rpg.fetch_user2(ctx))
         await ctx.send(f"Choose an ability to master: {','.join(abilities)}")
 
         def check(m):
@@ -349,75 +320,66 @@ class Rpg2:
         except asyncio.TimeoutError:
             return await ctx.send("I guess you don't want to pick an ability.")
 
-        if user[3] >= shop_items[msg][0] / 4:
-            async with ctx.bot.db.acquire() as db:
-                await db.execute("UPDATE profiles SET bal = bal - $1 WHERE id = $2",
-                                 shop_items[msg][0] / 4, ctx.author.id)
-
-            choice = random.choice(["Low", "Middle", "Greater"])
-            if choice == "Low":
-                xp = random.randint(20, 100)
-                await ctx.send(f"You earned {xp}xp and added 50 points to your {msg} stats.")
-                await rpg.ability_level(ctx, xp, 50, 50, msg)
-            elif choice == "Middle":
-                xp = random.randint(100, 250)
-                await ctx.send(f"You earned {xp}xp and added 100 points to your {msg} stats.")
-                await rpg.ability_level(ctx, xp, 100, 100, msg)
-            else:
-                xp = random.randint(150, 300)
-                await ctx.send(f"You earned {xp}xp and added 150 points to your {msg} stats")
-                await rpg.ability_level(ctx, xp, 150, 150, msg)
-        else:
-            return await ctx.send(f"{ctx.author.mention} you need ${shop_items[msg][0] / 4 - user[3]} more to master.")
+        price = shop_items[msg][0] // MASTER_PRICE_DIVISOR
+        try:
+            await ctx.bot.economy.master_ability(ctx.message.id, ctx.author.id, msg, price)
+        except InsufficientFunds as e:
+            return await ctx.send(f"{ctx.author.mention} you need ${e.needed} more to master.")
+
+        low, high, points = random.choice(MASTER_TIERS)
+        xp = random.randint(low, high)
+        await ctx.send(f"You earned {xp}xp and added {points} points to your {msg} stats.")
+        await rpg.ability_level(ctx, xp, points, points, msg)
 
     @commands.command()
     @checks.registered2()
     async def active(self, ctx):
         """Shows all the active cooldowns."""
 
-        p = []
+        # Asks every command, so cooldowns too short to be stored, and channel or global ones, are listed too.
+        p = set()
         for command in self.bot.get_cog_commands("Rpg2"):
-            if command.is_on_cooldown(ctx):
-                p.append(command.name)
+            for cmd in [command, *getattr(command, 'walk_commands', tuple)()]:
+                if cmd.is_on_cooldown(ctx):
+                    p.add(cmd.qualified_name)
 
+        p = sorted(p)
         await ctx.send(f"**Commands currently on cooldown for {ctx.author.mention}:** {', '.join(p)}")
 
     @commands.command()
     @checks.registered2()
-    @commands.cooldown(1, 600, commands.BucketType.user)
+    @commands.cooldown(1, GAMBLE_COOLDOWN, commands.BucketType.user)
     async def gamble(self, ctx):
         """Risk winning it all or losing it all."""
 
         await ctx.send("How much are you willing to gamble?")
 
-        user = (await rpg.fetch_user2(ctx))
-
         def check(m):
             return m.author == ctx.author and m.content.isdigit()
 
-        active = True
-        while active:
+        while True:
             try:
-                msg = (await ctx.bot.wait_for('message', check=check, timeout=15)).content
+                msg = await ctx.bot.wait_for('message', check=check, timeout=15)
             except asyncio.TimeoutError:
                 return await ctx.send("I guess you don't want to risk it.")
 
-            if int(msg) > user[3]:
+            amount = int(msg.content)
+            won = random.choice([True, False])
+            try:
+                await ctx.bot.economy.gamble(msg.id, ctx.author.id, amount, won)
+            except InsufficientFunds:
                 await ctx.send(f"{ctx.author.mention} you can't gamble what you don't have.")
+                continue
+
+            if won:
+                await ctx.send(f"{ctx.author.mention} got ${amount} richer!")
             else:
-                choice = random.choice(["Win", "Lose"])
-                async with ctx.bot.db.acquire() as db:
-                    if choice == "Win":
-                        await ctx.send(f"{ctx.author.mention} got ${msg} richer!")
-                        await db.execute("UPDATE profiles SET bal = bal + $1 WHERE id=$2", int(msg), ctx.author.id)
-                    else:
-                        await ctx.send(f"{ctx.author.mention} got ${msg} poorer")
-                        await db.execute("UPDATE profiles SET bal = bal - $1 WHERE id=$2", int(msg), ctx.author.id)
-                active = False
+                await ctx.send(f"{ctx.author.mention} got ${amount} poorer")
+            break
 
     @commands.command()
     @checks.registered2()
-    @commands.cooldown(1, 600, commands.BucketType.channel)
+    @commands.cooldown(1, REWARDS['duel'].cooldown, commands.BucketType.channel)
     async def duel(self, ctx, user: checks.SuperhumanFinder = None):
         """Battle other players."""
         if not user:
@@ -429,202 +391,65 @@ class Rpg2:
         abilities1 = await rpg.fetch_abilities(ctx)
         abilities2 = await rpg.fetch_abilities(ctx, user=user)
 
-        if len(abilities1 or abilities2) <= 2:
+        if len(abilities1) < 2 or len(abilities2) < 2:
             await ctx.send("One of you don't have two or more abilities")
             ctx.command.reset_cooldown(ctx)
             return
 
         await ctx.send("Do you accept this challenge? `Yes` or `No`")
         yon = await rpg.yon(ctx, user=user)
-        if yon == "Yes":
-            await ctx.send(f"{ctx.author.mention} Which two abilities do you choose to fight with? \n"
-                           f"{', '.join(abilities1)}. (Type your choice like this: Super Speed, Telekinesis)")
+        if yon != "Yes":
+            return await ctx.send("I guess you don't want to duel.")
 
-            def check(m):
-                return m.author == ctx.author and abilities1 in m.content
+        chosen = {}
+        for member, abilities in ((ctx.author, abilities1), (user, abilities2)):
+            await ctx.send(f"{member.mention} Which two abilities do you choose to fight with? \n"
+                           f"{', '.join(abilities)}. (Type your choice like this: Super Speed, Telekinesis)")
 
-            def check2(m):
-                return m.author == user and abilities2 in m.content.title()
+            def check(m):
+                choice = m.content.title().split(', ')
+                return m.author == member and len(set(choice)) == 2 and all(a in abilities for a in choice)
 
             try:
-                msg = (await ctx.bot.wait_for('message', check=check, timeout=15)).content.title()
+                chosen[member.id] = (await ctx.bot.wait_for('message', check=check, timeout=15)).content.title()
             except asyncio.TimeoutError:
-                return await ctx.send(f"{ctx.author.mention}, you ran out of time.")
+                return await ctx.send(f"{member.mention}, you ran out of time.")
+
+        rows = await queries.duel_abilities(ctx.bot.db, ctx.author.id, chosen[ctx.author.id].split(', '),
+                                            user.id, chosen[user.id].split(', '))
+        duel = combat.Duel([combat.ability_fighter(member.id, [r for r in rows if r['id'] == member.id])
+                            for member in (ctx.author, user)])
+        members = {ctx.author.id: ctx.author, user.id: user}
 
-            await ctx.send(f"{user.mention} Which two abilities do you choose to fight with? \n"
-                           f"{', '.join(abilities1)}. (Type your choice like this: Super Speed, Telekinesis)")
+        log.info('Duel %s vs %s started: seed=%s fighters=%s', ctx.author.id, user.id, duel.seed, duel.start)
+        while not duel.over:
+            attacker, defender = members[duel.attacker.id], members[duel.defender.id]
+            moves = duel.attacker.moves
+            await ctx.send(f"{attacker.mention} pick an ability: {', '.join(moves)}")
+
+            def player(m):
+                return m.author == attacker and m.content.title() in moves
 
             try:
-                msg2 = (await ctx.bot.wait_for('message', check=check2, timeout=15)).content.title()
+                action = (await ctx.bot.wait_for('message', check=player, timeout=30)).content.title()
             except asyncio.TimeoutError:
-                return await ctx.send(f"{ctx.author.mention}, you ran out of time.")
+                return await ctx.send(f"{attacker.mention} has been disqualified. Duel is over!")
 
-            async with ctx.bot.db.acquire() as db:
-                skill1_ = await db.fetchrow("SELECT * FROM abilities WHERE id=$1 AND ability=$2", ctx.author.id,
-                                            (msg.split(', '))[0])
-                skill2_ = await db.fetchrow("SELECT * FROM abilities WHERE id=$1 AND ability=$2", ctx.author.id,
-                                            (msg.split(', '))[1])
-                skill1 = await db.fetchrow("SELECT * FROM abilities WHERE id=$1 AND ability=$2", user.id,
-                                           (msg2.split(', '))[0])
-                skill2 = await db.fetchrow("SELECT * FROM abilities WHERE id=$1 AND ability=$2", user.id,
-                                           (msg2.split(', '))[1])
-
-            hp = skill1_[5] + skill2_[5]
-            hp2 = skill1[5] + skill2[5]
-            active = True
-            await ctx.send(f"{ctx.author.mention} pick an ability: {msg}")
-            while active:
-                def player1(m):
-                    return m.author == ctx.author and m.content in [skill1_[0], skill2_[0]]
-
-                def player2(m):
-                    return m.author == user and m.content in [skill1[0], skill2[0]]
-
-                try:
-                    msg_ = (await ctx.bot.wait_for('message', check=player1, timeout=30)).content
-                except asyncio.TimeoutError:
-                    return await ctx.send(f"{ctx.author.mention} has been disqualified. Duel is over!")
-                else:
-                    if msg_ == skill1_[0]:
-                        dmg = random.randint(10, skill1_[4] / 2)
-                        if dmg > hp2 / 2:
-                            chance = random.choice(["Hit", "Miss"])
-                            hp2 = hp2 - dmg
-                            if chance == "Hit":
-                                await ctx.send(
-                                    f"{ctx.author.mention} Your attack using your {skill1_[0]} has dealt {dmg}dmg \n"
-                                    f"{user.mention} has {hp2}hp.")
-                            else:
-                                hp = hp - dmg
-                                await ctx.send(
-                                    f"{ctx.author.mention} missed! Causing {user.mention} to deal {dmg}dmg \n"
-                                    f"They now have {hp}hp.")
-                        else:
-                            chance = random.choice(["Hit", "Miss"])
-                            hp2 = hp2 - dmg
-                            if chance == "Hit":
-                                await ctx.send(
-                                    f"{ctx.author.mention} Your attack using your {skill1_[0]} has dealt {dmg}dmg \n"
-                                    f"{user.mention} has {hp2}hp.")
-                            else:
-                                hp = hp - dmg
-                                await ctx.send(
-                                    f"{ctx.author.mention} missed! Causing {user.mention} to deal {dmg}dmg \n"
-                                    f"They now have {hp}hp.")
-                        if hp2 <= 0:
-                            xp = random.randint(250, 500)
-                            mon = random.randint(250, 500)
-                            await ctx.send(f"{ctx.author.mention} wins! They earn {xp}xp and ${mon}")
-                            await rpg.level2(ctx, mon, xp)
-                            await rpg.guild_level(ctx, xp)
-                            active = False
-                    else:
-                        dmg = random.randint(10, skill2_[4] / 2)
-                        if dmg > hp2 / 2:
-                            chance = random.choice(["Hit", "Miss"])
-                            hp2 = hp2 - dmg
-                            if chance == "Hit":
-                                await ctx.send(
-                                    f"{ctx.author.mention} Your attack using your {skill2_[0]} has dealt {dmg}dmg \n"
-                                    f"{user.mention} has {hp2}hp.")
-                            else:
-                                hp = hp - dmg
-                                await ctx.send(
-                                    f"{ctx.author.mention} missed! Causing {user.mention} to deal {dmg}dmg \n"
-                                    f"They now have {hp}hp.")
-                        else:
-                            chance = random.choice(["Hit", "Miss"])
-                            hp2 = hp2 - dmg
-                            if chance == "Hit":
-                                await ctx.send(
-                                    f"{ctx.author.mention} Your attack using your {skill2_[0]} has dealt {dmg}dmg \n"
-                                    f"{user.mention} has {hp2}hp.")
-                            else:
-                                hp = hp - dmg
-                                await ctx.send(
-                                    f"{ctx.author.mention} missed! Causing {user.mention} to deal {dmg}dmg \n"
-                                    f"They now have {hp}hp.")
-                        if hp2 <= 0:
-                            xp = random.randint(250, 500)
-                            mon = random.randint(250, 500)
-                            await ctx.send(f"{ctx.author.mention} wins! They earn {xp}xp and ${mon}")
-                            await rpg.level2(ctx, mon, xp)
-                            await rpg.guild_level(ctx, xp)
-                            active = False
-
-                try:
-                    msg_ = (await ctx.bot.wait_for('message', check=player2, timeout=30)).content
-                except asyncio.TimeoutError:
-                    return await ctx.send(f"{user.mention} has been disqualified. Duel is over!")
-                else:
-                    if msg_ == skill1[0]:
-                        dmg = random.randint(10, skill1[4] / 2)
-                        if dmg > hp2 / 2:
-                            chance = random.choice(["Hit", "Miss"])
-                            hp2 = hp2 - dmg
-                            if chance == "Hit":
-                                await ctx.send(
-                                    f"{ctx.author.mention} Your attack using your {skill1[0]} has dealt {dmg}dmg \n"
-                                    f"{user.mention} has {hp2}hp.")
-                            else:
-                                hp = hp - dmg
-                                await ctx.send(
-                                    f"{ctx.author.mention} missed! Causing {user.mention} to deal {dmg}dmg \n"
-                                    f"They now have {hp}hp.")
-                        else:
-                            chance = random.choice(["Hit", "Miss"])
-                            hp2 = hp2 - dmg
-                            if chance == "Hit":
-                                await ctx.send(
-                                    f"{ctx.author.mention} Your attack using your {skill1[0]} has dealt {dmg}dmg \n"
-                                    f"{user.mention} has {hp2}hp.")
-                            else:
-                                hp = hp - dmg
-                                await ctx.send(
-                                    f"{user.mention} missed! Causing {ctx.author.mention} to deal {dmg}dmg \n"
-                                    f"They now have {hp}hp.")
-                        if hp <= 0:
-                            xp = random.randint(250, 500)
-                            mon = random.randint(250, 500)
-                            await ctx.send(f"{user.mention} wins! They earn {xp}xp and ${mon}")
-                            await rpg.level2(ctx, mon, xp, user)
-                            await rpg.guild_level(ctx, xp, user)
-                            active = False
-                    else:
-                        dmg = random.randint(10, skill2[4] / 2)
-                        if dmg > hp2 / 2:
-                            chance = random.choice(["Hit", "Miss"])
-                            hp2 = hp2 - dmg
-                            if chance == "Hit":
-                                await ctx.send(
-                                    f"{user.mention} Your attack using your {skill2[0]} has dealt {dmg}dmg \n"
-                                    f"{ctx.author.mention} has {hp2}hp.")
-                            else:
-                                hp = hp - dmg
-                                await ctx.send(
-                                    f"{user.mention} missed! Causing {ctx.author.mention} to deal {dmg}dmg \n"
-                                    f"They now have {hp}hp.")
-                        else:
-                            chance = random.choice(["Hit", "Miss"])
-                            hp2 = hp2 - dmg
-                            if chance == "Hit":
-                                await ctx.send(
-                                    f"{user.mention} Your attack using your {skill2[0]} has dealt {dmg}dmg \n"
-                                    f"{ctx.author.mention} has {hp2}hp.")
-                            else:
-                                hp = hp - dmg
-                                await ctx.send(
-                                    f"{user.mention} missed! Causing {ctx.author.mention} to deal {dmg}dmg \n"
-                                    f"They now have {hp}hp.")
-                        if hp2 <= 0:
-                            xp = random.randint(250, 500)
-                            mon = random.randint(250, 500)
-                            await ctx.send(f"{user.mention} wins! They earn {xp}xp and ${mon}")
-                            await rpg.level2(ctx, mon, xp, user)
-                            await rpg.guild_level(ctx, xp, user)
-                            active = False
-        else:
-            return await ctx.send("I guess you don't want to duel.")
+            turn = combat.resolve_turn(duel, action)
+            if turn.outcome == combat.HIT:
+                await ctx.send(f"{attacker.mention} Your attack using your {turn.move.name} has dealt "
+                               f"{turn.damage}dmg \n{defender.mention} has {turn.defender.hp}hp.")
+            else:
+                await ctx.send(f"{attacker.mention} missed! Causing {defender.mention} to deal {turn.damage}dmg \n"
+                               f"They now have {turn.attacker.hp}hp.")
+
+        log.info('Duel %s vs %s: seed=%s actions=%s', ctx.author.id, user.id, duel.seed, duel.actions)
+        winner = members[duel.winner.id]
+        xp = random.randint(*REWARDS['duel'].xp)
+        mon = random.randint(*REWARDS['duel'].money)
+        await ctx.send(f"{winner.mention} wins! They earn {xp}xp and ${mon}")
+        await rpg.level2(ctx, mon, xp, winner)
+        await rpg.guild_level(ctx, xp, winner)
 
     @duel.error
     async def duel_handler(self, ctx, error):
@@ -658,7 +483,7 @@ class Rpg2:
 
     @commands.command()
     @checks.registered2()
-    @commands.cooldown(1, 600, commands.BucketType.channel)
+    @commands.cooldown(1, REWARDS['drink'].cooldown, commands.BucketType.channel)
     async def drink(self, ctx, user: checks.SuperhumanFinder = None):
         """Last one standing wins!"""
 
@@ -672,8 +497,8 @@ class Rpg2:
         yon = await rpg.yon(ctx, user=user)
         if yon == "Yes":
             choice = random.choice([ctx.author, user])
-            xp = random.randint(100, 200)
-            mon = random.randint(100, 200)
+            xp = random.randint(*REWARDS['drink'].xp)
+            mon = random.randint(*REWARDS['drink'].money)
             if choice == ctx.author:
                 await ctx.send(f"{ctx.author.mention} wins the drinking contest! They earn {xp}xp and ${mon}")
                 await rpg.level2(ctx, mon, xp)
@@ -700,12 +525,11 @@ class Rpg2:
         """Show your current guild."""
 
         async def msg():
-            async with ctx.bot.db.acquire() as db:
-                data = await db.fetchval("SELECT guild FROM profiles WHERE id=$1", ctx.author.id)
-                if not data:
-                    return f'{ctx.author.mention} You are not in a guild! To join a guild type `{ctx.prefix}guild join`'
-                else:
-                    return f'{ctx.author.mention} you are enlisted in {data}'
+            data = await queries.profile_guild(ctx.bot.db, ctx.author.id)
+            if not data:
+                return f'{ctx.author.mention} You are not in a guild! To join a guild type `{ctx.prefix}guild join`'
+            else:
+                return f'{ctx.author.mention} you are enlisted in {data}'
 
         await ctx.send(await msg())
 
@@ -726,7 +550,7 @@ class Rpg2:
                 await ctx.send(f"You are now the leader and founder of {name}")
                 async with ctx.bot.db.acquire() as db:
                     await db.execute("INSERT INTO guilds VALUES($1, $2, $3, $4, $5)",
-                                     name, ctx.author.id, 1, 0, )
+                                     name, ctx.author.id, 1, 0, None)
                     await db.execute("UPDATE profiles SET guild=$1 WHERE id=$2", name, ctx.author.id)
             else:
                 return await ctx.send(f"{ctx.author.mention} You need ${10000 - user[3]} to create a guild!")
@@ -739,10 +563,7 @@ class Rpg2:
     async def join(self, ctx, *, name):
         """Join a guild."""
 
-        async with ctx.bot.db.acquire() as db:
-            leader = await db.fetchval("SELECT leader FROM guilds WHERE guild=$1", name)
-
-        leader = self.bot.get_user(leader)
+        leader = self.bot.get_user(await queries.guild_leader(ctx.bot.db, name))
         await ctx.send(f"**{leader}** the leader of {name} has been informed of your application.")
         try:
             await leader.send(f"{leader.mention} Do you accept **{ctx.author}** into your guild? \n"
@@ -768,8 +589,7 @@ class Rpg2:
     @checks.no_guild()
     async def leave(self, ctx):
         """Leave your guild."""
-        async with ctx.bot.db.acquire() as db:
-            guild_ = await db.fetchval("SELECT guild FROM profiles WHERE id=$1", ctx.author.id)
+        guild_ = await queries.profile_guild(ctx.bot.db, ctx.author.id)
 
         if not guild_:
             return await ctx.send("Either you misspelled the name of your guild, or you're not in that guild.")
@@ -790,8 +610,8 @@ class Rpg2:
     async def transfer(self, ctx, user: discord.Member = None):
         """Transfer leadership of guild."""
         async with ctx.bot.db.acquire() as db:
-            guild_ = await db.fetchval("SELECT guild FROM profiles WHERE id=$1", ctx.author.id)
-            leader_ = await db.fetchval("SELECT leader FROM guilds WHERE name=$1", guild_)
+            guild_ = await queries.profile_guild(db, ctx.author.id)
+            leader_ = await queries.guild_leader(db, guild_)
 
         if not user or user == ctx.author:
             return await ctx.send("You either didn't pick a user, or you picked yourself.")
@@ -813,27 +633,69 @@ class Rpg2:
     @guild.command(name="info")
     @checks.no_guild()
     async def _info_(self, ctx, *, name):
-        async with ctx.bot.db.acquire() as db:
-            guild_ = await db.fetchrow("SELECT * FROM guilds WHERE guild=$1", name)
-            members = await db.fetch("SELECT * FROM profiles WHERE guild=$1", name)
+        guild_ = await queries.guild_summary(ctx.bot.db, name)
+        if not guild_:
+            return await ctx.send(f"There is no guild named **{name}**.")
 
-        p = []
-        for i in members:
-            p.append((ctx.guild.get_member(i[0])).display_name or (ctx.bot.get_user(i)).name)
+        top = []
+        for i in guild_['top_members'] or ():
+            member = ctx.guild.get_member(i) or ctx.bot.get_user(i)
+            top.append(getattr(member, 'display_name', None) or getattr(member, 'name', str(i)))
 
         leader = ctx.guild.get_member(guild_[1])
         if not leader:
             leader = ctx.bot.get_user(guild_[1])
 
+        members = guild_['members'] or 0
         await ctx.send(embed=discord.Embed(color=self.bot.embed_color,
                                            description=f"Current Leader: {leader.display_name or leader.name}")
                        .set_author(name=guild_[0])
                        .set_image(url=guild_[4] or "https://imgur.com/Xy8i2UB.png")
                        .add_field(name="Stats", value=f"**Level:** {guild_[2]} \n"
-                                                      f"**XP:** {guild_[3]}")
-                       .add_field(name="Members", value='\n'.join(p))
+                                                      f"**XP:** {guild_[3]} \n"
+                                                      f"**Power:** {guild_['power'] or 0}")
+                       .add_field(name=f"Members ({members})",
+                                  value=f"**Total XP:** {guild_['member_xp'] or 0} \n"
+                                        f"**Average XP:** {(guild_['member_xp'] or 0) // max(members, 1)}")
+                       .add_field(name="Top Members", value='\n'.join(top) or "None")
                        )
 
+    @guild.command(aliases=['lb'])
+    async def leaderboard(self, ctx, by="xp"):
+        """The top guilds by members, member xp or power."""
+        columns = {'members': 'members', 'xp': 'xp', 'power': 'power'}
+        if by.lower() not in columns:
+            return await ctx.send(f"Rank guilds by one of: {', '.join(columns)}")
+
+        column = columns[by.lower()]
+        async with ctx.bot.db.acquire() as db:
+            lb = await db.fetch(f"SELECT guild, members, xp, power FROM guild_stats ORDER BY {column} DESC LIMIT 10")
+
+        p = [f"**#{number}** {row[0]} - {row[column]} {column}" for number, row in enumerate(lb, 1)]
+        await ctx.send(embed=discord.Embed(color=self.bot.embed_color, description='\n'.join(p) or "No guilds yet.")
+                       .set_author(name=f"Top guilds by {column}"))
+
+    @guild.command(name="top")
+    async def _top_(self, ctx):
+        """The highest level guilds."""
+        lb = await queries.guild_ranking(ctx.bot.db, 100)
+
+        pages = [lb[i:i + 10] for i in range(0, len(lb), 10)]
+        p = []
+        for number, page in enumerate(pages, 1):
+            lines = []
+            for rank, guild_ in enumerate(page, (number - 1) * 10 + 1):
+                leader = ctx.bot.get_user(guild_[1])
+                lines.append(f"**#{rank}** {guild_[0]} - Level {guild_[2]}, {guild_[3]}xp "
+                             f"(led by {leader.name if leader else 'nobody'})")
+            p.append(discord.Embed(color=self.bot.embed_color, description='\n'.join(lines))
+                     .set_author(name="Top guilds")
+                     .set_footer(text=f"Page {number} of {len(pages)}"))
+
+        if not p:
+            return await ctx.send("There are no guilds yet.")
+        await SimplePaginator(extras=p).paginate(ctx)
+
     @guild.command()
     @checks.no_guild()
     @checks.registered2()
@@ -845,8 +707,8 @@ class Rpg2:
                 return await ctx.send("Provide an attachment or image url.")
 
         async with ctx.bot.db.acquire() as db:
-            guild_ = await db.fetchval("SELECT guild FROM profiles WHERE id=$1", ctx.author.id)
-            leader = await db.fetchval("SELECT leader FROM guilds WHERE guild=$1", guild_)
+            guild_ = await queries.profile_guild(db, ctx.author.id)
+            leader = await queries.guild_leader(db, guild_)
             if leader != ctx.author.id:
                 return await ctx.send("You are not the leader of **{guild_}**")
             else:
@@ -856,34 +718,38 @@ class Rpg2:
     @guild.command()
     @checks.no_guild()
     @checks.registered2()
-    @commands.cooldown(1, 43200, commands.BucketType.default)
+    @commands.cooldown(1, REWARDS['battle'].cooldown, commands.BucketType.default)
     async def battle(self, ctx, name: checks.GuildFinder):
         async with ctx.bot.db.acquire() as db:
-            user = await db.fetchval("SELECT leader FROM guilds WHERE guild=$1", name)
-            guild_ = await db.fetchval("SELECT guild FROM profiles WHERE id=$1", ctx.author.id)
-            leader_ = await db.fetchval("SELECT leader FROM guilds WHERe id=$1", guild_)
-            members = await db.fetch("SELECT * FROM profiles WHERE guild=$1", guild_)
-            members_ = await db.fetch("SELECT * FROM profiles WHERE guild=$1", name)
+            guild_ = await queries.profile_guild(db, ctx.author.id)
+            ours = await queries.guild_summary(db, guild_)
+            theirs = await queries.guild_summary(db, name)
 
-        if leader_ != ctx.author.id:
+        if ours[1] != ctx.author.id:
             return await ctx.send(f"You are not the leader of {guild_}")
 
-        await ctx.send(f"Do you {self.bot.get_user(user).mention}, wage war against {name}?")
+        await ctx.send(f"Do you {self.bot.get_user(theirs[1]).mention}, wage war against {name}?\n"
+                       f"**{guild_}:** {ours['members']} members, {combat.guild_strength(ours)} strength \n"
+                       f"**{name}:** {theirs['members']} members, {combat.guild_strength(theirs)} strength")
         yon = await rpg.yon(ctx)
         if yon == "Yes":
             await ctx.send(f"{guild_} and {name} are at war; the war will end in 12 hours.")
-            await asyncio.sleep(43200)
-            choice = random.choice(guild_, name)
-            if choice == guild_:
-                await ctx.send(f"{guild_} won the war against {name}; all of it's members earn $1000 and 1000xp'")
-                for i in members:
-                    users = ctx.guild.get_member(i[0]) or ctx.bot.get_user(i[0])
-                    await rpg.level2(ctx, 1000, 1000, user=users)
-            else:
-                await ctx.send(f"{name} won the war against {guild_}; all of it's members earn $1000 and 1000xp'")
-                for i in members_:
-                    users = ctx.guild.get_member(i[0]) or ctx.bot.get_user(i[0])
-                    await rpg.level2(ctx, 1000, 1000, user=users)
+            reward = REWARDS['battle']
+            await asyncio.sleep(reward.cooldown)
+            # Members may have come, gone or grown during the war, so it is decided on the stats at its end.
+            async with ctx.bot.db.acquire() as db:
+                ours = await queries.guild_summary(db, guild_)
+                theirs = await queries.guild_summary(db, name)
+            if not ours or not theirs:
+                return await ctx.send(f"The war between {guild_} and {name} ended without a winner.")
+
+            mon, xp = random.randint(*reward.money), random.randint(*reward.xp)
+            choice = combat.war_winner((guild_, combat.guild_strength(ours)), (name, combat.guild_strength(theirs)))
+            loser = name if choice == guild_ else guild_
+            paid = await rpg.pay_guild(ctx, choice, mon, xp)
+            await ctx.send(f"{choice} won the war against {loser}; all {len(paid)} of it's members earn "
+                           f"${mon} and {xp}xp")
+            await rpg.announce_level_ups(ctx, paid)
         else:
             return await ctx.send(f"I guess you don't want to wage war against {name}")
 
@@ -894,7 +760,7 @@ class Rpg2:
 
     @commands.command()
     @checks.registered2()
-    @commands.cooldown(1, 84600, commands.BucketType.user)
+    @commands.cooldown(1, REWARDS['raffle'].cooldown, commands.BucketType.user)
     async def raffle(self, ctx):
         await ctx.send("Pick a number between 1-10 to win a prize")
 
@@ -907,10 +773,10 @@ class Rpg2:
             return await ctx.send("I guess you don't want to participate in the raffle.")
 
         if msg:
-            prize = random.choice(["Money", "Ability", "Master", "Level"])
+            prize = random.choice(RAFFLE_PRIZES)
             if prize == "Money":
-                mon = random.randint(100, 200)
-                xp = random.randint(100, 200)
+                mon = random.randint(*REWARDS['raffle'].money)
+                xp = random.randint(*REWARDS['raffle'].xp)
                 await ctx.send(f"You earned ${mon} and {xp}xp.")
                 await rpg.level2(ctx, mon, xp)
             elif prize == "Ability":
@@ -923,12 +789,12 @@ class Rpg2:
                                      shop_items[ability][4])
             elif prize == "Master":
                 ability = random.choice(await rpg.fetch_abilities(ctx))
-                xp = random.randint(10, 100)
+                (low, high), points = RAFFLE_MASTER
                 await ctx.send(f"{ability} had been upgraded.")
-                await rpg.ability_level(ctx, xp, 100, 100, ability)
+                await rpg.ability_level(ctx, random.randint(low, high), points, points, ability)
 
             else:
-                await rpg.level2(ctx, 2000, 2000)
+                await rpg.level2(ctx, RAFFLE_LEVEL, RAFFLE_LEVEL)
 
     @raffle.error
     async def raffle_handler(self, ctx, error):
@@ -948,8 +814,7 @@ class Rpg2:
         else:
             user = ctx.guild.get_member_named(str(user))
 
-        async with ctx.bot.db.acquire() as db:
-            ab_ = await db.fetch("SELECT * FROM abilities WHERE id=$1", user.id)
+        ab_ = await queries.abilities(ctx.bot.db, user.id)
 
         p = []
         for i in ab_:
@@ -6,10 +6,15 @@ import discord
 from discord.ext import commands
 
 from .utils import rpg_tools as rpg
+from .utils.catalog import Catalog
 from .utils.paginator import SimplePaginator as paginator
 from .utils import checks
+from .utils import combat
+from .utils import queries
+from .utils.economy import AlreadyOwned, InsufficientFunds, NotOwned
 
 logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
 
 
 class Rpg:
@@ -17,9 +22,22 @@ class Rpg:
 
     def __init__(self, bot):
         self.bot = bot
+        self.catalog = Catalog(bot.db)
+        self.catalog.start(bot.loop)
+        bot.notifier.register('catalog', self.catalog.load)
+
+    def __unload(self):
+        self.bot.notifier.unregister('catalog')
 
     async def __local_check(self, ctx):
-        return ctx.guild is not None
+        if ctx.guild is None:
+            return False
+        await self.catalog.wait()
+        return True
+
+    async def refresh_catalog(self):
+        await self.catalog.load()
+        await self.bot.notifier.publish('catalog')
 
     @commands.command()
     @checks.unregistered()
@@ -68,14 +86,13 @@ class Rpg:
     @commands.cooldown(2, 180, commands.BucketType.user)
     async def quest(self, ctx):
         """Quests for the brave"""
-        async with ctx.bot.db.acquire() as db:
-            q = await db.fetchrow(
-                "SELECT * FROM rpg_quests ORDER BY RANDOM() LIMIT 1",
-            )
+        quest = self.catalog.random_quest()
+        if quest is None:
+            return await ctx.send("There are no quests right now.")
 
         embed = discord.Embed(color=self.bot.embed_color)
         embed.set_author(name=f"You have been sent on a quest!")
-        embed.description = q[0]
+        embed.description = quest
         embed.set_footer(text="Type a number between 1-5")
         await ctx.send(embed=embed)
         ans = random.randint(1, 5)
@@ -91,13 +108,12 @@ class Rpg:
         if int(message_.content) == ans:
             xp = random.randint(1, 50)
             mon = random.randint(1, 100)
-            await rpg.add_xp(ctx, xp=xp)
-            await rpg.lvl(ctx, mon=mon, msg1=f"You completed the quest, leveled up and earned {mon}",
+            await rpg.lvl(ctx, mon=mon, xp=xp, msg1=f"You completed the quest, leveled up and earned {mon}",
                           msg2=f"You completed the quest and earned {xp}xp")
         else:
             mon = random.randint(1, 100)
-            await rpg.add_xp(ctx, xp=20)
-            await rpg.lvl(ctx, mon=mon, msg1=f"You failed to complete the quest, but you leveled up and earned {mon}",
+            await rpg.lvl(ctx, mon=mon, xp=20,
+                          msg1=f"You failed to complete the quest, but you leveled up and earned {mon}",
                           msg2=f"You failed to complete the quest and earned 20xp")
 
     @commands.group(case_insensitive=True, invoke_without_command=True)
@@ -113,6 +129,7 @@ class Rpg:
         """Adds a quest"""
         async with ctx.bot.db.acquire() as db:
             await db.execute("INSERT INTO rpg_quests VALUES($1)", quest.title())
+        await self.refresh_catalog()
 
         await ctx.send(f"Added {quest.title()}")
 
@@ -175,6 +192,7 @@ class Rpg:
                 await db.execute(
                     "INSERT INTO rpg_shop VALUES($1, $2, $3, $4, $5, $6, $7, $8)",
                     name.title(), type_, price, damage, defense, skills, description.title(), req)
+            await self.refresh_catalog()
 
             await ctx.send(f"**{name.title()}** has been created!")
         else:
@@ -184,10 +202,7 @@ class Rpg:
     @checks.registered()
     async def shop(self, ctx):
         """Items that are available"""
-        async with ctx.bot.db.acquire() as db:
-            data = await db.fetch(
-                "SELECT * FROM rpg_shop ORDER BY price DESC"
-            )
+        data = self.catalog.by_price(descending=True)
 
         if data:
             p = []
@@ -214,12 +229,7 @@ class Rpg:
         """Items you can buy."""
         user = await rpg.fetch_user(ctx)
 
-        async with ctx.bot.db.acquire() as db:
-            data = await db.fetch(
-                "SELECT * FROM rpg_shop ORDER BY price BETWEEN 0 AND $1 DESC",
-                user[4]
-            )
-
+        data = self.catalog.affordable(user[4])
         if data:
             p = []
             t = {"Sword": "https://cdn.discordapp.com/attachments/389275624163770378/502084949420277781/sword.png",
@@ -246,10 +256,11 @@ class Rpg:
         """Buy an item from shop"""
         user = await rpg.fetch_user(ctx)
         skills = await rpg.fetch_skills(ctx)
-        i = await rpg.fetch_item(ctx, item.title(), None, 'rpg_shop')
-        if i[5] in skills:
-            skill = i[5]
-        else:
+        i = self.catalog.item(item.title())
+        if i is None:
+            return await ctx.send(f"There is no item named **{item.title()}**")
+
+        if i[5] not in skills:
             return await ctx.send("You don't have the right skill")
 
         mast = (await rpg.fetch_mastery(ctx, skill=i[5], user=ctx.author.id))[2]
@@ -259,25 +270,24 @@ class Rpg:
         if inv:
             return await ctx.send("You already have this item!")
 
-        if user[4] >= i[2]:
-            if i[5] == skill and mast >= i[7]:
-                await ctx.send(f"Do you really want to buy **{i[0]}** \n"
-                               f"Price: {i[2]}$, Yes or No?")
-                msg = await rpg.yon(ctx)
-                if msg == "Yes":
-                    await ctx.send(f"{i[0]} has been added to your inventory.")
+        if user[4] < i[2]:
+            return await ctx.send(f"Sorry you need {i[2] - user[4]}$ more to purchase!")
 
-                    async with ctx.bot.db.acquire() as db:
-                        await db.execute(
-                            "INSERT INTO rpg_inventory VALUES($1, $2, $3, $4, $5, $6, $7, $8, $9)",
-                            i[0], i[1], i[2], i[3], i[4], i[5], i[6], user[0], 0
-                        )
-                else:
-                    await ctx.send(f"Guess you don't want to spend **{i[2]}$**")
-            else:
-                return await ctx.send("You don't have the right skill or skill level.")
-        else:
-            return await ctx.send(f"Sorry you need {i[2] - user[2]}$ more to purchase!")
+        if mast < i[7]:
+            return await ctx.send("You don't have the right skill or skill level.")
+
+        await ctx.send(f"Do you really want to buy **{i[0]}** \n"
+                       f"Price: {i[2]}$, Yes or No?")
+        if await rpg.yon(ctx) != "Yes":
+            return await ctx.send(f"Guess you don't want to spend **{i[2]}$**")
+
+        try:
+            await ctx.bot.economy.buy_item(ctx.message.id, ctx.author.id, i)
+        except AlreadyOwned:
+            return await ctx.send("You already have this item!")
+        except InsufficientFunds as e:
+            return await ctx.send(f"Sorry you need {e.needed}$ more to purchase!")
+        await ctx.send(f"{i[0]} has been added to your inventory.")
 
     @commands.command()
     @checks.registered()
@@ -299,278 +309,58 @@ class Rpg:
     @commands.cooldown(1, 180, commands.BucketType.channel)
     async def duel(self, ctx, player2: discord.Member):
         """Duel other players!"""
-        u = await rpg.fetch_user(ctx, player2.id)
-
-        if u[6] is None:
-            return await ctx.send(f"{player2.mention} needs to equip an item ({ctx.prefix}equip <item>)")
-
         if player2.bot or player2 == ctx.author:
             return await ctx.send("You can't duel a bot or yourself.")
 
+        equipped = await queries.rpg_equipped(ctx.bot.db, [ctx.author.id, player2.id])
+        weapons = {item['owner']: item for item in equipped}
+        if player2.id not in weapons:
+            return await ctx.send(f"{player2.mention} needs to equip an item ({ctx.prefix}equip <item>)")
+
         await ctx.send(f"Do you {player2.mention} accept this battle? Yes or No?")
 
         apt = await rpg.yon(ctx, user=player2)
-        if apt == "Yes":
-            hp2 = {"hp": 1000}
-            hp = {"hp": 1000}
-            await ctx.send(f"{ctx.author.mention}, **1:** Attack, **2:** Barrage", delete_after=20)
-            while hp['hp'] or hp2['hp'] > 0:
-                w = await rpg.fetch_user(ctx)
-                w2 = await rpg.fetch_user(ctx, player2.id)
-                weapon = await rpg.fetch_item(ctx, w[6])
-                weapon2 = await rpg.fetch_item(ctx, w2[6], player2.id)
-
-                def control(m):
-                    return m.author == ctx.author and m.content in ["1", "2"]
-
-                try:
-                    msg = await ctx.bot.wait_for('message', check=control, timeout=10.0)
-                except asyncio.TimeoutError:
-                    if hp['hp'] > 0 and hp['hp'] > 0:
-                        return await ctx.send("You ran out of time!", delete_after=20)
-                else:
-                    if msg.content == "1":
-                        dam = random.randint(1, weapon[3] / 10)
-                        def_ = random.randint(1, (weapon2[4] * 2) / 10)
-                        if dam > def_:
-                            chance = random.choice(["Hit", "Miss", "Blocked"])
-                            if chance == "Hit":
-                                hp2['hp'] -= dam
-                                await ctx.send(
-                                    f"{ctx.author.mention}'s attack with **{weapon[0]}** dealt {dam}dmg to "
-                                    f"{player2.mention} \n{player2.mention} has {hp2['hp']}hp",
-                                    delete_after=20)
-                                if hp2['hp'] <= 0:
-                                    await rpg.add_xp(ctx, xp=200)
-                                    await rpg.lvl(ctx, mon=200,
-                                                  msg1=f"{ctx.author.mention} won against {player2.mention} "
-                                                       f"using **{weapon[0]}**, "
-                                                       f"they leveled up and earned 200$",
-                                                  msg2=f"{ctx.author.mention} won against {player2.mention} "
-                                                       f"using **{weapon[0]}**, "
-                                                       f"they earned 200xp")
-                                    await rpg.lb(ctx, 1, 0)
-                                    await rpg.lb(ctx, 0, 1, user=player2)
-                                    ctx.command.reset_cooldown(ctx)
-                                else:
-                                    await ctx.send(f"{player2.mention}, **1:** Attack, **2:** Barrage",
-                                                   delete_after=20)
-
-                            else:
-                                await ctx.send(f"{ctx.author.mention} was blocked!", delete_after=20)
-                                await ctx.send(f"{player2.mention}, **1:** Attack, **2:** Barrage",
-                                               delete_after=20)
-                        else:
-                            chance = random.choice(["Hit", "Miss", "Blocked"])
-                            if chance == "Hit":
-                                hp2['hp'] -= dam
-                                await ctx.send(
-                                    f"{ctx.author.mention}'s attack with **{weapon[0]}** dealt {dam}dmg to "
-                                    f"{player2.mention} \n{player2.mention} has {hp2['hp']}hp",
-                                    delete_after=20)
-                                if hp2['hp'] <= 0:
-                                    await rpg.add_xp(ctx, xp=200)
-                                    await rpg.lvl(ctx, mon=200,
-                                                  msg1=f"{ctx.author.mention} won against {player2.mention} "
-                                                       f"using **{weapon[0]}**, "
-                                                       f"they leveled up and earned 200$",
-                                                  msg2=f"{ctx.author.mention} won against {player2.mention} "
-                                                       f"using **{weapon[0]}**, "
-                                                       f"they earned 200xp")
-                                    await rpg.lb(ctx, 1, 0)
-                                    await rpg.lb(ctx, 0, 1, user=player2)
-                                    ctx.command.reset_cooldown(ctx)
-                                else:
-                                    await ctx.send(f"{player2.mention}, **1:** Attack, **2:** Barrage",
-                                                   delete_after=20)
-
-                            else:
-                                await ctx.send(f"{ctx.author.mention} was blocked!", delete_after=20)
-                                await ctx.send(f"{player2.mention}, **1:** Attack, **2:** Barrage",
-                                               delete_after=20)
-                    else:
-                        dam = random.randint(10, weapon[3] / 10)
-                        def_ = random.randint(10, (weapon2[4] * 2) / 10)
-                        if dam > def_:
-                            chance = random.choice(["Hit", "Miss", "Blocked"])
-                            if chance == "Hit":
-                                hp2['hp'] -= dam
-                                await ctx.send(
-                                    f"{ctx.author.mention}'s barrage with **{weapon[0]}** dealt {dam}dmg to "
-                                    f"{player2.mention} \n{player2.mention} has {hp2['hp']}hp",
-                                    delete_after=20)
-                                if hp2['hp'] <= 0:
-                                    await rpg.add_xp(ctx, xp=200)
-                                    await rpg.lvl(ctx, mon=200,
-                                                  msg1=f"{ctx.author.mention} won against {player2.mention} "
-                                                       f"using **{weapon[0]}**, "
-                                                       f"they leveled up and earned 200$",
-                                                  msg2=f"{ctx.author.mention} won against {player2.mention} "
-                                                       f"using **{weapon[0]}**, "
-                                                       f"they earned 200xp")
-                                    await rpg.lb(ctx, 1, 0)
-                                    await rpg.lb(ctx, 0, 1, user=player2)
-                                    ctx.command.reset_cooldown(ctx)
-                                else:
-                                    await ctx.send(f"{player2.mention}, **1:** Attack, **2:** Barrage",
-                                                   delete_after=20)
-
-                            else:
-                                await ctx.send(f"{ctx.author.mention} was blocked!", delete_after=20)
-                                await ctx.send(f"{player2.mention}, **1:** Attack, **2:** Barrage", delete_after=20)
-                        else:
-                            chance = random.choice(["Hit", "Miss", "Blocked"])
-                            if chance == "Hit":
-                                hp2['hp'] -= dam
-                                await ctx.send(
-                                    f"{ctx.author.mention}'s barrage with **{weapon[0]}** dealt {dam}dmg to "
-                                    f"{player2.mention} \n{player2.mention} has {hp2['hp']}hp",
-                                    delete_after=20)
-                                if hp2['hp'] <= 0:
-                                    await rpg.add_xp(ctx, xp=200)
-                                    await rpg.lvl(ctx, mon=200,
-                                                  msg1=f"{ctx.author.mention} won against {player2.mention} "
-                                                       f"using **{weapon[0]}**, "
-                                                       f"they leveled up and earned 200$",
-                                                  msg2=f"{ctx.author.mention} won against {player2.mention} "
-                                                       f"using **{weapon[0]}**, "
-                                                       f"they earned 200xp")
-                                    await rpg.lb(ctx, 1, 0)
-                                    await rpg.lb(ctx, 0, 1, user=player2)
-                                    ctx.command.reset_cooldown(ctx)
-                                else:
-                                    await ctx.send(f"{player2.mention}, **1:** Attack, **2:** Barrage",
-                                                   delete_after=20)
-
-                            else:
-                                await ctx.send(f"{ctx.author.mention} was blocked!", delete_after=20)
-                                await ctx.send(f"{player2.mention}, **1:** Attack, **2:** Barrage", delete_after=20)
-
-                def control2(m):
-                    return m.author == player2 and m.content in ["1", "2"]
-
-                try:
-                    msg2 = await ctx.bot.wait_for('message', check=control2, timeout=10.0)
-                except asyncio.TimeoutError:
-                    if hp2['hp'] > 0 and hp['hp'] > 0:
-                        return await ctx.send("You ran out of time!")
-                else:
-                    if msg2.content == "1":
-                        dam = random.randint(1, weapon2[3] / 10)
-                        def_ = random.randint(1, (weapon[4] * 2) / 10)
-                        if dam > def_:
-                            chance = random.choice(["Hit", "Miss", "Blocked"])
-                            if chance == "Hit":
-                                hp['hp'] -= dam
-                                await ctx.send(
-                                    f"{player2.mention}'s attack with **{weapon2[0]}** dealt {dam}dmg to "
-                                    f"{ctx.author.mention} \n{ctx.author.mention} has {hp['hp']}hp",
-                                    delete_after=20)
-                                if hp['hp'] <= 0:
-                                    await rpg.add_xp(ctx, xp=200, user=player2.id)
-                                    await rpg.lvl(ctx, mon=200, user=player2.id,
-                                                  msg1=f"{player2.mention} won against {ctx.author.mention} "
-                                                       f"using **{weapon2[0]}**, "
-                                                       f"they leveled up and earned 200$",
-                                                  msg2=f"{player2.mention} won against {ctx.author.mention} "
-                                                       f"using **{weapon2[0]}**, "
-                                                       f"they earned 200xp")
-                                    await rpg.lb(ctx, 1, 0, user=player2)
-                                    await rpg.lb(ctx, 0, 1)
-                                    ctx.command.reset_cooldown(ctx)
-                                else:
-                                    await ctx.send(f"{ctx.author.mention}, **1:** Attack, **2:** Barrage",
-                                                   delete_after=20)
-                            else:
-                                await ctx.send(f"{player2.mention} was blocked!", delete_after=20)
-                                await ctx.send(f"{ctx.author.mention}, **1:** Attack, **2:** Barrage",
-                                               delete_after=20)
-                        else:
-                            chance = random.choice(["Hit", "Miss", "Blocked"])
-                            if chance == "Hit":
-                                hp['hp'] -= dam
-                                await ctx.send(
-                                    f"{player2.mention}'s attack with **{weapon2[0]}** dealt {dam}dmg to "
-                                    f"{ctx.author.mention} \n{ctx.author.mention} has {hp['hp']}hp",
-                                    delete_after=20)
-                                if hp['hp'] <= 0:
-                                    await rpg.add_xp(ctx, xp=200, user=player2.id)
-                                    await rpg.lvl(ctx, mon=200, user=player2.id,
-                                                  msg1=f"{player2.mention} won against {ctx.author.mention} "
-                                                       f"using **{weapon2[0]}**, "
-                                                       f"they leveled up and earned 200$",
-                                                  msg2=f"{player2.mention} won against {ctx.author.mention} "
-                                                       f"using **{weapon2[0]}**, "
-                                                       f"they earned 200xp")
-                                    await rpg.lb(ctx, 1, 0, user=player2)
-                                    await rpg.lb(ctx, 0, 1)
-                                    ctx.command.reset_cooldown(ctx)
-                                else:
-                                    await ctx.send(f"{ctx.author.mention}, **1:** Attack, **2:** Barrage",
-                                                   delete_after=20)
-                            else:
-                                await ctx.send(f"{player2.mention} was blocked!", delete_after=20)
-                                await ctx.send(f"{ctx.author.mention}, **1:** Attack, **2:** Barrage",
-                                               delete_after=20)
-                    else:
-                        dam = random.randint(10, weapon2[3] / 10)
-                        def_ = random.randint(10, (weapon[4] * 2) / 10)
-                        if dam > def_:
-                            choice = random.choice(["Hit", "Miss", "Blocked"])
-                            if choice == "Hit":
-                                hp['hp'] -= dam
-                                await ctx.send(
-                                    f"{player2.mention}'s barrage with **{weapon2[0]}** dealt {dam}dmg to "
-                                    f"{ctx.author.mention} \n{ctx.author.mention} has {hp['hp']}hp",
-                                    delete_after=20)
-                                if hp['hp'] <= 0:
-                                    await rpg.add_xp(ctx, xp=200, user=player2.id)
-                                    await rpg.lvl(ctx, mon=200, user=player2.id,
-                                                  msg1=f"{player2.mention} won against {ctx.author.mention} "
-                                                       f"using **{weapon2[0]}**, "
-                                                       f"they leveled up and earned 200$",
-                                                  msg2=f"{player2.mention} won against {ctx.author.mention} "
-                                                       f"using **{weapon2[0]}**, "
-                                                       f"they earned 200xp")
-                                    await rpg.lb(ctx, 1, 0, user=player2)
-                                    await rpg.lb(ctx, 0, 1)
-                                    ctx.command.reset_cooldown(ctx)
-                                else:
-                                    await ctx.send(f"{ctx.author.mention}, **1:** Attack, **2:** Barrage",
-                                                   delete_after=20)
-                            else:
-                                await ctx.send(f"{player2.mention} was blocked!", delete_after=20)
-                                await ctx.send(f"{ctx.author.mention}, **1:** Attack, **2:** Barrage", delete_after=20)
-                        else:
-                            choice = random.choice(["Hit", "Miss", "Blocked"])
-                            if choice == "Hit":
-                                hp['hp'] -= dam
-                                await ctx.send(
-                                    f"{player2.mention}'s barrage with **{weapon2[0]}** dealt {dam}dmg to "
-                                    f"{ctx.author.mention} \n{ctx.author.mention} has {hp['hp']}hp",
-                                    delete_after=20)
-                                if hp['hp'] <= 0:
-                                    await rpg.add_xp(ctx, xp=200, user=player2.id)
-                                    await rpg.lvl(ctx, mon=200, user=player2.id,
-                                                  msg1=f"{player2.mention} won against {ctx.author.mention} "
-                                                       f"using **{weapon2[0]}**, "
-                                                       f"they leveled up and earned 200$",
-                                                  msg2=f"{player2.mention} won against {ctx.author.mention} "
-                                                       f"using **{weapon2[0]}**, "
-                                                       f"they earned 200xp")
-                                    await rpg.lb(ctx, 1, 0, user=player2)
-                                    await rpg.lb(ctx, 0, 1)
-                                    ctx.command.reset_cooldown(ctx)
-                                else:
-                                    await ctx.send(f"{ctx.author.mention}, **1:** Attack, **2:** Barrage",
-                                                   delete_after=20)
-                            else:
-                                await ctx.send(f"{player2.mention} was blocked!", delete_after=20)
-                                await ctx.send(f"{ctx.author.mention}, **1:** Attack, **2:** Barrage", delete_after=20)
-
-        else:
+        if apt != "Yes":
             return await ctx.send("I guess you don't want to duel")
 
+        duel = combat.Duel([combat.weapon_fighter(member.id, weapons[member.id]) for member in (ctx.author, player2)],
+                           **combat.WEAPON_RULES)
+        members = {ctx.author.id: ctx.author, player2.id: player2}
+
+        log.info('Duel %s vs %s started: seed=%s fighters=%s', ctx.author.id, player2.id, duel.seed, duel.start)
+        while not duel.over:
+            attacker, defender = members[duel.attacker.id], members[duel.defender.id]
+            await ctx.send(f"{attacker.mention}, **1:** Attack, **2:** Barrage", delete_after=20)
+
+            def control(m):
+                return m.author == attacker and m.content in duel.attacker.moves
+
+            try:
+                msg = await ctx.bot.wait_for('message', check=control, timeout=10.0)
+            except asyncio.TimeoutError:
+                return await ctx.send("You ran out of time!", delete_after=20)
+
+            turn = combat.resolve_turn(duel, msg.content)
+            if turn.outcome == combat.HIT:
+                await ctx.send(
+                    f"{attacker.mention}'s {'attack' if msg.content == '1' else 'barrage'} with **{turn.move.name}** "
+                    f"dealt {turn.damage}dmg to {defender.mention} \n{defender.mention} has {turn.defender.hp}hp",
+                    delete_after=20)
+            else:
+                await ctx.send(f"{attacker.mention} was blocked!", delete_after=20)
+
+        log.info('Duel %s vs %s: seed=%s actions=%s', ctx.author.id, player2.id, duel.seed, duel.actions)
+        winner, loser = members[duel.winner.id], members[duel.loser.id]
+        weapon = weapons[winner.id]['name']
+        await rpg.lvl(ctx, mon=200, xp=200, user=winner.id,
+                      msg1=f"{winner.mention} won against {loser.mention} using **{weapon}**, "
+                           f"they leveled up and earned 200$",
+                      msg2=f"{winner.mention} won against {loser.mention} using **{weapon}**, "
+                           f"they earned 200xp")
+        await rpg.lb(ctx, 1, 0, user=winner)
+        await rpg.lb(ctx, 0, 1, user=loser)
+        ctx.command.reset_cooldown(ctx)
+
     @commands.command()
     @checks.registered()
     async def profile(self, ctx, user: discord.Member = None):
@@ -578,7 +368,7 @@ class Rpg:
         if not user:
             user = ctx.author
 
-        stats = await rpg.fetch_user(ctx, user=user.id)
+        stats, skills, iv = await queries.rpg_profile_full(ctx.bot.db, user.id)
         if stats:
             embed = discord.Embed(color=self.bot.embed_color)
             embed.description = f"**Level:** {stats[2]} \n **XP:** {stats[3]}"
@@ -588,21 +378,15 @@ class Rpg:
                                                      f"**Equipped Weapon:** {stats[6]} \n"
                                                      f"**Main Skill:** {stats[5]}", inline=True)
 
-            async with ctx.bot.db.acquire() as db:
-                skills = await db.fetch("SELECT * FROM rpg_mastery WHERE id=$1", user.id)
-
             p = []
             for i in skills:
-                p.append(f"**{i[1]}** - Level {i[2]} \n")
-
-            embed.add_field(name="Skills", value=''.join(p), inline=True)
-            async with ctx.bot.db.acquire() as db:
-                iv = await db.fetch("SELECT * FROM rpg_inventory WHERE owner=$1", user.id)
+                p.append(f"**{i['skill']}** - Level {i['level']} \n")
 
+            embed.add_field(name="Skills", value=''.join(p) or "None", inline=True)
             if iv:
                 inv = []
                 for i in iv:
-                    inv.append(f"{i[0]} \n")
+                    inv.append(f"{i} \n")
 
                 embed.add_field(name="Inventory", value=''.join(inv), inline=False)
             else:
@@ -640,18 +424,15 @@ class Rpg:
                                  ctx.author.id, skill, 1, 0)
 
         if chance > 50 < 75:
-            await rpg.add_mastery_xp(ctx, 50, skill)
-            await rpg.mastery_lvl(ctx, 100, skill,
+            await rpg.mastery_lvl(ctx, 100, 50, skill,
                                   msg1=f"You have done well and leveled up your mastery and earned 100$",
                                   msg2=f"You have done well, but you earned 50xp")
         elif chance < 50:
-            await rpg.add_mastery_xp(ctx, 20, skill)
-            await rpg.mastery_lvl(ctx, 10, skill,
+            await rpg.mastery_lvl(ctx, 10, 20, skill,
                                   msg1=f"You have done poorly, but you leveled up and earned 10$",
                                   msg2=f"You have done poorly, but you earned 20xp")
         else:
-            await rpg.add_mastery_xp(ctx, 100, skill)
-            await rpg.mastery_lvl(ctx, 250, skill,
+            await rpg.mastery_lvl(ctx, 250, 100, skill,
                                   msg1=f"You have done great and leveled up your mastery and earned 250$",
                                   msg2=f"You have done great, but you earned 100xp")
 
@@ -677,50 +458,24 @@ class Rpg:
         **Items are randomly chosen based on skills that were randomly chosen**
         """
 
-        try:
-            money = random.randint(100, 1000)
-            await rpg.add_money(ctx, money)
+        money = random.randint(100, 1000)
+        await rpg.add_money(ctx, money)
 
-            skills = await rpg.fetch_skills(ctx)
-            skills = random.choice(skills)
-            async with ctx.bot.db.acquire() as db:
-                items = await db.fetch("SELECT * FROM rpg_inventory WHERE owner=$1", ctx.author.id)
-            p = []
-            for i in items:
-                p.append(i[0])
+        skills = await rpg.fetch_skills(ctx)
+        async with ctx.bot.db.acquire() as db:
+            owned = {i[0] for i in await db.fetch("SELECT name FROM rpg_inventory WHERE owner=$1", ctx.author.id)}
 
-            async with ctx.bot.db.acquire() as db:
-                item = await db.fetchrow(
-                    "SELECT * FROM rpg_shop WHERE skill=$1 AND level < 3 ORDER BY RANDOM() LIMIT 1",
-                    skills)
-
-            if item[0] in p:
-                skills_ = await rpg.fetch_skills(ctx)
-                skills_ = random.choice(skills_)
-                item_ = await db.fetchrow(
-                    "SELECT * FROM rpg_shop WHERE skill=$1, level < 3 AND name != $1 ORDER BY RANDOM() LIMIT 1",
-                    skills_)
-
-                async with ctx.bot.db.acquire() as db:
-                    await db.execute(
-                        "INSERT INTO rpg_inventory VALUES($1, $2, $3, $4, $5, $6, $7, $8, $9)",
-                        item_[0], item_[1], item_[2], item_[3], item_[4], item_[5], item_[6], ctx.author.id, 0
-                    )
-
-                await ctx.send(f"For your patience, you earned {money}$ and **{item_[0]}**")
-            else:
-                async with ctx.bot.db.acquire() as db:
-                    await db.execute(
-                        "INSERT INTO rpg_inventory VALUES($1, $2, $3, $4, $5, $6, $7, $8, $9)",
-                        item[0], item[1], item[2], item[3], item[4], item[5], item[6], ctx.author.id, 0
-                    )
-
-                await ctx.send(f"For your patience, you earned {money}$ and **{item[0]}**")
-        except Exception as e:
-            print(e)
-            money = random.randint(100, 1000)
-            await ctx.send(f"There was no item for you but you still earned {money}$")
-            await rpg.add_money(ctx, money)
+        item = self.catalog.random_item(random.choice(skills), 3, exclude=owned) if skills else None
+        if item is None:
+            return await ctx.send(f"There was no item for you but you still earned {money}$")
+
+        async with ctx.bot.db.acquire() as db:
+            await db.execute(
+                "INSERT INTO rpg_inventory VALUES($1, $2, $3, $4, $5, $6, $7, $8, $9)",
+                item[0], item[1], item[2], item[3], item[4], item[5], item[6], ctx.author.id, 0
+            )
+
+        await ctx.send(f"For your patience, you earned {money}$ and **{item[0]}**")
 
     @commands.command()
     @checks.registered()
@@ -755,7 +510,7 @@ class Rpg:
             number2 = random.randint(1, 15)
             if number + n > number2 + n2:
                 if number2 + n2 < 21 and number + n < 21:
-                    await rpg.add_money(ctx, bet)
+                    await rpg.add_money(ctx, bet, reason='gamble')
                     await ctx.send(f"You win! You earn {bet * 2}$! \n"
                                    f"**Dealer:** {number2 + n2} \n"
                                    f"**You:** {number + n}")
@@ -764,7 +519,7 @@ class Rpg:
                     await ctx.send(f"You just lost {bet}$! \n"
                                    f"**Dealer:** {number2 + n2} \n"
                                    f"**You:** {number + n}")
-                    await rpg.remove_money(ctx, bet)
+                    await rpg.remove_money(ctx, bet, reason='gamble')
             elif n + number == n2 + number2 or number + n > 21 < number2 + n2:
                 await ctx.send("It's a tie! You keep your money.")
             else:
@@ -772,7 +527,7 @@ class Rpg:
         else:
             number2 = random.randint(1, 6)
             if n > number2 + n2 < 21:
-                await rpg.add_money(ctx, bet)
+                await rpg.add_money(ctx, bet, reason='gamble')
                 await ctx.send(f"You win! You earn {bet}$! \n"
                                f"**Dealer:** {number2 + n2} \n"
                                f"**You:** {n}")
@@ -780,9 +535,9 @@ class Rpg:
                 await ctx.send(f"You just lost {bet}$! \n"
                                f"**Dealer:** {number2 + n2} \n"
                                f"**You:** {n}")
-                await rpg.remove_money(ctx, bet)
+                await rpg.remove_money(ctx, bet, reason='gamble')
             elif n2 + number2 > 21 < n:
-                await rpg.add_money(ctx, bet)
+                await rpg.add_money(ctx, bet, reason='gamble')
                 await ctx.send(f"You win! You earn {bet}$! \n"
                                f"**Dealer:** {number2 + n2} \n"
                                f"**You:** {n}")
@@ -812,7 +567,7 @@ class Rpg:
                             "WHERE name=$4 AND owner=$5",
                             i[2] * 2, i[3] * 2, i[4] * 2, i[0], i[7])
                     await ctx.send(f"Upgraded **{item.title()}**'s statistics.")
-                    await rpg.remove_money(ctx, i[2] * 2)
+                    await rpg.remove_money(ctx, i[2] * 2, reason='upgrade')
                 else:
                     return await ctx.send("You don't have enough to upgrade this item")
             else:
@@ -889,15 +644,13 @@ class Rpg:
             if choice == ctx.author.name:
                 xp = random.randint(10, 100)
                 mon = random.randint(10, 100)
-                await rpg.add_xp(ctx, xp)
-                await rpg.lvl(ctx, mon,
+                await rpg.lvl(ctx, mon, xp,
                               msg1=f"{ctx.author.mention} won the drinking contest, leveled up, and earned {mon}$",
                               msg2=f"{ctx.author.mention} won the drinking contest, and earned {xp}xp")
             else:
                 xp = random.randint(10, 100)
                 mon = random.randint(10, 100)
-                await rpg.add_xp(ctx, xp)
-                await rpg.lvl(ctx, mon,
+                await rpg.lvl(ctx, mon, xp,
                               msg1=f"{user.mention} won the drinking contest, leveled up, and earned {mon}$",
                               msg2=f"{user.mention} won the drinking contest, and earned {xp}xp", user=user.id)
         else:
@@ -921,25 +674,21 @@ class Rpg:
         if choice == "Heads":
             c = random.choice(["Heads", "Tails"])
             if c == "Heads":
-                await rpg.add_xp(ctx, 100)
-                await rpg.lvl(ctx, 200,
+                await rpg.lvl(ctx, 200, 100,
                               msg1=f"{ctx.author.mention} It was **Heads!** You leveled up and earned 200$",
                               msg2=f"{ctx.author.mention} It was **Heads!** You earned 100xp")
             else:
-                await rpg.add_xp(ctx, 50)
-                await rpg.lvl(ctx, 100,
+                await rpg.lvl(ctx, 100, 50,
                               msg1=f"{ctx.author.mention} Sorry it was **Tails!** You leveled up and earned 100$",
                               msg2=f"{ctx.author.mention} Sorry it was **Tails!** You earned 50xp")
         elif choice == "Tails":
             c = random.choice(["Tails", "Heads"])
             if c == "Tails":
-                await rpg.add_xp(ctx, 100)
-                await rpg.lvl(ctx, 200,
+                await rpg.lvl(ctx, 200, 100,
                               msg1=f"{ctx.author.mention} It was **Tails!** You leveled up and earned 200$",
                               msg2=f"{ctx.author.mention} It was **Tails!** You earned 100xp")
             else:
-                await rpg.add_xp(ctx, 50)
-                await rpg.lvl(ctx, 100,
+                await rpg.lvl(ctx, 100, 50,
                               msg1=f"{ctx.author.mention} Sorry it was **Head!s** You leveled up and earned 100$",
                               msg2=f"{ctx.author.mention} Sorry it was **Heads!** You earned 50xp")
 
@@ -959,7 +708,7 @@ class Rpg:
              "Hammer": "https://cdn.discordapp.com/attachments/389275624163770378/502084112547315733/hammer.png"
              }
 
-        item = await rpg.fetch_item(ctx, choice.title(), None, 'rpg_shop')
+        item = self.catalog.item(choice.title())
         number = 0
         if item:
             number += 1
@@ -1030,25 +779,19 @@ class Rpg:
             await ctx.send(f"Are you sure you want to merge **{i1[0]}** and **{i2[0]}** together? \n"
                            f"**Modified Statistics:** Price: {i1[2] + i2[2]}, Damage: {i1[3] + i2[3]}, Defense: "
                            f"{i1[4] + i2[4]}. `Yes` or `No`?")
-            if (await rpg.fetch_user(ctx))[4] >= i1[4] + i2[4]:
-                yon = await rpg.yon(ctx)
-                if yon == "Yes":
-                    await ctx.send(f"**{rpg.merge(item1.title(), item2.title()).title()}** has been created!")
-                    async with ctx.bot.db.acquire() as db:
-                        await db.execute("DELETE FROM rpg_inventory WHERE name=$1 AND owner=$2",
-                                         item1.title(), ctx.author.id)
-                        await db.execute("DELETE FROM rpg_inventory WHERE name=$1 AND owner=$2",
-                                         item2.title(), ctx.author.id)
-                        await db.execute("INSERT INTO rpg_inventory VALUES($1, $2, $3, $4, $5, $6, $7, $8, $9)",
-                                         rpg.merge(item1.title(), item2.title()).title(), i1[1], i1[2] + i2[2],
-                                         i1[3] + i2[3], i1[4] + i2[4], i1[5], rpg.merge(i1[6], i2[6]).title(),
-                                         ctx.author.id, 0
-                                         )
-                    await rpg.remove_money(ctx, i1[2] + i2[2])
-                else:
-                    return await ctx.send("I guess you don't want to merge your items.")
-            else:
+            if (await rpg.fetch_user(ctx))[4] < i1[2] + i2[2]:
                 return await ctx.send("You don't have enough money!")
+
+            if await rpg.yon(ctx) != "Yes":
+                return await ctx.send("I guess you don't want to merge your items.")
+
+            try:
+                merged = await ctx.bot.economy.merge_items(ctx.message.id, ctx.author.id, i1[0], i2[0])
+            except InsufficientFunds:
+                return await ctx.send("You don't have enough money!")
+            except NotOwned:
+                return await ctx.send("You must not have one of the items, or you misspelled one of the names.")
+            await ctx.send(f"**{merged[0]}** has been created!")
         else:
             return await ctx.send("You must not have one of the items, or you misspelled one of the names.")
 
@@ -1062,15 +805,14 @@ class Rpg:
             await ctx.send(f"Are you sure you want to sell **{item_[0]}**? \n"
                            f"`Yes` or `No`")
 
-            yon = await rpg.yon(ctx)
-            if yon == "Yes":
-                await ctx.send(f"You have received **{item_[2]}$** for selling **{item_[0]}**")
-                await rpg.add_money(ctx, item_[2])
-                async with ctx.bot.db.acquire() as db:
-                    await db.execute("DELETE FROM rpg_inventory WHERE name=$1 AND owner=$2",
-                                     item_[0], ctx.author.id)
-            else:
+            if await rpg.yon(ctx) != "Yes":
                 return await ctx.send(f"I guess you don't want to sell {item.title()}")
+
+            try:
+                paid = await ctx.bot.economy.sell_item(ctx.message.id, ctx.author.id, item_[0])
+            except NotOwned:
+                return await ctx.send("You don't have that item")
+            await ctx.send(f"You have received **{paid}$** for selling **{item_[0]}**")
         else:
             return await ctx.send("You don't have that item")
 
@@ -1092,7 +834,7 @@ class Rpg:
                         await db.execute("UPDATE rpg_inventory SET name=$1 WHERE name=$2 AND owner=$3",
                                          name.title(), item.title(), ctx.author.id)
 
-                    await rpg.remove_money(ctx, i[2])
+                    await rpg.remove_money(ctx, i[2], reason='rename')
                 else:
                     return await ctx.send(f"I guess you don't want to rename **{item.title()}**.")
             else:
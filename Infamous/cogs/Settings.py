@@ -1,4 +1,5 @@
 import logging
+from typing import Optional, Union
 
 import discord
 from discord.ext import commands
@@ -20,89 +21,89 @@ class Settings:
 
     @commands.group(name="prefix", invoke_without_command=True)
     async def prefix_(self, ctx):
-        """The prefix for this guild."""
+        """The prefixes for this guild."""
 
-        await ctx.send(f"My prefix for {ctx.guild.name} is `{ctx.prefix}`")
+        prefixes = (await ctx.bot.settings.get(ctx.guild.id)).prefixes or ('>',)
+        await ctx.send(f"My prefixes for {ctx.guild.name} are {', '.join(f'`{p}`' for p in prefixes)}")
 
     @prefix_.command(name="set")
-    async def set_(self, ctx, prefix: str):
-        """Change my prefix!"""
+    async def set_(self, ctx, *prefixes: str):
+        """Change my prefix! You can give up to 5 prefixes."""
 
-        self.bot.prefixes[ctx.guild.id] = prefix
+        prefixes = list(dict.fromkeys(prefixes))
+        if not prefixes:
+            return await ctx.send("You need to give at least one prefix.")
+        if len(prefixes) > 5 or any(len(p) > 15 for p in prefixes):
+            return await ctx.send("You can have up to 5 prefixes of at most 15 characters.")
 
-        async with ctx.bot.db.acquire() as db:
-            await db.execute("UPDATE settings SET prefix=$1 WHERE guild=$2", prefix, ctx.guild.id)
-
-        await ctx.send(f"Set the prefix to {prefix} for **{ctx.guild.name}**")
+        await ctx.bot.settings.set_prefixes(ctx.guild.id, prefixes)
+        await ctx.send(f"Set the prefixes to {', '.join(f'`{p}`' for p in prefixes)} for **{ctx.guild.name}**")
 
     @prefix_.command()
     async def reset(self, ctx):
         """Reset to default prefix."""
 
-        self.bot.prefixes[ctx.guild.id] = None
-
-        async with ctx.bot.db.acquire() as db:
-            await db.execute("UPDATE settings SET prefix = NULL WHERE guild=$1", ctx.guild.id)
-
+        await ctx.bot.settings.set_prefixes(ctx.guild.id, ())
         await ctx.send("The prefix has been reset to default `>`")
 
-    @commands.command()
-    async def disable(self, ctx, *, command):
-        """Disables a command."""
+    @staticmethod
+    def _scope(ctx, where):
+        if isinstance(where, discord.TextChannel):
+            return 'channel', where.id, where.mention
+        if isinstance(where, discord.Role):
+            return 'role', where.id, f"the role **{where.name}**"
+        return 'guild', ctx.guild.id, f"**{ctx.guild.name}**"
 
-        try:
-            command_ = ctx.bot.get_command(command.lower())
-        except discord.Forbidden:
-            return await ctx.send("That's not a command.")
+    def _resolve(self, ctx, command):
+        command_ = ctx.bot.get_command(command.lower())
+        if command_ is not None and command_.cog_name != self.__class__.__name__:
+            return command_
 
-        async with ctx.bot.db.acquire() as db:
-            data = await db.fetchval("SELECT disabled FROM settings WHERE guild=$1", ctx.guild.id)
+    @commands.command()
+    async def disable(self, ctx, where: Optional[Union[discord.TextChannel, discord.Role]] = None, *, command):
+        """Disables a command for the server, a channel or a role."""
 
-            if data is not None:
-                await db.execute("UPDATE settings SET disabled = disabled || ', ' || $1 WHERE guild=$2",
-                                 command_.name, ctx.guild.id)
-            else:
-                await db.execute("UPDATE settings SET disabled = $1 WHERE guild=$2", command_.name, ctx.guild.id)
+        command_ = self._resolve(ctx, command)
+        if command_ is None:
+            return await ctx.send("That's not a command that can be disabled.")
 
-        if ctx.guild.id not in self.bot.disabled_commands:
-            self.bot.disabled_commands[ctx.guild.id] = [command]
-        else:
-            self.bot.disabled_commands[ctx.guild.id].append(command)
-
-        await ctx.send("The command has been disabled.")
+        scope, target, name = self._scope(ctx, where)
+        await ctx.bot.settings.disable(ctx.guild.id, command_.qualified_name, scope, target)
+        await ctx.send(f"`{command_.qualified_name}` has been disabled for {name}.")
 
     @commands.command()
-    async def enable(self, ctx, *, command):
-        """Enables a disabled command."""
+    async def enable(self, ctx, where: Optional[Union[discord.TextChannel, discord.Role]] = None, *, command):
+        """Enables a disabled command for the server, a channel or a role."""
 
-        try:
-            command_ = ctx.bot.get_command(command.lower())
-        except discord.Forbidden:
+        command_ = self._resolve(ctx, command)
+        if command_ is None:
             return await ctx.send("That's not a command.")
 
-        if self.bot.disabled_commands[ctx.guild.id] is not None:
-            self.bot.disabled_commands[ctx.guild.id].remove(command_.name)
-        elif ctx.guild.id not in self.bot.disabled_commands:
-            await ctx.send("There are no disabled commands.")
-        else:
-            self.bot.disabled_commands[ctx.guild.id] = None
-
-        async with ctx.bot.db.acquire() as db:
-            await db.execute("UPDATE settings SET disabled = $1 WHERE guild=$2",
-                             ', '.join(self.bot.disabled_commands[ctx.guild.id]), ctx.guild.id)
+        scope, target, name = self._scope(ctx, where)
+        settings = await ctx.bot.settings.get(ctx.guild.id)
+        if (scope, target, command_.qualified_name) not in settings.rules:
+            return await ctx.send(f"That command isn't disabled for {name}.")
 
-        await ctx.send("The command has been enabled.")
+        await ctx.bot.settings.enable(ctx.guild.id, command_.qualified_name, scope, target)
+        await ctx.send(f"`{command_.qualified_name}` has been enabled for {name}.")
 
     @commands.command()
     async def disabled(self, ctx):
         """Shows the currently disabled commands for this guild."""
-        await ctx.send(
-            f"Commands disabled for **{ctx.guild.name}**: {', '.join(self.bot.disabled_commands[ctx.guild.id])}")
+        settings = await ctx.bot.settings.get(ctx.guild.id)
+
+        lines = [f"Commands disabled for **{ctx.guild.name}**: {', '.join(sorted(settings.disabled)) or 'None'}"]
+        for channel_id, command in sorted(settings.channel_disabled, key=lambda r: (r[1], r[0])):
+            lines.append(f"`{command}` in <#{channel_id}>")
+        for command, roles in sorted(settings.role_disabled.items()):
+            names = (getattr(ctx.guild.get_role(r), 'name', r) for r in roles)
+            lines.append(f"`{command}` for {', '.join(f'**{n}**' for n in names)}")
+        await ctx.send('\n'.join(lines))
 
     @commands.group(invoke_without_command=True)
     async def alerts(self, ctx):
         """Checks if alerts for rpg are enabled or disabled."""
-        if self.bot.alerts[ctx.guild.id] is True:
+        if (await ctx.bot.settings.get(ctx.guild.id)).alerts:
             await ctx.send("Alerts for RPG are enabled.")
         else:
             await ctx.send("Alerts for RPG have been disabled.")
@@ -110,19 +111,13 @@ class Settings:
     @alerts.command(name="enable")
     async def __enable(self, ctx):
         """Enables alerts."""
-        self.bot.alerts[ctx.guild.id] = True
-        async with ctx.bot.db.acquire() as db:
-            await db.execute("UPDATE settings SET alerts=TRUE WHERE guild=$1", ctx.guild.id)
-
+        await ctx.bot.settings.set_alerts(ctx.guild.id, True)
         await ctx.send("Alerts have been enabled.")
 
     @alerts.command(name="disable")
     async def __disable(self, ctx):
         """Disable alerts."""
-        self.bot.alerts[ctx.guild.id] = False
-        async with ctx.bot.db.acquire() as db:
-            await db.execute("UPDATE settings SET alerts=FALSE WHERE guild=$1", ctx.guild.id)
-
+        await ctx.bot.settings.set_alerts(ctx.guild.id, False)
         await ctx.send("Alerts have been disabled.")
 
 
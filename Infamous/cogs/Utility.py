@@ -7,7 +7,6 @@ from contextlib import redirect_stdout
 from datetime import datetime
 import aiohttp
 import discord
-import psutil
 from discord.ext import commands
 from .utils.paginator import HelpPaginator, SimplePaginator
 from .utils import functions as func
@@ -89,7 +88,6 @@ class Utility:
         self.bot = bot
         self._last_result = None
         self.sessions = set()
-        self.process = psutil.Process()
 
     # From Rapptz
     def cleanup_code(self, content):
@@ -112,6 +110,12 @@ class Utility:
         embed = discord.Embed(color=self.bot.embed_color)
         embed.title = 'Pong! :ping_pong:'
         embed.description = f'That took {ping}ms!'
+
+        current = ctx.guild.shard_id if ctx.guild else 0
+        shards = [f'{"**" if shard_id == current else ""}`{shard_id:>3}` {latency * 1000:.0f}ms · '
+                  f'{self.bot.stats.shard_guilds[shard_id]} guilds{"**" if shard_id == current else ""}'
+                  for shard_id, latency in sorted(self.bot.latencies)]
+        embed.add_field(name=f'Cluster {self.bot.cluster_id} shards', value='\n'.join(shards[:25]))
         await ctx.send(embed=embed)
 
     # From Rapptz
@@ -207,8 +211,7 @@ class Utility:
         """Shows information about this bot"""
 
         uptime = func.time_(self.bot.launch_time)
-        users = sum(1 for _ in self.bot.get_all_members())
-        channels = sum(1 for _ in self.bot.get_all_channels())
+        stats = self.bot.stats
 
         author = self.bot.get_user(299879858572492802)
 
@@ -221,9 +224,9 @@ class Utility:
                  '**[[Discord.py]](https://github.com/Rapptz/discord.py/tree/rewrite)** \n'
                  '**[[Support]](https://discord.gg/JyJTh4H)**')
 
-        # From Modelmat
-        cpu_usage = self.process.cpu_percent() / psutil.cpu_count()
-        ram_usage = self.process.memory_full_info().uss / 1024 ** 2
+        cpu_usage, ram_usage = stats.latest()
+        cpu_trend, ram_trend = stats.trend()
+        cache = self.bot.message_cache
 
         embed = discord.Embed(color=self.bot.embed_color)
         embed.set_author(name=self.bot.user.name, icon_url=self.bot.user.avatar_url)
@@ -235,10 +238,11 @@ class Utility:
         embed.add_field(name='About', value=about, inline=False)
 
         embed.add_field(name='Statistics 📈',
-                        value=(f'**{len(self.bot.guilds)} guilds.**\n'
-                               f'**{channels} channels.**\n'
-                               f'**{users} users.** \n'
-                               f'**{self.bot.lines} lines**'), inline=True)
+                        value=(f'**{stats.guilds} guilds.**\n'
+                               f'**{stats.channels} channels.**\n'
+                               f'**{stats.humans} users.** \n'
+                               f'**{stats.bots} bots.** \n'
+                               f'**{stats.lines} lines**'), inline=True)
 
         embed.add_field(name='Uptime ⏰', value=(f'**{uptime[0]} days.** \n'
                                                 f'**{uptime[1]} hours.** \n'
@@ -246,11 +250,126 @@ class Utility:
                                                 f'**{uptime[3]} seconds.**'), inline=True)
 
         embed.add_field(name='Developer 🕵', value=author)
-        embed.add_field(name='Resources 💻', value='`CPU:` {:.2f}% \n`MEM:` {:.2f}'.format(cpu_usage, ram_usage))
+        embed.add_field(name='Resources 💻', value=f'`CPU:` {cpu_usage:.2f}% {cpu_trend}\n'
+                                                   f'`MEM:` {ram_usage:.2f} {ram_trend}\n'
+                                                   f'`MSG CACHE:` {len(cache)} ({cache.bytes / 1024 ** 2:.2f})')
+        embed.add_field(name='Shards 🛰', value=f'`CLUSTER:` {self.bot.cluster_id}\n'
+                                                f'`SHARDS:` {len(self.bot.shards)}/{self.bot.shard_count}\n'
+                                                f'`LATENCY:` {self.bot.latency * 1000:.0f}ms')
         embed.add_field(name='Links 🔗', value=links, inline=True)
 
         await ctx.send(embed=embed)
 
+    @info.command(name='commands', hidden=True)
+    @checks.is_admin()
+    async def commands_(self, ctx, limit: int = 10):
+        """Shows the slowest and most used commands since the last restart."""
+
+        limit = max(1, min(limit, 12))
+        metrics = self.bot.metrics
+        if not metrics.commands:
+            return await ctx.send("No commands have been recorded yet.")
+
+        def row(name, stats):
+            parts = '/'.join(f'{stats.components[c] / stats.calls * 1000:.0f}' for c in ('db', 'http', 'send'))
+            return (f'{name[:18]:<18} {stats.calls:>6} {stats.errors:>4} '
+                    f'{stats.latency.quantile(0.5) * 1000:>6.0f} {stats.latency.quantile(0.95) * 1000:>6.0f} {parts}')
+
+        header = f'{"Command":<18} {"Calls":>6} {"Err":>4} {"p50":>6} {"p95":>6} db/http/send'
+        slowest = metrics.top(lambda s: s.latency.quantile(0.95), limit)
+        frequent = metrics.top(lambda s: s.calls, limit)
+
+        embed = discord.Embed(color=self.bot.embed_color)
+        embed.title = 'Command statistics (ms)'
+        embed.add_field(name='Slowest', value='```\n' + '\n'.join([header] + [row(*i) for i in slowest]) + '```',
+                        inline=False)
+        embed.add_field(name='Most used', value='```\n' + '\n'.join([header] + [row(*i) for i in frequent]) + '```',
+                        inline=False)
+        await ctx.send(embed=embed)
+
+    @info.command(name='queries', hidden=True)
+    @checks.is_admin()
+    async def queries(self, ctx, sort: str = 'total', limit: int = 8):
+        """Shows the most expensive queries by total, p95, calls or rows. Use `reset` to clear them."""
+
+        db = self.bot.db
+        if sort == 'reset':
+            db.reset()
+            return await ctx.send("Query statistics have been reset.")
+
+        keys = {
+            'total': lambda s: s.latency.sum,
+            'p95': lambda s: s.latency.quantile(0.95),
+            'calls': lambda s: s.calls,
+            'rows': lambda s: s.rows
+        }
+        if sort not in keys:
+            return await ctx.send(f"You can sort by {', '.join(keys)}.")
+
+        embed = discord.Embed(color=self.bot.embed_color)
+        embed.title = f'Queries by {sort}'
+        embed.description = (f'`POOL:` {db.in_use}/{db.max_size} in use, peak {db.peak_in_use}, '
+                             f'saturated {db.saturated} times\n'
+                             f'`WAIT:` p50 {db.waits.quantile(0.5) * 1000:.1f}ms, '
+                             f'p95 {db.waits.quantile(0.95) * 1000:.1f}ms over {db.waits.count} acquires')
+
+        for query, stats in db.top(keys[sort], max(1, min(limit, 10))):
+            embed.add_field(name=f'{stats.calls} calls · {stats.latency.sum * 1000:.0f}ms total · '
+                                 f'p95 {stats.latency.quantile(0.95) * 1000:.1f}ms · {stats.rows} rows',
+                            value=f'```sql\n{query[:400]}```', inline=False)
+        await ctx.send(embed=embed)
+
+    @info.command(name='earners', hidden=True)
+    @checks.is_admin()
+    async def earners(self, ctx, account: str = 'profile', limit: int = 10):
+        """Shows who earned the most today, in the `profile` or `rpg` economy."""
+
+        if account not in ('profile', 'rpg'):
+            return await ctx.send("You can pick the `profile` or `rpg` economy.")
+
+        ledger = self.bot.ledger
+        await ledger.flush()
+        await ledger.rollup(datetime.utcnow().date())
+        rows = await ledger.top_earners(datetime.utcnow().date(), account, max(1, min(limit, 20)))
+        if not rows:
+            return await ctx.send("Nobody has earned anything today.")
+
+        table = TabularData()
+        table.set_columns(['User', 'Earned', 'Spent', 'Entries'])
+        table.add_rows([str(self.bot.get_user(r['user_id']) or r['user_id']), r['earned'], r['spent'], r['entries']]
+                       for r in rows)
+        await ctx.send(f'```\n{table.render()}\n```')
+
+    @info.command(name='exploits', hidden=True)
+    @checks.is_admin()
+    async def exploits(self, ctx, limit: int = 10):
+        """Shows rewards claimed more often or for more than possible today, and negative balances."""
+
+        ledger = self.bot.ledger
+        await ledger.flush()
+        await ledger.rollup(datetime.utcnow().date())
+        claims, negative = await ledger.exploits(datetime.utcnow().date(), max(1, min(limit, 20)))
+        if not claims and not negative:
+            return await ctx.send("Nothing suspicious today.")
+
+        def user(user_id):
+            return str(self.bot.get_user(user_id) or user_id)
+
+        embed = discord.Embed(color=self.bot.embed_color)
+        embed.title = 'Possible exploits today'
+        if claims:
+            table = TabularData()
+            table.set_columns(['User', 'Reward', 'Claims', 'Max', 'Earned', 'Max'])
+            table.add_rows([user(r['user_id']), r['command'], r['entries'], r['max_entries'], r['earned'],
+                            r['max_earned']] for r in claims)
+            embed.add_field(name='Rewards over their limits', value=f'```\n{table.render()[:1000]}\n```',
+                            inline=False)
+        if negative:
+            embed.add_field(name='Negative balances',
+                            value='\n'.join(f'`{r["account"]}` {user(r["user_id"])}: {r["bal"]}$' for r in negative),
+                            inline=False)
+        await ctx.send(embed=embed)
+
     # User Information
     @info.command(aliases=['member'])
     @commands.guild_only()
@@ -317,8 +436,7 @@ class Utility:
         channels = len(ctx.guild.channels)
         embed = discord.Embed(color=self.bot.embed_color)
 
-        members = [x for x in ctx.guild.members if not x.bot]
-        bots = [x for x in ctx.guild.members if x.bot]
+        members, bots = self.bot.stats.guild_counts(ctx.guild)
 
         embed.title = f'{ctx.guild.name} 🏰'
         embed.description = f'Created on {created} \nThat\'s {abs(created1.years)}y(s), {abs(created1.months)}m, ' \
@@ -328,8 +446,8 @@ class Utility:
         embed.set_thumbnail(url=ctx.guild.icon_url)
         embed.add_field(name='Server 🆔', value=ctx.guild.id, inline=True)
         embed.add_field(name='Members :family_mwgb:', value=(
-            f"**Users:** {len(members)} \n"
-            f"**Bots:** {len(bots)}"
+            f"**Users:** {members} \n"
+            f"**Bots:** {bots}"
         ), inline=True)
 
         embed.add_field(name='Channels 📺', value=str(channels), inline=True)
@@ -0,0 +1,135 @@
+import asyncio
+import functools
+import logging
+import os
+from collections import OrderedDict
+from io import BytesIO
+
+import aiohttp
+from PIL import Image, ImageDraw, ImageFont
+
+from .constants import shop_items
+from .progression import PROFILE
+
+log = logging.getLogger(__name__)
+
+WIDTH, HEIGHT = 600, 200
+AVATAR = 160
+ICON = 64
+BACKGROUND = (16, 16, 16, 255)
+TEXT = (235, 235, 235, 255)
+MUTED = (150, 150, 150, 255)
+BAR = (60, 60, 60, 255)
+FILL = (114, 137, 218, 255)
+
+FONT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'fonts', 'whitney-book.otf')
+
+# Avatars and icons that take longer than this are left off the card.
+DOWNLOAD_TIMEOUT = 5
+
+
+@functools.lru_cache(maxsize=None)
+def _font(size):
+    return ImageFont.truetype(FONT, size)
+
+
+def _open(data, size):
+    if not data:
+        return None
+    try:
+        return Image.open(BytesIO(data)).convert("RGBA").resize((size, size))
+    except OSError:
+        return None
+
+
+def draw_card(name, profile, main, avatar=None, icon=None):
+    """Draws a profile card as PNG bytes; blocking, so run it in an executor."""
+    card = Image.new("RGBA", (WIDTH, HEIGHT), BACKGROUND)
+    draw = ImageDraw.Draw(card)
+
+    avatar = _open(avatar, AVATAR)
+    if avatar:
+        card.paste(avatar, (20, 20), avatar)
+
+    left = 20 + AVATAR + 20
+    draw.text((left, 20), name, fill=TEXT, font=_font(28))
+    draw.text((left, 60), f"Level {profile['level']}", fill=TEXT, font=_font(20))
+    draw.text((left, 88), f"Guild: {profile['guild'] or 'None'}", fill=MUTED, font=_font(16))
+
+    # Progress through the current level.
+    start, end = PROFILE.threshold(profile['level']), PROFILE.threshold(profile['level'] + 1)
+    progress = min(max((profile['xp'] - start) / (end - start), 0), 1)
+    right = WIDTH - 20 - ICON - 20
+    draw.rectangle((left, 150, right, 170), fill=BAR)
+    draw.rectangle((left, 150, left + int((right - left) * progress), 170), fill=FILL)
+    draw.text((left, 126), f"{profile['xp'] - start}/{end - start}xp", fill=MUTED, font=_font(14))
+
+    icon = _open(icon, ICON)
+    if icon:
+        card.paste(icon, (WIDTH - 20 - ICON, 20), icon)
+    if main:
+        draw.text((right + 20, 20 + ICON + 8), main, fill=MUTED, font=_font(12))
+
+    b = BytesIO()
+    card.save(b, "png")
+    return b.getvalue()
+
+
+class ProfileCards:
+    """Rendered profile cards, kept per user and profile version.
+
+    ``profiles.version`` goes up with every reward, purchase or ability
+    change, so a card is reused until one of those happens (or the avatar
+    changes) and is redrawn on the next request after it. The least
+    recently used cards are dropped past ``size``.
+    """
+
+    def __init__(self, session, loop, *, size=256):
+        self.session = session
+        self.loop = loop
+        self.size = size
+        self._cards = OrderedDict()
+        self._icons = {}
+
+    def __len__(self):
+        return len(self._cards)
+
+    async def _download(self, url):
+        try:
+            async with self.session.get(str(url), timeout=aiohttp.ClientTimeout(total=DOWNLOAD_TIMEOUT)) as r:
+                if r.status == 200:
+                    return await r.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            log.warning('Could not download %s', url)
+
+    async def _icon(self, ability):
+        if ability not in shop_items:
+            return None
+        if ability not in self._icons:
+            icon = await self._download(shop_items[ability][1])
+            if icon is None:
+                return None
+            self._icons[ability] = icon
+        return self._icons[ability]
+
+    async def render(self, user, profile):
+        """The card of ``user`` for their ``profile`` row, drawn only if that version wasn't yet."""
+        avatar_url = str(user.avatar_url_as(format='png', size=256))
+        key = (user.id, profile['version'], avatar_url)
+        card = self._cards.get(key)
+        if card is not None:
+            self._cards.move_to_end(key)
+            return card
+
+        main = profile['main_ability']
+        avatar = await self._download(avatar_url)
+        icon = await self._icon(main)
+        card = await self.loop.run_in_executor(None, draw_card, user.display_name, profile, main, avatar, icon)
+
+        # Older versions of this user's card can never be asked for again.
+        for old in [k for k in self._cards if k[0] == user.id]:
+            del self._cards[old]
+        self._cards[key] = card
+        while len(self._cards) > self.size:
+            self._cards.popitem(last=False)
+        return card
@@ -0,0 +1,68 @@
+import asyncio
+import bisect
+import random
+
+
+class Catalog:
+    """The RPG shop items and quests, kept in memory since they rarely change.
+
+    Items are indexed by name, by skill (sorted by required level) and by
+    price (sorted, for bisecting what a balance can afford). Random picks
+    happen in-process instead of with ``ORDER BY RANDOM()``.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.items = {}
+        self.quests = []
+        self._by_skill = {}
+        self._by_price = []
+        self._prices = []
+        self._task = None
+
+    def start(self, loop):
+        if self._task is None:
+            self._task = loop.create_task(self.load())
+
+    async def wait(self):
+        await asyncio.shield(self._task)
+
+    async def load(self):
+        async with self.db.acquire() as db:
+            items = await db.fetch("SELECT * FROM rpg_shop")
+            quests = await db.fetch("SELECT quest FROM rpg_quests")
+
+        by_skill = {}
+        for item in items:
+            by_skill.setdefault(item['skill'], []).append(item)
+        for skill_items in by_skill.values():
+            skill_items.sort(key=lambda i: i['level'])
+
+        self.items = {item['name']: item for item in items}
+        self._by_skill = {skill: (skill_items, [i['level'] for i in skill_items])
+                          for skill, skill_items in by_skill.items()}
+        self._by_price = sorted(items, key=lambda i: i['price'])
+        self._prices = [item['price'] for item in self._by_price]
+        self.quests = [quest['quest'] for quest in quests]
+
+    def item(self, name):
+        return self.items.get(name)
+
+    def by_price(self, descending=False):
+        return self._by_price[::-1] if descending else list(self._by_price)
+
+    def affordable(self, balance):
+        """Items costing at most ``balance``, most expensive first."""
+        return self._by_price[:bisect.bisect_right(self._prices, balance)][::-1]
+
+    def below_level(self, skill, level):
+        """Items of a skill requiring less than ``level``."""
+        skill_items, levels = self._by_skill.get(skill, ((), ()))
+        return skill_items[:bisect.bisect_left(levels, level)]
+
+    def random_item(self, skill, level, exclude=()):
+        choices = [i for i in self.below_level(skill, level) if i['name'] not in exclude]
+        return random.choice(choices) if choices else None
+
+    def random_quest(self):
+        return random.choice(self.quests) if self.quests else None
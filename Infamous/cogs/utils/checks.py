@@ -1,4 +1,5 @@
 from discord.ext import commands
+from . import queries
 from .rpg_tools import *
 
 
@@ -72,8 +73,7 @@ def in_fame():
 
 def registered2():
     async def predicate(ctx):
-        async with ctx.bot.db.acquire() as db:
-            data = await db.fetchrow("SELECT * FROM profiles WHERE id=$1", ctx.author.id)
+        data = await queries.profile(ctx.bot.db, ctx.author.id)
 
         if not data:
             raise commands.CheckFailure(
@@ -87,8 +87,7 @@ def registered2():
 
 def unregistered2():
     async def predicate(ctx):
-        async with ctx.bot.db.acquire() as db:
-            data = await db.fetchrow("SELECT * FROM profiles WHERE id=$1", ctx.author.id)
+        data = await queries.profile(ctx.bot.db, ctx.author.id)
 
         if data:
             raise commands.CheckFailure(
@@ -102,9 +101,8 @@ def unregistered2():
 
 class SuperhumanFinder(commands.Converter):
     async def convert(self, ctx, argument):
-        async with ctx.bot.db.acquire() as db:
-            argument = await commands.MemberConverter().convert(ctx, argument)
-            users = await db.fetchval("SELECT id FROM profiles WHERE id=$1", argument.id)
+        argument = await commands.MemberConverter().convert(ctx, argument)
+        users = await queries.profile(ctx.bot.db, argument.id)
 
         if not users:
             raise commands.BadArgument(f"{ctx.author.mention} pick a user registered in the RPG!")
@@ -114,8 +112,7 @@ class SuperhumanFinder(commands.Converter):
 
 def has_guild():
     async def predicate(ctx):
-        async with ctx.bot.db.acquire() as db:
-            guild_ = await db.fetchval("SELECT guild FROM profiles WHERE id=$1", ctx.author.id)
+        guild_ = await queries.profile_guild(ctx.bot.db, ctx.author.id)
 
         if guild_:
             raise commands.CheckFailure(f"{ctx.author.mention} you already enlisted in {guild_}")
@@ -126,8 +123,7 @@ def has_guild():
 
 def no_guild():
     async def predicate(ctx):
-        async with ctx.bot.db.acquire() as db:
-            guild_ = await db.fetchval("SELECT guild FROM profiles WHERE id=$1", ctx.author.id)
+        guild_ = await queries.profile_guild(ctx.bot.db, ctx.author.id)
 
         if not guild_:
             raise commands.CheckFailure(f"{ctx.author.mention} you are not in a guild.")
@@ -138,13 +134,12 @@ def no_guild():
 
 class GuildFinder(commands.Converter):
     async def convert(self, ctx, argument):
-        async with ctx.bot.db.acquire() as db:
-            guild_ = await db.fetchval("SELECT guild FROM guilds WHERE id=$1", argument)
+        guild_ = await queries.guild(ctx.bot.db, argument)
 
         if not guild_:
             raise commands.BadArgument(f"{ctx.author.mention} choose an existing guild.")
         else:
-            return guild_
+            return guild_['guild']
 
 
 def in_testing():
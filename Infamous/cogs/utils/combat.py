@@ -0,0 +1,153 @@
+import random
+
+HIT = 'hit'
+MISS = 'miss'
+BLOCKED = 'blocked'
+
+# The RPG duel (v1) can also be blocked, and a miss costs nothing.
+WEAPON_RULES = {'outcomes': (HIT, MISS, BLOCKED), 'backfire': False}
+
+
+class Move:
+    """Something a fighter can do on their turn, with the damage it rolls."""
+
+    __slots__ = ('name', 'low', 'high')
+
+    def __init__(self, name, low, high):
+        self.name = name
+        self.low = low
+        self.high = max(low, high)
+
+
+class Fighter:
+    __slots__ = ('id', 'hp', 'moves')
+
+    def __init__(self, id, hp, moves):
+        self.id = id
+        self.hp = hp
+        self.moves = moves
+
+    def snapshot(self):
+        """The fighter as plain data, for the duel log: ``{'id', 'hp', 'moves': {key: [name, low, high]}}``."""
+        return {'id': self.id, 'hp': self.hp,
+                'moves': {key: [m.name, m.low, m.high] for key, m in self.moves.items()}}
+
+    @classmethod
+    def from_snapshot(cls, data):
+        return cls(data['id'], data['hp'], {key: Move(*move) for key, move in data['moves'].items()})
+
+
+class Turn:
+    """What happened in one turn, for the command to describe."""
+
+    __slots__ = ('attacker', 'defender', 'move', 'outcome', 'damage')
+
+    def __init__(self, attacker, defender, move, outcome, damage):
+        self.attacker = attacker
+        self.defender = defender
+        self.move = move
+        self.outcome = outcome
+        self.damage = damage
+
+
+class Duel:
+    """The state of a fight between two fighters taking turns.
+
+    Every roll comes from ``rng``, seeded with ``seed``, so the fight can be
+    replayed exactly from ``start`` (the fighters as they began), the seed
+    and ``actions``. ``outcomes`` are drawn
+    uniformly each turn; with ``backfire`` a miss hurts the attacker instead.
+    """
+
+    __slots__ = ('fighters', 'start', 'seed', 'rng', 'outcomes', 'backfire', 'actions', 'winner')
+
+    def __init__(self, fighters, *, seed=None, outcomes=(HIT, MISS), backfire=True):
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+
+        self.fighters = tuple(fighters)
+        self.start = [f.snapshot() for f in self.fighters]
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.outcomes = outcomes
+        self.backfire = backfire
+        self.actions = []
+        self.winner = None
+
+    @property
+    def attacker(self):
+        return self.fighters[len(self.actions) % 2]
+
+    @property
+    def defender(self):
+        return self.fighters[(len(self.actions) + 1) % 2]
+
+    @property
+    def loser(self):
+        if self.winner is not None:
+            return self.fighters[0] if self.winner is self.fighters[1] else self.fighters[1]
+
+    @property
+    def over(self):
+        return self.winner is not None
+
+
+def resolve_turn(state, action):
+    """Plays ``action`` (a key of the attacker's moves) and returns the ``Turn``."""
+    if state.over:
+        raise ValueError('The duel is already over.')
+
+    attacker, defender = state.attacker, state.defender
+    move = attacker.moves[action]
+
+    damage = state.rng.randint(move.low, move.high)
+    outcome = state.rng.choice(state.outcomes)
+    if outcome == HIT:
+        defender.hp -= damage
+    elif outcome == MISS and state.backfire:
+        attacker.hp -= damage
+    else:
+        damage = 0
+
+    state.actions.append(action)
+    if defender.hp <= 0:
+        state.winner = attacker
+    elif attacker.hp <= 0:
+        state.winner = defender
+
+    return Turn(attacker, defender, move, outcome, damage)
+
+
+def replay(fighters, seed, actions, **rules):
+    """Replays a finished duel from fresh fighters (or their logged snapshots), its seed and its actions."""
+    state = Duel([Fighter.from_snapshot(f) if isinstance(f, dict) else f for f in fighters], seed=seed, **rules)
+    for action in actions:
+        resolve_turn(state, action)
+    return state
+
+
+def ability_fighter(user_id, abilities):
+    """A superhuman fighting with ability rows; their durability adds up to the health."""
+    moves = {a['ability']: Move(a['ability'], 10, a['damage'] // 2) for a in abilities}
+    return Fighter(user_id, sum(a['durability'] for a in abilities), moves)
+
+
+def weapon_fighter(user_id, item, hp=1000):
+    """An RPG player fighting with an inventory item, either attacking (``1``) or with a barrage (``2``)."""
+    moves = {'1': Move(item['name'], 1, item['damage'] // 10),
+             '2': Move(item['name'], 10, item['damage'] // 10)}
+    return Fighter(user_id, hp, moves)
+
+
+def guild_strength(stats):
+    """A guild's war strength from its ``guild_stats`` aggregates: ability power plus a point per 100 member xp."""
+    if not stats or not stats['members']:
+        return 0
+    return stats['power'] + stats['member_xp'] // 100
+
+
+def war_winner(first, second, rng=random):
+    """Picks the winner of two ``(name, strength)`` sides, each winning in proportion to its strength."""
+    # One extra point each, so a side with no strength still has a chance.
+    weights = [first[1] + 1, second[1] + 1]
+    return rng.choices([first[0], second[0]], weights)[0]
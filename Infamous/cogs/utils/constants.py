@@ -0,0 +1,72 @@
+from collections import namedtuple
+
+# Game balance numbers, kept free of discord so offline tools can import them.
+
+# Abilities for sale: name -> [price, image, description, damage, durability]
+shop_items = {"Super Strength": [12000, 'https://imgur.com/vbtnxdi.png',
+                                 "Allows you to lift 10x your weight.", 250, 300],
+
+              "Flight": [15000, 'https://imgur.com/jr8CyIk.png',
+                         "Allows you to fly without an aircraft.", 200, 250],
+
+              "Telekinesis": [18000, 'https://imgur.com/2UWGYBq.png',
+                              "Control objects with your mind.", 300, 350],
+
+              "Super Speed": [21000, 'https://imgur.com/bBJujmH.png',
+                              "Run faster than a speeding bullet.", 280, 330],
+
+              "Super Intelligence": [24000, 'https://imgur.com/k9V9ywi.png',
+                                     "Outsmart your opponents.", 180, 230],
+
+              "Fast Regeneration": [27000, 'https://imgur.com/97ZtaFe.gif',
+                                    "Wounds won't stop you.", 220, 270],
+
+              "Heat Vision": [30000, 'https://imgur.com/fV8pIJo.png',
+                              "Destroy things with your vision.", 320, 370],
+
+              "Telepathy": [33000, 'https://imgur.com/0gbfMDG.png',
+                            "Control other people's minds.", 100, 150],
+
+              "Invisibility": [36000, 'https://imgur.com/v6MbTV5.gif',
+                               "Become the ultimate spy.", 120, 170],
+
+              "Freeze Breath": [39000, 'https://imgur.com/ot2zakO.gif',
+                                "Freeze things with your breath.", 350, 400],
+
+              "Sonic Scream": [41000, 'https://imgur.com/El8Xh9Y.gif',
+                               "Break glass with just your voice.", 400, 450],
+
+              "Electrokinesis": [44000, 'https://imgur.com/Y8eBb18.png',
+                                 "Harness the power of electricity.", 420, 470]}
+
+# Mastering an ability costs its price divided by this and rolls one of the
+# tiers uniformly: (min xp, max xp, damage and durability points).
+MASTER_PRICE_DIVISOR = 4
+MASTER_TIERS = ((20, 100, 50), (100, 250, 100), (150, 300, 150))
+
+Reward = namedtuple('Reward', 'cooldown money xp')
+
+# Rewards of the superhuman RPG: the cooldown in seconds and (min, max) of the money and xp paid.
+REWARDS = {
+    'adventure': Reward(600, (20, 100), (20, 100)),
+    'mission': Reward(900, (100, 250), (100, 250)),
+    'odyssey': Reward(3600, (250, 750), (250, 750)),
+    'loot': Reward(3600, (250, 250), (250, 250)),
+    'daily': Reward(84600, (500, 500), (500, 500)),
+    'drink': Reward(600, (100, 200), (100, 200)),
+    'duel': Reward(600, (250, 500), (250, 500)),
+    'raffle': Reward(84600, (100, 200), (100, 200)),
+    'battle': Reward(43200, (1000, 1000), (1000, 1000))
+}
+
+# Only one of these runs at a time, and loot and daily can't be claimed during any of them.
+EXPEDITIONS = ('adventure', 'mission', 'odyssey')
+
+GAMBLE_COOLDOWN = 600
+MASTER_COOLDOWN = 900
+
+# The raffle draws a prize uniformly. "Money" pays REWARDS['raffle'], "Level" pays RAFFLE_LEVEL
+# money and xp, and "Master" gives an ability RAFFLE_MASTER xp and points.
+RAFFLE_PRIZES = ('Money', 'Ability', 'Master', 'Level')
+RAFFLE_LEVEL = 2000
+RAFFLE_MASTER = ((10, 100), 100)
@@ -0,0 +1,105 @@
+import asyncio
+import random
+import time
+from collections import OrderedDict
+
+
+class _GuildPool:
+    """The rows of one guild and the positions not drawn yet in this cycle."""
+
+    __slots__ = ('rows', 'remaining')
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.remaining = list(range(len(rows)))
+
+    def draw(self):
+        if not self.rows:
+            return None
+        if not self.remaining:
+            self.remaining = list(range(len(self.rows)))
+
+        index = random.randrange(len(self.remaining))
+        self.remaining[index], self.remaining[-1] = self.remaining[-1], self.remaining[index]
+        return self.rows[self.remaining.pop()]
+
+    def append(self, row):
+        self.remaining.append(len(self.rows))
+        self.rows.append(row)
+
+
+class ContentPool:
+    """Random community content per guild, drawn without replacement.
+
+    A guild's rows are loaded the first time it asks for one and every row is
+    shown once before any repeats. New rows join the current cycle directly,
+    and guilds that weren't used for ``ttl`` seconds, or the least recently
+    used ones past ``max_guilds``, are dropped. The rows are only short links
+    and questions, so they are cached whole rather than as ids.
+    """
+
+    def __init__(self, db, loop, table, column, *, notifier=None, max_guilds=500, ttl=3600):
+        self.db = db
+        self.loop = loop
+        self.table = table
+        self.column = column
+        self.notifier = notifier
+        self.max_guilds = max_guilds
+        self.ttl = ttl
+        self._guilds = OrderedDict()
+        self._used = {}
+        self._pending = {}
+
+    def __len__(self):
+        return len(self._guilds)
+
+    def _evict(self):
+        now = time.monotonic()
+        while self._guilds:
+            guild_id = next(iter(self._guilds))
+            if len(self._guilds) <= self.max_guilds and now - self._used[guild_id] < self.ttl:
+                break
+            self.drop(guild_id)
+
+    async def _load(self, guild_id):
+        async with self.db.acquire() as db:
+            records = await db.fetch(f"SELECT {self.column} FROM {self.table} WHERE guild=$1", guild_id)
+
+        pool = self._guilds[guild_id] = _GuildPool([r[0] for r in records])
+        self._used[guild_id] = time.monotonic()
+        return pool
+
+    async def _get(self, guild_id):
+        pool = self._guilds.get(guild_id)
+        if pool is None:
+            future = self._pending.get(guild_id)
+            if future is None:
+                future = self._pending[guild_id] = self.loop.create_task(self._load(guild_id))
+                future.add_done_callback(lambda f: self._pending.pop(guild_id, None))
+            pool = await asyncio.shield(future)
+
+        self._guilds.move_to_end(guild_id)
+        self._used[guild_id] = time.monotonic()
+        self._evict()
+        return pool
+
+    async def draw(self, guild_id):
+        return (await self._get(guild_id)).draw()
+
+    async def add(self, guild_id, row):
+        async with self.db.acquire() as db:
+            await db.execute(f"INSERT INTO {self.table} ({self.column}, guild) VALUES($1, $2)", row, guild_id)
+
+        self.receive(guild_id, row)
+        if self.notifier is not None:
+            await self.notifier.publish(self.table, guild_id=guild_id, row=row)
+
+    def receive(self, guild_id, row):
+        """Appends a row inserted elsewhere, if the guild is loaded."""
+        pool = self._guilds.get(guild_id)
+        if pool is not None:
+            pool.append(row)
+
+    def drop(self, guild_id):
+        self._guilds.pop(guild_id, None)
+        self._used.pop(guild_id, None)
@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import time
+
+import asyncpg
+from discord.ext.commands.cooldowns import BucketType, Cooldown, CooldownMapping
+
+log = logging.getLogger(__name__)
+
+# Buckets that belong to a single user, which ``CooldownStore.active`` answers for.
+USER_BUCKETS = (BucketType.user, BucketType.member)
+
+# NOTIFY payloads are capped at 8000 bytes, so changes are published this many at a time.
+PUBLISH_CHUNK = 50
+
+
+def _bucket_name(key):
+    """The bucket key of a mapping as text: ``''`` for the global bucket, ids joined by ``:`` otherwise."""
+    if key is None:
+        return ''
+    if isinstance(key, tuple):
+        return ':'.join(str(k) for k in key)
+    return str(key)
+
+
+class StoredCooldown(Cooldown):
+    """A bucket that tells its store whenever it is used or reset."""
+
+    __slots__ = ('store', 'name', 'key', 'user_id')
+
+    def __init__(self, original, store, name, key, user_id):
+        super().__init__(original.rate, original.per, original.type)
+        self.store = store
+        self.name = name
+        self.key = key
+        self.user_id = user_id
+
+    @property
+    def expires(self):
+        return self._window + self.per
+
+    def update_rate_limit(self, *args, **kwargs):
+        retry_after = super().update_rate_limit(*args, **kwargs)
+        if not retry_after:
+            self.store.changed(self)
+        return retry_after
+
+    def reset(self):
+        super().reset()
+        self.store.changed(self)
+
+
+class StoredCooldownMapping(CooldownMapping):
+    """Hands out the store's buckets in place of the mapping's own cache."""
+
+    def __init__(self, original, store, name):
+        super().__init__(original)
+        self.store = store
+        self.name = name
+
+    def copy(self):
+        return StoredCooldownMapping(self._cooldown, self.store, self.name)
+
+    def get_bucket(self, message, *args, **kwargs):
+        user_id = message.author.id if self._cooldown.type in USER_BUCKETS else None
+        return self.store.bucket(self.name, _bucket_name(self._bucket_key(message)), user_id)
+
+
+class CooldownStore:
+    """Command cooldowns kept in Postgres, so they survive restarts and every process shares them.
+
+    Commands keep their ``@commands.cooldown`` decorators; ``attach`` swaps
+    the bucket mapping of those lasting at least ``min_per`` seconds for one
+    backed by this store. Buckets live in memory, indexed by user for
+    ``active``. Changes are written in one statement every ``flush_every``
+    seconds and published to the other processes, which ``apply`` them.
+    """
+
+    def __init__(self, db, notifier, *, flush_every=2, min_per=60):
+        self.db = db
+        self.notifier = notifier
+        self.flush_every = flush_every
+        self.min_per = min_per
+        self._cooldowns = {}
+        self._buckets = {}
+        self._users = {}
+        self._pending = {}
+        self._dirty = set()
+        self._task = None
+
+    def start(self, loop):
+        if self._task is None:
+            self._task = loop.create_task(self._flusher())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    def attach(self, command):
+        """Moves a command's cooldown, and those of its subcommands, into the store."""
+        for cmd in [command, *getattr(command, 'walk_commands', tuple)()]:
+            buckets = cmd._buckets
+            if not buckets.valid or isinstance(buckets, StoredCooldownMapping) or buckets._cooldown.per < self.min_per:
+                continue
+
+            name, cooldown = cmd.qualified_name, buckets._cooldown
+            cmd._buckets = StoredCooldownMapping(cooldown, self, name)
+            old = self._cooldowns.get(name)
+            if old is not None and (old.rate, old.per, old.type) != (cooldown.rate, cooldown.per, cooldown.type):
+                # A reloaded command with a different cooldown starts over.
+                self._forget(name)
+            self._cooldowns[name] = cooldown
+            for row in self._pending.pop(name, ()):
+                self._restore(*row)
+
+    def bucket(self, name, key, user_id=None):
+        bucket = self._buckets.get((name, key))
+        if bucket is None:
+            bucket = self._buckets[name, key] = StoredCooldown(self._cooldowns[name], self, name, key, user_id)
+            if user_id is not None:
+                self._users.setdefault(user_id, {})[name] = bucket
+        return bucket
+
+    def active(self, user_id):
+        """The commands a user is on cooldown for, with the seconds left on each."""
+        current = time.time()
+        return {name: bucket.expires - current for name, bucket in self._users.get(user_id, {}).items()
+                if bucket.get_tokens(current) == 0}
+
+    def changed(self, bucket):
+        self._dirty.add((bucket.name, bucket.key))
+
+    def _restore(self, name, key, user_id, window, tokens):
+        if name not in self._cooldowns:
+            self._pending.setdefault(name, []).append((name, key, user_id, window, tokens))
+            return
+
+        bucket = self.bucket(name, key, user_id)
+        bucket._window = bucket._last = window
+        bucket._tokens = tokens
+
+    def _forget(self, name):
+        for key in [key for key in self._buckets if key[0] == name]:
+            bucket = self._buckets.pop(key)
+            self._users.get(bucket.user_id, {}).pop(name, None)
+
+    def _evict(self):
+        """Drops buckets whose window is over, they behave exactly like new ones."""
+        current = time.time()
+        for key, bucket in list(self._buckets.items()):
+            if key not in self._dirty and current > bucket.expires:
+                del self._buckets[key]
+                user = self._users.get(bucket.user_id)
+                if user is not None and user.get(bucket.name) is bucket:
+                    del user[bucket.name]
+                    if not user:
+                        del self._users[bucket.user_id]
+
+    async def load(self):
+        """Replaces the buckets with the unexpired ones in the database, keeping unwritten changes."""
+        rows = await self.db.fetch("SELECT command, bucket, user_id, window_start, tokens FROM cooldowns "
+                                   "WHERE expires > $1", time.time())
+        self._pending.clear()
+        for name, key, user_id, window, tokens in rows:
+            if (name, key) not in self._dirty:
+                self._restore(name, key, user_id, window, tokens)
+
+    def apply(self, rows):
+        """Notifier handler for changes published by another process."""
+        for name, key, user_id, window, tokens, _ in rows:
+            if (name, key) not in self._dirty:
+                self._restore(name, key, user_id, window, tokens)
+
+    async def flush(self):
+        if not self._dirty:
+            return
+
+        keys, self._dirty = self._dirty, set()
+        rows = [(b.name, b.key, b.user_id, b._window, b._tokens, b.expires)
+                for b in (self._buckets.get(key) for key in keys) if b is not None]
+        if not rows:
+            return
+
+        try:
+            await self.db.execute("""
+                INSERT INTO cooldowns (command, bucket, user_id, window_start, tokens, expires)
+                SELECT * FROM unnest($1::text[], $2::text[], $3::bigint[], $4::float8[], $5::int[], $6::float8[])
+                ON CONFLICT (command, bucket) DO UPDATE
+                SET user_id = excluded.user_id, window_start = excluded.window_start,
+                    tokens = excluded.tokens, expires = excluded.expires
+            """, *map(list, zip(*rows)))
+        except (OSError, asyncpg.PostgresError):
+            log.exception('Could not write %s cooldowns', len(rows))
+            self._dirty |= keys
+            return
+
+        for start in range(0, len(rows), PUBLISH_CHUNK):
+            await self.notifier.publish('cooldowns', rows=rows[start:start + PUBLISH_CHUNK])
+
+    async def prune(self):
+        await self.db.execute("DELETE FROM cooldowns WHERE expires < $1", time.time())
+
+    async def _flusher(self):
+        runs = 0
+        while True:
+            await asyncio.sleep(self.flush_every)
+            runs += 1
+            await self.flush()
+            self._evict()
+            if runs % 1800 == 0:
+                try:
+                    await self.prune()
+                except (OSError, asyncpg.PostgresError):
+                    log.exception('Could not prune cooldowns')
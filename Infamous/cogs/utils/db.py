@@ -0,0 +1,188 @@
+import functools
+import logging
+import re
+import time
+
+import asyncpg
+
+from .metrics import Histogram, current_command, record
+
+log = logging.getLogger(__name__)
+
+# 0.1ms, 0.2ms, 0.4ms ... ~52s, queries are usually well under a millisecond.
+QUERY_BUCKETS = tuple(2 ** i / 10000 for i in range(20))
+
+_literals = re.compile(r"'(?:[^']|'')*'|(?<![$\w])\d+(?:\.\d+)?\b")
+
+
+@functools.lru_cache(maxsize=1024)
+def fingerprint(query):
+    """The query with literals replaced and whitespace collapsed, so the same statement groups together."""
+    return ' '.join(_literals.sub('?', query).split())
+
+
+def _status_rows(status):
+    """Row count of a command status such as ``UPDATE 3`` or ``INSERT 0 1``."""
+    try:
+        return int(status.rsplit(' ', 1)[-1])
+    except (AttributeError, ValueError):
+        return 0
+
+
+_prepared_rows = {
+    'fetch': len,
+    'fetchrow': lambda r: int(r is not None),
+    'fetchval': lambda r: int(r is not None)
+}
+
+
+class QueryStats:
+    __slots__ = ('calls', 'rows', 'latency')
+
+    def __init__(self):
+        self.calls = 0
+        self.rows = 0
+        self.latency = Histogram(QUERY_BUCKETS)
+
+
+class TimedConnection(asyncpg.Connection):
+    """Connection that reports every query to the running command and the owning ``Database``."""
+
+    database = None
+    statements = None
+
+    async def _timed(self, query, coro, rows):
+        start = time.perf_counter()
+        try:
+            result = await coro
+        finally:
+            elapsed = time.perf_counter() - start
+            record('db', elapsed)
+        if self.database is not None:
+            self.database.record_query(query, elapsed, rows(result))
+        return result
+
+    async def execute(self, query, *args, **kwargs):
+        return await self._timed(query, super().execute(query, *args, **kwargs), _status_rows)
+
+    async def executemany(self, command, args, **kwargs):
+        return await self._timed(command, super().executemany(command, args, **kwargs), lambda r: len(args))
+
+    async def fetch(self, query, *args, **kwargs):
+        return await self._timed(query, super().fetch(query, *args, **kwargs), len)
+
+    async def fetchrow(self, query, *args, **kwargs):
+        return await self._timed(query, super().fetchrow(query, *args, **kwargs), lambda r: int(r is not None))
+
+    async def fetchval(self, query, *args, **kwargs):
+        return await self._timed(query, super().fetchval(query, *args, **kwargs), lambda r: 1)
+
+    async def run_prepared(self, name, method, *args):
+        statement = self.statements[name]
+        return await self._timed(statement.get_query(), getattr(statement, method)(*args), _prepared_rows[method])
+
+
+class _Acquire:
+    def __init__(self, database):
+        self.database = database
+        self.pool_acquire = None
+
+    async def __aenter__(self):
+        database = self.database
+        if database.in_use >= database.max_size:
+            database.saturated += 1
+
+        start = time.perf_counter()
+        self.pool_acquire = database.pool.acquire()
+        connection = await self.pool_acquire.__aenter__()
+        database.waits.observe(time.perf_counter() - start)
+
+        database.in_use += 1
+        database.peak_in_use = max(database.peak_in_use, database.in_use)
+        return connection
+
+    async def __aexit__(self, *exc):
+        self.database.in_use -= 1
+        await self.pool_acquire.__aexit__(*exc)
+
+
+class Database:
+    """An asyncpg pool that keeps statistics about the queries going through it.
+
+    Queries are grouped by fingerprint with their call count, rows returned
+    and a latency histogram. Acquiring a connection records how long it took
+    and whether every connection was already in use. Any query slower than
+    ``slow_query`` seconds is logged together with the command that ran it.
+    """
+
+    def __init__(self, pool, *, max_size, slow_query=0.5):
+        self.pool = pool
+        self.max_size = max_size
+        self.slow_query = slow_query
+        self.queries = {}
+        self.waits = Histogram(QUERY_BUCKETS)
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.saturated = 0
+
+    @classmethod
+    async def create(cls, dsn, *, max_size=10, slow_query=0.5, init=None, **kwargs):
+        database = cls(None, max_size=max_size, slow_query=slow_query)
+
+        async def init_(connection):
+            connection.database = database
+            if init is not None:
+                await init(connection)
+
+        database.pool = await asyncpg.create_pool(dsn, max_size=max_size, connection_class=TimedConnection,
+                                                  init=init_, **kwargs)
+        return database
+
+    def record_query(self, query, elapsed, rows):
+        key = fingerprint(query)
+        stats = self.queries.get(key)
+        if stats is None:
+            stats = self.queries[key] = QueryStats()
+
+        stats.calls += 1
+        stats.rows += rows
+        stats.latency.observe(elapsed)
+
+        if elapsed >= self.slow_query:
+            log.warning('Slow query (%.0fms, %s rows) in %s: %s',
+                        elapsed * 1000, rows, current_command() or 'no command', key)
+
+    def top(self, key, limit=10):
+        return sorted(self.queries.items(), key=lambda i: key(i[1]), reverse=True)[:limit]
+
+    def reset(self):
+        self.queries.clear()
+        self.waits = Histogram(QUERY_BUCKETS)
+        self.peak_in_use = self.in_use
+        self.saturated = 0
+
+    def acquire(self):
+        return _Acquire(self)
+
+    async def execute(self, query, *args, timeout=None):
+        async with self.acquire() as connection:
+            return await connection.execute(query, *args, timeout=timeout)
+
+    async def executemany(self, command, args, *, timeout=None):
+        async with self.acquire() as connection:
+            return await connection.executemany(command, args, timeout=timeout)
+
+    async def fetch(self, query, *args, timeout=None):
+        async with self.acquire() as connection:
+            return await connection.fetch(query, *args, timeout=timeout)
+
+    async def fetchrow(self, query, *args, timeout=None):
+        async with self.acquire() as connection:
+            return await connection.fetchrow(query, *args, timeout=timeout)
+
+    async def fetchval(self, query, *args, column=0, timeout=None):
+        async with self.acquire() as connection:
+            return await connection.fetchval(query, *args, column=column, timeout=timeout)
+
+    async def close(self):
+        await self.pool.close()
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+
+import asyncpg
+from discord.ext import commands
+
+from . import ledger as accounts
+from .rpg_tools import merge as merge_names
+
+log = logging.getLogger(__name__)
+
+
+class EconomyError(commands.CommandError):
+    """An economy operation that didn't go through, with a message meant for the user."""
+
+
+class InsufficientFunds(EconomyError):
+    def __init__(self, needed):
+        self.needed = needed
+        super().__init__(f"You need ${needed} more.")
+
+
+class AlreadyOwned(EconomyError):
+    def __init__(self, name):
+        super().__init__(f"You already have **{name}**.")
+
+
+class NotOwned(EconomyError):
+    def __init__(self, name):
+        super().__init__(f"You don't have **{name}**.")
+
+
+class Busy(EconomyError):
+    def __init__(self):
+        super().__init__("Another transaction of yours is still going through, try again in a moment.")
+
+
+class AlreadyApplied(EconomyError):
+    def __init__(self):
+        super().__init__("This has already been done.")
+
+
+class Economy:
+    """Balance and inventory changes, each as one short transaction.
+
+    The rows involved are locked up front (``NOWAIT``) or changed with a
+    guarded UPDATE such as ``WHERE bal >= $2``, and ``lock_timeout`` bounds
+    any other wait, so contention raises ``Busy`` rather than holding a pool
+    connection. Every operation takes a key, the id of the invoking message,
+    and a key that was already applied raises ``AlreadyApplied``.
+    Committed changes are recorded in ``ledger``.
+    """
+
+    def __init__(self, db, *, ledger=None, lock_timeout=2000, keep_keys=86400):
+        self.db = db
+        self.ledger = ledger
+        self.lock_timeout = lock_timeout
+        self.keep_keys = keep_keys
+        self._task = None
+
+    def start(self, loop):
+        if self._task is None:
+            self._task = loop.create_task(self._prune())
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _prune(self):
+        while True:
+            try:
+                await self.db.execute("DELETE FROM economy_operations WHERE created_at < now() - $1 * interval '1s'",
+                                      float(self.keep_keys))
+            except (OSError, asyncpg.PostgresError):
+                log.exception('Could not prune economy operation keys')
+            await asyncio.sleep(3600)
+
+    def _record(self, user_id, account, reason, money):
+        if self.ledger is not None:
+            self.ledger.record(user_id, account, reason, money=money)
+
+    async def _run(self, key, user_id, operation, body):
+        """Runs ``body(connection)`` in a transaction that first claims the key."""
+        async with self.db.acquire() as connection:
+            try:
+                async with connection.transaction():
+                    await connection.execute(f"SET LOCAL lock_timeout = {int(self.lock_timeout)}")
+                    claimed = await connection.fetchval("""
+                        INSERT INTO economy_operations (key, user_id, operation) VALUES($1, $2, $3)
+                        ON CONFLICT DO NOTHING RETURNING true
+                    """, key, user_id, operation)
+                    if not claimed:
+                        raise AlreadyApplied()
+                    return await body(connection)
+            except asyncpg.exceptions.LockNotAvailableError:
+                raise Busy()
+
+    @staticmethod
+    async def _charge(connection, table, user_id, amount):
+        """Takes ``amount`` if the balance covers it, returning the new balance."""
+        bal = await connection.fetchval(f"UPDATE {table} SET bal = bal - $2 WHERE id=$1 AND bal >= $2 RETURNING bal",
+                                        user_id, amount)
+        if bal is None:
+            current = await connection.fetchval(f"SELECT bal FROM {table} WHERE id=$1", user_id)
+            raise InsufficientFunds(amount - (current or 0))
+        return bal
+
+    async def acquire_ability(self, key, user_id, ability, price, damage, durability):
+        """Buys a superhuman ability, returning the new balance."""
+        async def body(connection):
+            bal = await self._charge(connection, 'profiles', user_id, price)
+            # The charge locked the profile, so no other purchase of theirs can insert in between.
+            if await connection.fetchval("SELECT 1 FROM abilities WHERE id=$1 AND ability=$2", user_id, ability):
+                raise AlreadyOwned(ability)
+            await connection.execute("INSERT INTO abilities VALUES($1, $2, $3, $4, $5, $6)",
+                                     user_id, ability, 1, 0, damage, durability)
+            return bal
+
+        bal = await self._run(key, user_id, 'acquire', body)
+        self._record(user_id, accounts.PROFILE, 'purchase', -price)
+        return bal
+
+    async def master_ability(self, key, user_id, ability, price):
+        """Pays for mastering an owned superhuman ability, returning the new balance."""
+        async def body(connection):
+            if not await connection.fetchval("SELECT 1 FROM abilities WHERE id=$1 AND ability=$2", user_id, ability):
+                raise NotOwned(ability)
+            return await self._charge(connection, 'profiles', user_id, price)
+
+        bal = await self._run(key, user_id, 'master', body)
+        self._record(user_id, accounts.PROFILE, 'master', -price)
+        return bal
+
+    async def gamble(self, key, user_id, amount, won):
+        """Wins or loses ``amount`` if the balance covers it, returning the new balance."""
+        async def body(connection):
+            bal = await connection.fetchval("""
+                UPDATE profiles SET bal = bal + CASE WHEN $3 THEN $2 ELSE -$2 END
+                WHERE id=$1 AND bal >= $2 RETURNING bal
+            """, user_id, amount, won)
+            if bal is None:
+                current = await connection.fetchval("SELECT bal FROM profiles WHERE id=$1", user_id)
+                raise InsufficientFunds(amount - (current or 0))
+            return bal
+
+        bal = await self._run(key, user_id, 'gamble', body)
+        self._record(user_id, accounts.PROFILE, 'gamble', amount if won else -amount)
+        return bal
+
+    async def buy_item(self, key, user_id, item):
+        """Buys an RPG shop item into the inventory, returning the new balance."""
+        async def body(connection):
+            bal = await self._charge(connection, 'rpg_profile', user_id, item['price'])
+            if await connection.fetchval("SELECT 1 FROM rpg_inventory WHERE owner=$1 AND name=$2",
+                                         user_id, item['name']):
+                raise AlreadyOwned(item['name'])
+            await connection.execute("INSERT INTO rpg_inventory VALUES($1, $2, $3, $4, $5, $6, $7, $8, $9)",
+                                     item['name'], item['type'], item['price'], item['damage'], item['defense'],
+                                     item['skill'], item['description'], user_id, 0)
+            return bal
+
+        bal = await self._run(key, user_id, 'buy', body)
+        self._record(user_id, accounts.RPG, 'purchase', -item['price'])
+        return bal
+
+    async def sell_item(self, key, user_id, name):
+        """Sells an inventory item for its price, unequipping it, and returns what it paid."""
+        async def body(connection):
+            await connection.execute("SELECT 1 FROM rpg_profile WHERE id=$1 FOR UPDATE NOWAIT", user_id)
+            sold = await connection.fetch("DELETE FROM rpg_inventory WHERE owner=$1 AND name=$2 RETURNING price",
+                                          user_id, name)
+            if not sold:
+                raise NotOwned(name)
+
+            paid = sum(item['price'] for item in sold)
+            await connection.execute("""
+                UPDATE rpg_profile SET bal = bal + $2, equipped = CASE WHEN equipped = $3 THEN NULL ELSE equipped END
+                WHERE id=$1
+            """, user_id, paid, name)
+            return paid
+
+        paid = await self._run(key, user_id, 'sell', body)
+        self._record(user_id, accounts.RPG, 'sale', paid)
+        return paid
+
+    async def merge_items(self, key, user_id, first, second):
+        """Merges two inventory items for the sum of their prices, returning the new item."""
+        async def body(connection):
+            await connection.execute("SELECT 1 FROM rpg_profile WHERE id=$1 FOR UPDATE NOWAIT", user_id)
+            rows = {row['name']: row for row in await connection.fetch(
+                "DELETE FROM rpg_inventory WHERE owner=$1 AND name = ANY($2) RETURNING *", user_id, [first, second])}
+            for name in (first, second):
+                if name not in rows:
+                    raise NotOwned(name)
+
+            a, b = rows[first], rows[second]
+            merged = (merge_names(first, second).title(), a['type'], a['price'] + b['price'],
+                      a['damage'] + b['damage'], a['defense'] + b['defense'], a['skill'],
+                      merge_names(a['description'], b['description']).title(), user_id, 0)
+            await self._charge(connection, 'rpg_profile', user_id, merged[2])
+            await connection.execute("INSERT INTO rpg_inventory VALUES($1, $2, $3, $4, $5, $6, $7, $8, $9)", *merged)
+            return merged
+
+        merged = await self._run(key, user_id, 'merge', body)
+        self._record(user_id, accounts.RPG, 'merge', -merged[2])
+        return merged
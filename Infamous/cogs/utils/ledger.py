@@ -0,0 +1,187 @@
+import asyncio
+import datetime
+import logging
+
+import asyncpg
+
+from .constants import RAFFLE_LEVEL, REWARDS
+from .metrics import current_command
+
+log = logging.getLogger(__name__)
+
+# What a ledger entry changed: the superhuman profile, one of its abilities, its guild,
+# the RPG profile or one of its skill masteries. Only the profiles hold money.
+PROFILE = 'profile'
+ABILITY = 'ability'
+GUILD = 'guild'
+RPG = 'rpg'
+MASTERY = 'mastery'
+
+COLUMNS = ('user_id', 'account', 'money', 'xp', 'reason', 'command', 'created_at')
+
+# Held while rolling up so the cluster's workers don't all redo the same days.
+ROLLUP_LOCK_ID = 0x1F4A8
+
+DAY = 86400
+
+# Rewards on a per-user cooldown: (claims, most money per claim) possible in a (UTC) day. Duels,
+# drinks and battles are on channel or global cooldowns, so anyone can win them any number of times.
+REWARD_LIMITS = {name: ((DAY - 1) // REWARDS[name].cooldown + 1, REWARDS[name].money[1])
+                 for name in ('adventure', 'mission', 'odyssey', 'loot', 'daily', 'raffle')}
+REWARD_LIMITS['raffle'] = (REWARD_LIMITS['raffle'][0], max(REWARDS['raffle'].money[1], RAFFLE_LEVEL))
+
+
+class Ledger:
+    """Append-only record of every balance and xp change.
+
+    ``record`` only appends to a buffer, which is written with COPY every
+    ``flush_every`` seconds or once it holds ``batch_size`` entries, so paying
+    a reward costs no extra round trip. ``rollup`` folds the ledger into
+    per-user daily totals (``economy_daily``) that the owner commands read.
+    """
+
+    def __init__(self, db, *, flush_every=5, batch_size=500, max_backlog=50000, rollup_every=300):
+        self.db = db
+        self.flush_every = flush_every
+        self.batch_size = batch_size
+        self.max_backlog = max_backlog
+        self.rollup_every = rollup_every
+        self.dropped = 0
+        self._buffer = []
+        self._full = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._closing = False
+        self._tasks = []
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def start(self, loop):
+        if not self._tasks:
+            self._tasks = [loop.create_task(self._flusher()), loop.create_task(self._roller())]
+
+    async def close(self):
+        # The flusher is stopped rather than cancelled, so a COPY it is in the middle of
+        # either lands or puts its batch back before the last flush.
+        self._closing = True
+        self._full.set()
+        if self._tasks:
+            flusher, roller = self._tasks
+            roller.cancel()
+            await asyncio.wait([flusher])
+            self._tasks = []
+        await self.flush()
+
+    def record(self, user_id, account, reason, *, money=0, xp=0, command=None):
+        """Buffers one change, attributed to the running command unless ``command`` is given."""
+        if not money and not xp:
+            return
+
+        self._buffer.append((user_id, account, money, xp, reason, command or current_command(),
+                             datetime.datetime.utcnow()))
+        if len(self._buffer) >= self.batch_size:
+            self._full.set()
+
+    async def flush(self):
+        async with self._lock:
+            batch, self._buffer = self._buffer, []
+            self._full.clear()
+            if not batch:
+                return
+
+            try:
+                async with self.db.acquire() as connection:
+                    await connection.copy_records_to_table('economy_ledger', records=batch, columns=COLUMNS)
+            except (OSError, asyncpg.PostgresError):
+                log.exception('Could not write %s ledger entries', len(batch))
+                # Keep them for the next flush, dropping the oldest if the database stays away.
+                self._buffer = batch + self._buffer
+                overflow = len(self._buffer) - self.max_backlog
+                if overflow > 0:
+                    del self._buffer[:overflow]
+                    self.dropped += overflow
+                    log.warning('Dropped %s ledger entries, %s so far', overflow, self.dropped)
+
+    async def _flusher(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_every)
+            except asyncio.TimeoutError:
+                pass
+            if not self._closing:
+                await self.flush()
+
+    async def _roller(self):
+        while True:
+            await asyncio.sleep(self.rollup_every)
+            try:
+                await self.rollup()
+            except (OSError, asyncpg.PostgresError):
+                log.exception('Could not roll up the ledger')
+
+    async def rollup(self, since=None):
+        """Recomputes the daily totals of every day from ``since`` (by default yesterday) on.
+
+        Whole days are recomputed from the ledger rather than added to, so
+        running it twice, or on two workers, gives the same totals.
+        """
+        if since is None:
+            since = datetime.datetime.utcnow().date() - datetime.timedelta(days=1)
+
+        async with self.db.acquire() as connection:
+            async with connection.transaction():
+                if not await connection.fetchval("SELECT pg_try_advisory_xact_lock($1)", ROLLUP_LOCK_ID):
+                    return False
+
+                await connection.execute("""
+                    INSERT INTO economy_daily (day, user_id, account, reason, command, earned, spent, xp, entries)
+                    SELECT created_at::date, user_id, account, reason, coalesce(command, ''),
+                           sum(GREATEST(money, 0)), sum(GREATEST(-money, 0)), sum(xp), count(*)
+                    FROM economy_ledger
+                    WHERE created_at >= $1
+                    GROUP BY 1, 2, 3, 4, 5
+                    ON CONFLICT (day, user_id, account, reason, command) DO UPDATE
+                    SET earned = excluded.earned, spent = excluded.spent, xp = excluded.xp, entries = excluded.entries
+                """, datetime.datetime.combine(since, datetime.time()))
+        return True
+
+    async def top_earners(self, day, account=PROFILE, limit=10):
+        """Users who earned the most money on ``day``, with what they spent and how many entries it took."""
+        return await self.db.fetch("""
+            SELECT user_id, sum(earned) AS earned, sum(spent) AS spent, sum(entries) AS entries
+            FROM economy_daily
+            WHERE day = $1 AND account = $2
+            GROUP BY user_id
+            ORDER BY earned DESC
+            LIMIT $3
+        """, day, account, limit)
+
+    async def exploits(self, day, limit=10):
+        """Signs of an exploit on ``day``.
+
+        Rewards claimed more often than their cooldown allows or paying out
+        more than their maximum (a bypassed cooldown or a double payout), and
+        balances that went negative (spending money that wasn't there).
+        """
+        names = list(REWARD_LIMITS)
+        claims = await self.db.fetch("""
+            SELECT d.user_id, d.command, sum(d.entries) AS entries, sum(d.earned) AS earned,
+                   l.entries AS max_entries, l.entries * l.money AS max_earned
+            FROM economy_daily d
+            JOIN unnest($2::text[], $3::bigint[], $4::bigint[]) AS l (command, entries, money)
+                ON l.command = d.command
+            WHERE d.day = $1 AND d.account = 'profile' AND d.reason = 'reward'
+            GROUP BY d.user_id, d.command, l.entries, l.money
+            HAVING sum(d.entries) > l.entries OR sum(d.earned) > l.entries * l.money
+            ORDER BY sum(d.earned) DESC
+            LIMIT $5
+        """, day, names, [REWARD_LIMITS[n][0] for n in names], [REWARD_LIMITS[n][1] for n in names], limit)
+
+        negative = await self.db.fetch("""
+            SELECT id AS user_id, 'profile' AS account, bal FROM profiles WHERE bal < 0
+            UNION ALL
+            SELECT id, 'rpg', bal FROM rpg_profile WHERE bal < 0
+            ORDER BY bal
+            LIMIT $1
+        """, limit)
+        return claims, negative
@@ -0,0 +1,108 @@
+import random
+
+
+class _Pool:
+    """Member ids kept in a list plus an id -> position map for O(1) add, discard and choice."""
+
+    __slots__ = ('ids', 'positions')
+
+    def __init__(self):
+        self.ids = []
+        self.positions = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, member_id):
+        if member_id not in self.positions:
+            self.positions[member_id] = len(self.ids)
+            self.ids.append(member_id)
+
+    def discard(self, member_id):
+        index = self.positions.pop(member_id, None)
+        if index is None:
+            return
+
+        last = self.ids.pop()
+        if index < len(self.ids):
+            self.ids[index] = last
+            self.positions[last] = index
+
+    def choice(self):
+        return random.choice(self.ids)
+
+
+class MemberIndex:
+    """Per-guild index of human members that can be sampled uniformly in O(1).
+
+    A guild is indexed the first time it is sampled and is then kept up to
+    date from member join, leave and update events.
+    """
+
+    filters = {
+        'avatar': lambda m: m.avatar is not None
+    }
+
+    def __init__(self):
+        self._guilds = {}
+
+    def _place(self, pools, member):
+        if member.bot:
+            return
+
+        pools[None].add(member.id)
+        for name, predicate in self.filters.items():
+            if predicate(member):
+                pools[name].add(member.id)
+            else:
+                pools[name].discard(member.id)
+
+    def build(self, guild):
+        pools = {None: _Pool()}
+        for name in self.filters:
+            pools[name] = _Pool()
+
+        for member in guild.members:
+            self._place(pools, member)
+
+        self._guilds[guild.id] = pools
+        return pools
+
+    def add(self, member):
+        pools = self._guilds.get(member.guild.id)
+        if pools is not None:
+            self._place(pools, member)
+
+    def remove(self, member):
+        pools = self._guilds.get(member.guild.id)
+        if pools is not None:
+            for pool in pools.values():
+                pool.discard(member.id)
+
+    def update(self, before, after):
+        if before.avatar != after.avatar:
+            self.add(after)
+
+    def drop(self, guild):
+        self._guilds.pop(guild.id, None)
+
+    def count(self, guild, filter_=None):
+        pools = self._guilds.get(guild.id) or self.build(guild)
+        return len(pools[filter_])
+
+    def sample(self, guild, filter_=None):
+        """Returns a random human member, optionally one matching a named filter.
+
+        Falls back to any human member when nobody matches the filter.
+        """
+        pools = self._guilds.get(guild.id) or self.build(guild)
+        pool = pools[filter_]
+        if not pool:
+            pool = pools[None]
+
+        while pool:
+            member_id = pool.choice()
+            member = guild.get_member(member_id)
+            if member is not None:
+                return member
+            pool.discard(member_id)
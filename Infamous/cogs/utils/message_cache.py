@@ -0,0 +1,107 @@
+import sys
+import zlib
+from collections import OrderedDict
+
+
+class CachedMessage:
+    """The handful of message fields the bot actually reads."""
+
+    __slots__ = ('id', 'author_id', 'channel_id', 'content_hash', 'content')
+
+    def __init__(self, id, author_id, channel_id, content, store_content=True):
+        self.id = id
+        self.author_id = author_id
+        self.channel_id = channel_id
+        self.content_hash = zlib.crc32(content.encode())
+        self.content = content if store_content else None
+
+    @classmethod
+    def from_message(cls, message, store_content=True):
+        return cls(message.id, message.author.id, message.channel.id, message.content, store_content)
+
+    @property
+    def size(self):
+        size = sys.getsizeof(self)
+        if self.content is not None:
+            size += sys.getsizeof(self.content)
+        return size
+
+    def changed(self, content):
+        return zlib.crc32(content.encode()) != self.content_hash
+
+
+class MessageCache:
+    """Compact message cache bounded by a byte budget and a per-channel cap.
+
+    Messages are evicted oldest first, from the channel when it exceeds
+    ``per_channel`` and globally when the total exceeds ``max_bytes``.
+    """
+
+    def __init__(self, *, max_bytes=8 * 1024 ** 2, per_channel=200, store_content=True):
+        self.max_bytes = max_bytes
+        self.per_channel = per_channel
+        self.store_content = store_content
+        self.bytes = 0
+        self._channels = {}
+        self._order = OrderedDict()
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, message_id):
+        return message_id in self._order
+
+    def get(self, message_id):
+        channel_id = self._order.get(message_id)
+        if channel_id is not None:
+            return self._channels[channel_id][message_id]
+
+    def add(self, message):
+        if message.id in self._order:
+            self.remove(message.id)
+
+        cached = CachedMessage.from_message(message, self.store_content)
+        channel = self._channels.setdefault(cached.channel_id, OrderedDict())
+        channel[cached.id] = cached
+        self._order[cached.id] = cached.channel_id
+        self.bytes += cached.size
+
+        if len(channel) > self.per_channel:
+            self.remove(next(iter(channel)))
+
+        while self.bytes > self.max_bytes and self._order:
+            self.remove(next(iter(self._order)))
+
+        return cached
+
+    def update(self, message_id, content):
+        cached = self.get(message_id)
+        if cached is None:
+            return
+
+        self.bytes -= cached.size
+        cached.content_hash = zlib.crc32(content.encode())
+        if self.store_content:
+            cached.content = content
+        self.bytes += cached.size
+        return cached
+
+    def remove(self, message_id):
+        channel_id = self._order.pop(message_id, None)
+        if channel_id is None:
+            return
+
+        channel = self._channels[channel_id]
+        cached = channel.pop(message_id)
+        self.bytes -= cached.size
+        if not channel:
+            del self._channels[channel_id]
+
+    def remove_channel(self, channel_id):
+        for message_id in list(self._channels.get(channel_id, ())):
+            self.remove(message_id)
+
+    def history(self, channel_id, limit=None):
+        """Cached messages of a channel, newest first."""
+        messages = list(reversed(self._channels.get(channel_id, {}).values()))
+        return messages[:limit] if limit is not None else messages
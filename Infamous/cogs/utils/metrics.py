@@ -0,0 +1,193 @@
+import asyncio
+import bisect
+import time
+import weakref
+from contextlib import contextmanager
+
+from aiohttp import TraceConfig, web
+from discord.ext import commands
+
+# Upper bounds in seconds of the latency buckets: 1ms, 2ms, 4ms ... ~65s.
+BUCKETS = tuple(2 ** i / 1000 for i in range(17))
+COMPONENTS = ('db', 'http', 'send')
+
+# Task -> timings of the command it is running, so the database, HTTP and
+# send wrappers can charge their time to the command without passing ctx around.
+_timings = weakref.WeakKeyDictionary()
+_current_task = getattr(asyncio, 'current_task', None) or asyncio.Task.current_task
+
+
+def record(component, seconds):
+    """Adds time spent in a component to the command running in the current task."""
+    task = _current_task()
+    timing = _timings.get(task) if task is not None else None
+    if timing is not None:
+        timing[component] += seconds
+
+
+def current_command():
+    """Qualified name of the command running in the current task, if any."""
+    task = _current_task()
+    timing = _timings.get(task) if task is not None else None
+    return timing['command'] if timing is not None else None
+
+
+@contextmanager
+def timed(component):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(component, time.perf_counter() - start)
+
+
+class Histogram:
+    """Log-bucketed histogram, each bucket is twice as wide as the previous one."""
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum')
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q):
+        """The upper bound of the bucket holding the q-th quantile."""
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def cumulative(self):
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            yield bound, seen
+
+
+class CommandStats:
+    __slots__ = ('calls', 'errors', 'latency', 'components')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency = Histogram()
+        self.components = dict.fromkeys(COMPONENTS, 0.0)
+
+
+class Metrics:
+    """Per-command call counts, error counts and latency histograms.
+
+    ``start`` and ``finish`` are meant for the bot's before and after invoke
+    hooks. Time spent in the database, in HTTP requests and in sending
+    messages is reported through ``record`` and broken out per command.
+    """
+
+    def __init__(self):
+        self.commands = {}
+        self._server = None
+
+    def start(self, ctx):
+        ctx.timing = dict.fromkeys(COMPONENTS, 0.0)
+        ctx.timing['start'] = time.perf_counter()
+        ctx.timing['command'] = ctx.command.qualified_name
+        task = _current_task()
+        if task is not None:
+            _timings[task] = ctx.timing
+
+    def finish(self, ctx):
+        timing = getattr(ctx, 'timing', None)
+        if timing is None:
+            return
+
+        task = _current_task()
+        if task is not None and _timings.get(task) is timing:
+            del _timings[task]
+
+        stats = self.commands.get(ctx.command.qualified_name)
+        if stats is None:
+            stats = self.commands[ctx.command.qualified_name] = CommandStats()
+
+        stats.calls += 1
+        if ctx.command_failed:
+            stats.errors += 1
+        stats.latency.observe(time.perf_counter() - timing['start'])
+        for component in COMPONENTS:
+            stats.components[component] += timing[component]
+
+    def top(self, key, limit=10):
+        return sorted(self.commands.items(), key=lambda i: key(i[1]), reverse=True)[:limit]
+
+    def exposition(self):
+        """Renders the metrics in the Prometheus text format."""
+        lines = ['# TYPE infamous_command_calls_total counter',
+                 '# TYPE infamous_command_errors_total counter',
+                 '# TYPE infamous_command_component_seconds_total counter',
+                 '# TYPE infamous_command_duration_seconds histogram']
+        for name, stats in sorted(self.commands.items()):
+            label = f'command="{name}"'
+            lines.append(f'infamous_command_calls_total{{{label}}} {stats.calls}')
+            lines.append(f'infamous_command_errors_total{{{label}}} {stats.errors}')
+            for component, seconds in stats.components.items():
+                lines.append(f'infamous_command_component_seconds_total{{{label},component="{component}"}} {seconds}')
+            for bound, count in stats.latency.cumulative():
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'infamous_command_duration_seconds_bucket{{{label},le="{le}"}} {count}')
+            lines.append(f'infamous_command_duration_seconds_sum{{{label}}} {stats.latency.sum}')
+            lines.append(f'infamous_command_duration_seconds_count{{{label}}} {stats.latency.count}')
+        return '\n'.join(lines) + '\n'
+
+    async def serve(self, port, host='127.0.0.1'):
+        """Serves ``/metrics`` on localhost for a Prometheus scraper."""
+        async def handler(request):
+            return web.Response(text=self.exposition())
+
+        app = web.Application()
+        app.router.add_get('/metrics', handler)
+        self._server = web.AppRunner(app)
+        await self._server.setup()
+        await web.TCPSite(self._server, host, port).start()
+
+    async def close(self):
+        if self._server is not None:
+            await self._server.cleanup()
+            self._server = None
+
+
+class TimedContext(commands.Context):
+    """Context whose ``send`` counts towards the command's Discord time."""
+
+    async def send(self, *args, **kwargs):
+        with timed('send'):
+            return await super().send(*args, **kwargs)
+
+
+def trace_config():
+    """aiohttp trace hooks that count requests towards the command's HTTP time."""
+    async def on_request_start(session, context, params):
+        context.start = time.perf_counter()
+
+    async def on_request_end(session, context, params):
+        record('http', time.perf_counter() - context.start)
+
+    config = TraceConfig()
+    config.on_request_start.append(on_request_start)
+    config.on_request_end.append(on_request_end)
+    config.on_request_exception.append(on_request_end)
+    return config
@@ -0,0 +1,574 @@
+import logging
+
+log = logging.getLogger(__name__)
+
+# Held while migrating so the cluster's workers don't migrate concurrently.
+LOCK_ID = 0x1F4A7
+
+# (version, name, sql). Applied migrations are never edited, add a new one instead.
+MIGRATIONS = [
+    (1, 'baseline tables', """
+    CREATE TABLE IF NOT EXISTS settings (
+        guild BIGINT PRIMARY KEY,
+        prefix TEXT,
+        disabled TEXT,
+        alerts BOOLEAN
+    );
+
+    CREATE TABLE IF NOT EXISTS blocked (
+        id BIGINT PRIMARY KEY,
+        reason TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS profiles (
+        id BIGINT PRIMARY KEY,
+        level INTEGER NOT NULL DEFAULT 1,
+        xp INTEGER NOT NULL DEFAULT 0,
+        bal INTEGER NOT NULL DEFAULT 0,
+        main_ability TEXT,
+        guild TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS abilities (
+        id BIGINT NOT NULL,
+        ability TEXT NOT NULL,
+        level INTEGER NOT NULL DEFAULT 1,
+        xp INTEGER NOT NULL DEFAULT 0,
+        damage INTEGER NOT NULL DEFAULT 0,
+        durability INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (id, ability)
+    );
+
+    CREATE TABLE IF NOT EXISTS guilds (
+        guild TEXT PRIMARY KEY,
+        leader BIGINT NOT NULL,
+        level INTEGER NOT NULL DEFAULT 1,
+        xp INTEGER NOT NULL DEFAULT 0,
+        icon TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS rpg_profile (
+        id BIGINT PRIMARY KEY,
+        class TEXT,
+        level INTEGER NOT NULL DEFAULT 1,
+        xp INTEGER NOT NULL DEFAULT 0,
+        bal INTEGER NOT NULL DEFAULT 0,
+        skill TEXT,
+        equipped TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS rpg_mastery (
+        id BIGINT NOT NULL,
+        skill TEXT NOT NULL,
+        level INTEGER NOT NULL DEFAULT 1,
+        xp INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (id, skill)
+    );
+
+    CREATE TABLE IF NOT EXISTS rpg_shop (
+        name TEXT PRIMARY KEY,
+        type TEXT,
+        price INTEGER,
+        damage INTEGER,
+        defense INTEGER,
+        skill TEXT,
+        description TEXT,
+        level INTEGER
+    );
+
+    CREATE TABLE IF NOT EXISTS rpg_inventory (
+        name TEXT NOT NULL,
+        type TEXT,
+        price INTEGER,
+        damage INTEGER,
+        defense INTEGER,
+        skill TEXT,
+        description TEXT,
+        owner BIGINT NOT NULL,
+        upgrades INTEGER NOT NULL DEFAULT 0
+    );
+
+    CREATE TABLE IF NOT EXISTS rpg_quests (
+        quest TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS rpg_duels (
+        id BIGINT PRIMARY KEY,
+        wins INTEGER NOT NULL DEFAULT 0,
+        losses INTEGER NOT NULL DEFAULT 0
+    );
+
+    CREATE TABLE IF NOT EXISTS wiki (
+        name TEXT NOT NULL,
+        quote TEXT,
+        aliases TEXT,
+        bio TEXT,
+        roles TEXT,
+        games TEXT,
+        color TEXT,
+        image TEXT,
+        creator BIGINT,
+        contributors TEXT,
+        creation_date TEXT,
+        last_modified TEXT,
+        views INTEGER NOT NULL DEFAULT 0,
+        guild_id BIGINT NOT NULL,
+        PRIMARY KEY (guild_id, name)
+    );
+
+    CREATE TABLE IF NOT EXISTS quotes (
+        quote TEXT,
+        guild BIGINT
+    );
+
+    CREATE TABLE IF NOT EXISTS questions (
+        question TEXT,
+        guild BIGINT
+    );
+    """),
+
+    (2, 'scoped disabled commands', """
+    CREATE TABLE IF NOT EXISTS disabled_commands (
+        guild BIGINT NOT NULL,
+        command TEXT NOT NULL,
+        scope TEXT NOT NULL,
+        target BIGINT NOT NULL,
+        PRIMARY KEY (guild, command, scope, target)
+    );
+
+    INSERT INTO disabled_commands (guild, command, scope, target)
+    SELECT guild, trim(name), 'guild', guild
+    FROM settings, unnest(string_to_array(disabled, ',')) AS name
+    WHERE disabled IS NOT NULL AND trim(name) != ''
+    ON CONFLICT DO NOTHING;
+
+    UPDATE settings SET disabled = NULL WHERE disabled IS NOT NULL;
+    """),
+
+    (3, 'multiple prefixes', """
+    ALTER TABLE settings ADD COLUMN IF NOT EXISTS prefixes TEXT[];
+
+    UPDATE settings SET prefixes = ARRAY[prefix], prefix = NULL WHERE prefix IS NOT NULL;
+    """),
+
+    # Tables created before the baseline have no keys. Duplicate or NULL
+    # rows make adding one fail, in which case a plain index is created
+    # instead and the check mode keeps reporting the missing key.
+    (4, 'primary keys for pre-existing tables', """
+    DO $$
+    DECLARE
+        k record;
+    BEGIN
+        FOR k IN SELECT * FROM (VALUES
+            ('settings', 'guild'),
+            ('blocked', 'id'),
+            ('profiles', 'id'),
+            ('abilities', 'id, ability'),
+            ('guilds', 'guild'),
+            ('rpg_profile', 'id'),
+            ('rpg_mastery', 'id, skill'),
+            ('rpg_shop', 'name'),
+            ('rpg_duels', 'id'),
+            ('wiki', 'guild_id, name')
+        ) AS keys (tbl, cols) LOOP
+            CONTINUE WHEN EXISTS (SELECT 1 FROM pg_index WHERE indrelid = k.tbl::regclass AND indisprimary);
+            BEGIN
+                EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (%s)', k.tbl, k.cols);
+            EXCEPTION WHEN unique_violation OR not_null_violation THEN
+                RAISE WARNING 'could not add a primary key to %: %', k.tbl, SQLERRM;
+                EXECUTE format('CREATE INDEX IF NOT EXISTS %I ON %I (%s)',
+                               k.tbl || '_' || replace(k.cols, ', ', '_') || '_idx', k.tbl, k.cols);
+            END;
+        END LOOP;
+    END
+    $$;
+    """),
+
+    (5, 'indexes for hot lookups', """
+    CREATE INDEX IF NOT EXISTS profiles_guild_idx ON profiles (guild);
+    CREATE INDEX IF NOT EXISTS rpg_inventory_owner_name_idx ON rpg_inventory (owner, name);
+    CREATE INDEX IF NOT EXISTS quotes_guild_idx ON quotes (guild);
+    CREATE INDEX IF NOT EXISTS questions_guild_idx ON questions (guild);
+    """),
+
+    # Keys of applied economy operations, so a retried command can't pay or charge twice.
+    (6, 'economy operation keys', """
+    CREATE TABLE IF NOT EXISTS economy_operations (
+        key BIGINT PRIMARY KEY,
+        user_id BIGINT NOT NULL,
+        operation TEXT NOT NULL,
+        created_at TIMESTAMP NOT NULL DEFAULT now()
+    );
+
+    CREATE INDEX IF NOT EXISTS economy_operations_created_at_idx ON economy_operations (created_at);
+    """),
+
+    # Rows only ever arrive in time order, so a BRIN index keeps range scans cheap at a fraction of the size.
+    (7, 'economy ledger', """
+    CREATE TABLE IF NOT EXISTS economy_ledger (
+        user_id BIGINT NOT NULL,
+        account TEXT NOT NULL,
+        money BIGINT NOT NULL DEFAULT 0,
+        xp BIGINT NOT NULL DEFAULT 0,
+        reason TEXT NOT NULL,
+        command TEXT,
+        created_at TIMESTAMP NOT NULL
+    );
+
+    CREATE INDEX IF NOT EXISTS economy_ledger_created_at_idx ON economy_ledger USING brin (created_at);
+
+    CREATE TABLE IF NOT EXISTS economy_daily (
+        day DATE NOT NULL,
+        user_id BIGINT NOT NULL,
+        account TEXT NOT NULL,
+        reason TEXT NOT NULL,
+        command TEXT NOT NULL,
+        earned BIGINT NOT NULL DEFAULT 0,
+        spent BIGINT NOT NULL DEFAULT 0,
+        xp BIGINT NOT NULL DEFAULT 0,
+        entries INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, user_id, account, reason, command)
+    );
+    """),
+
+    # Times are epoch seconds, as discord.py's cooldown buckets keep them.
+    (8, 'command cooldowns', """
+    CREATE TABLE IF NOT EXISTS cooldowns (
+        command TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        user_id BIGINT,
+        window_start DOUBLE PRECISION NOT NULL,
+        tokens INTEGER NOT NULL,
+        expires DOUBLE PRECISION NOT NULL,
+        PRIMARY KEY (command, bucket)
+    );
+
+    CREATE INDEX IF NOT EXISTS cooldowns_expires_idx ON cooldowns (expires);
+    """),
+
+    # Member aggregates of every guild, kept by triggers in the same transaction as the change to a
+    # profile or ability, so every write path (join, leave, rewards, purchases, unregister) is covered.
+    # A member's power is the damage and durability of all their abilities.
+    (9, 'guild stats', """
+    CREATE INDEX IF NOT EXISTS profiles_guild_xp_idx ON profiles (guild, xp DESC);
+
+    CREATE TABLE IF NOT EXISTS guild_stats (
+        guild TEXT PRIMARY KEY,
+        members INTEGER NOT NULL DEFAULT 0,
+        xp BIGINT NOT NULL DEFAULT 0,
+        power BIGINT NOT NULL DEFAULT 0,
+        top_members BIGINT[] NOT NULL DEFAULT '{}',
+        top_cutoff INTEGER NOT NULL DEFAULT 0
+    );
+
+    CREATE OR REPLACE FUNCTION guild_stats_top(g TEXT) RETURNS void AS $$
+        UPDATE guild_stats s SET top_members = t.ids, top_cutoff = t.cutoff
+        FROM (SELECT coalesce(array_agg(id ORDER BY xp DESC, id), '{}') AS ids, coalesce(min(xp), 0) AS cutoff
+              FROM (SELECT id, xp FROM profiles WHERE guild = g ORDER BY xp DESC, id LIMIT 5) top) t
+        WHERE s.guild = g;
+    $$ LANGUAGE sql;
+
+    CREATE OR REPLACE FUNCTION guild_stats_member_power(user_id BIGINT) RETURNS BIGINT AS $$
+        SELECT coalesce(sum(damage + durability), 0)::bigint FROM abilities WHERE id = user_id;
+    $$ LANGUAGE sql STABLE;
+
+    -- OLD and NEW are only read in the branch of the operation that has them.
+    CREATE OR REPLACE FUNCTION guild_stats_profile() RETURNS trigger AS $$
+    DECLARE
+        s guild_stats%ROWTYPE;
+        member_id BIGINT;
+        left_guild TEXT;
+        joined_guild TEXT;
+        old_xp INTEGER := 0;
+        new_xp INTEGER := 0;
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            member_id := NEW.id;
+            joined_guild := NEW.guild;
+            new_xp := NEW.xp;
+        ELSIF TG_OP = 'DELETE' THEN
+            member_id := OLD.id;
+            left_guild := OLD.guild;
+            old_xp := OLD.xp;
+        ELSIF NEW.guild IS DISTINCT FROM OLD.guild THEN
+            member_id := NEW.id;
+            left_guild := OLD.guild;
+            joined_guild := NEW.guild;
+            old_xp := OLD.xp;
+            new_xp := NEW.xp;
+        ELSIF NEW.guild IS NOT NULL AND NEW.xp <> OLD.xp THEN
+            UPDATE guild_stats SET xp = xp + NEW.xp - OLD.xp WHERE guild = NEW.guild RETURNING * INTO s;
+            -- Only a member who is, or now belongs, in the top five can change it.
+            IF FOUND AND (NEW.id = ANY(s.top_members) OR NEW.xp >= s.top_cutoff
+                          OR cardinality(s.top_members) < 5) THEN
+                PERFORM guild_stats_top(NEW.guild);
+            END IF;
+            RETURN NULL;
+        END IF;
+
+        IF left_guild IS NOT NULL THEN
+            UPDATE guild_stats SET members = members - 1, xp = xp - old_xp,
+                                   power = power - guild_stats_member_power(member_id)
+            WHERE guild = left_guild RETURNING * INTO s;
+            IF FOUND AND member_id = ANY(s.top_members) THEN
+                PERFORM guild_stats_top(left_guild);
+            END IF;
+        END IF;
+
+        IF joined_guild IS NOT NULL THEN
+            UPDATE guild_stats SET members = members + 1, xp = xp + new_xp,
+                                   power = power + guild_stats_member_power(member_id)
+            WHERE guild = joined_guild RETURNING * INTO s;
+            IF FOUND AND (new_xp >= s.top_cutoff OR cardinality(s.top_members) < 5) THEN
+                PERFORM guild_stats_top(joined_guild);
+            END IF;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION guild_stats_ability() RETURNS trigger AS $$
+    DECLARE
+        member_id BIGINT;
+        delta BIGINT;
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            member_id := NEW.id;
+            delta := NEW.damage + NEW.durability;
+        ELSIF TG_OP = 'DELETE' THEN
+            member_id := OLD.id;
+            delta := -(OLD.damage + OLD.durability);
+        ELSE
+            member_id := NEW.id;
+            delta := (NEW.damage + NEW.durability) - (OLD.damage + OLD.durability);
+        END IF;
+
+        IF delta <> 0 THEN
+            UPDATE guild_stats s SET power = s.power + delta
+            FROM profiles p WHERE p.id = member_id AND s.guild = p.guild;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION guild_stats_guild() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            DELETE FROM guild_stats WHERE guild = OLD.guild;
+        ELSE
+            INSERT INTO guild_stats (guild, members, xp, power)
+            SELECT NEW.guild, count(*), coalesce(sum(xp), 0), coalesce(sum(guild_stats_member_power(id)), 0)
+            FROM profiles WHERE guild = NEW.guild
+            ON CONFLICT (guild) DO NOTHING;
+            PERFORM guild_stats_top(NEW.guild);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS guild_stats_profile ON profiles;
+    CREATE TRIGGER guild_stats_profile AFTER INSERT OR DELETE OR UPDATE OF guild, xp ON profiles
+        FOR EACH ROW EXECUTE PROCEDURE guild_stats_profile();
+
+    DROP TRIGGER IF EXISTS guild_stats_ability ON abilities;
+    CREATE TRIGGER guild_stats_ability AFTER INSERT OR DELETE OR UPDATE OF damage, durability ON abilities
+        FOR EACH ROW EXECUTE PROCEDURE guild_stats_ability();
+
+    DROP TRIGGER IF EXISTS guild_stats_guild ON guilds;
+    CREATE TRIGGER guild_stats_guild AFTER INSERT OR DELETE ON guilds
+        FOR EACH ROW EXECUTE PROCEDURE guild_stats_guild();
+
+    INSERT INTO guild_stats (guild, members, xp, power)
+    SELECT g.guild, count(p.id), coalesce(sum(p.xp), 0), coalesce(sum(guild_stats_member_power(p.id)), 0)
+    FROM guilds g LEFT JOIN profiles p ON p.guild = g.guild
+    GROUP BY g.guild
+    ON CONFLICT (guild) DO NOTHING;
+
+    SELECT guild_stats_top(guild) FROM guild_stats;
+
+    CREATE INDEX IF NOT EXISTS guild_stats_xp_idx ON guild_stats (xp DESC);
+    CREATE INDEX IF NOT EXISTS guild_stats_power_idx ON guild_stats (power DESC);
+    CREATE INDEX IF NOT EXISTS guild_stats_members_idx ON guild_stats (members DESC);
+    """),
+
+    # guild top pages through guilds in this order; the name breaks ties so every page is stable.
+    (10, 'guild ranking', """
+    CREATE INDEX IF NOT EXISTS guilds_rank_idx ON guilds (level DESC, xp DESC, guild);
+    """),
+
+    # A profile's version goes up with every change to it or to its abilities, whatever wrote it,
+    # so a rendered profile card is current exactly as long as the version it was drawn at.
+    (11, 'profile versions', """
+    ALTER TABLE profiles ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 0;
+
+    CREATE OR REPLACE FUNCTION profile_version_bump() RETURNS trigger AS $$
+    BEGIN
+        IF NEW.version = OLD.version AND NEW IS DISTINCT FROM OLD THEN
+            NEW.version := OLD.version + 1;
+        END IF;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION profile_version_ability() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            UPDATE profiles SET version = version + 1 WHERE id = OLD.id;
+        ELSE
+            UPDATE profiles SET version = version + 1 WHERE id = NEW.id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS profile_version ON profiles;
+    CREATE TRIGGER profile_version BEFORE UPDATE ON profiles
+        FOR EACH ROW EXECUTE PROCEDURE profile_version_bump();
+
+    DROP TRIGGER IF EXISTS profile_version ON abilities;
+    CREATE TRIGGER profile_version AFTER INSERT OR DELETE OR UPDATE ON abilities
+        FOR EACH ROW EXECUTE PROCEDURE profile_version_ability();
+    """),
+]
+
+# What the live database should look like after every migration ran.
+EXPECTED = {
+    'settings': {'columns': {'guild': 'bigint', 'prefix': 'text', 'disabled': 'text', 'alerts': 'boolean',
+                             'prefixes': 'ARRAY'},
+                 'primary_key': ('guild',)},
+    'blocked': {'columns': {'id': 'bigint', 'reason': 'text'}, 'primary_key': ('id',)},
+    'disabled_commands': {'columns': {'guild': 'bigint', 'command': 'text', 'scope': 'text', 'target': 'bigint'},
+                          'primary_key': ('guild', 'command', 'scope', 'target')},
+    'profiles': {'columns': {'id': 'bigint', 'level': 'integer', 'xp': 'integer', 'bal': 'integer',
+                             'main_ability': 'text', 'guild': 'text', 'version': 'integer'},
+                 'primary_key': ('id',),
+                 'indexes': [('guild',), ('guild', 'xp')]},
+    'abilities': {'columns': {'id': 'bigint', 'ability': 'text', 'level': 'integer', 'xp': 'integer',
+                              'damage': 'integer', 'durability': 'integer'},
+                  'primary_key': ('id', 'ability')},
+    'guilds': {'columns': {'guild': 'text', 'leader': 'bigint', 'level': 'integer', 'xp': 'integer', 'icon': 'text'},
+               'primary_key': ('guild',),
+               'indexes': [('level', 'xp', 'guild')]},
+    'rpg_profile': {'columns': {'id': 'bigint', 'class': 'text', 'level': 'integer', 'xp': 'integer',
+                                'bal': 'integer', 'skill': 'text', 'equipped': 'text'},
+                    'primary_key': ('id',)},
+    'rpg_mastery': {'columns': {'id': 'bigint', 'skill': 'text', 'level': 'integer', 'xp': 'integer'},
+                    'primary_key': ('id', 'skill')},
+    'rpg_shop': {'columns': {'name': 'text', 'type': 'text', 'price': 'integer', 'damage': 'integer',
+                             'defense': 'integer', 'skill': 'text', 'description': 'text', 'level': 'integer'},
+                 'primary_key': ('name',)},
+    'rpg_inventory': {'columns': {'name': 'text', 'type': 'text', 'price': 'integer', 'damage': 'integer',
+                                  'defense': 'integer', 'skill': 'text', 'description': 'text', 'owner': 'bigint',
+                                  'upgrades': 'integer'},
+                      'indexes': [('owner', 'name')]},
+    'rpg_quests': {'columns': {'quest': 'text'}},
+    'rpg_duels': {'columns': {'id': 'bigint', 'wins': 'integer', 'losses': 'integer'}, 'primary_key': ('id',)},
+    'wiki': {'columns': {'name': 'text', 'quote': 'text', 'aliases': 'text', 'bio': 'text', 'roles': 'text',
+                         'games': 'text', 'color': 'text', 'image': 'text', 'creator': 'bigint',
+                         'contributors': 'text', 'creation_date': 'text', 'last_modified': 'text',
+                         'views': 'integer', 'guild_id': 'bigint'},
+             'primary_key': ('guild_id', 'name')},
+    'quotes': {'columns': {'quote': 'text', 'guild': 'bigint'}, 'indexes': [('guild',)]},
+    'questions': {'columns': {'question': 'text', 'guild': 'bigint'}, 'indexes': [('guild',)]},
+    'economy_operations': {'columns': {'key': 'bigint', 'user_id': 'bigint', 'operation': 'text',
+                                       'created_at': 'timestamp without time zone'},
+                           'primary_key': ('key',),
+                           'indexes': [('created_at',)]},
+    'economy_ledger': {'columns': {'user_id': 'bigint', 'account': 'text', 'money': 'bigint', 'xp': 'bigint',
+                                   'reason': 'text', 'command': 'text',
+                                   'created_at': 'timestamp without time zone'},
+                       'indexes': [('created_at',)]},
+    'economy_daily': {'columns': {'day': 'date', 'user_id': 'bigint', 'account': 'text', 'reason': 'text',
+                                  'command': 'text', 'earned': 'bigint', 'spent': 'bigint', 'xp': 'bigint',
+                                  'entries': 'integer'},
+                      'primary_key': ('day', 'user_id', 'account', 'reason', 'command')},
+    'cooldowns': {'columns': {'command': 'text', 'bucket': 'text', 'user_id': 'bigint',
+                              'window_start': 'double precision', 'tokens': 'integer', 'expires': 'double precision'},
+                  'primary_key': ('command', 'bucket'),
+                  'indexes': [('expires',)]},
+    'guild_stats': {'columns': {'guild': 'text', 'members': 'integer', 'xp': 'bigint', 'power': 'bigint',
+                                'top_members': 'ARRAY', 'top_cutoff': 'integer'},
+                    'primary_key': ('guild',),
+                    'indexes': [('xp',), ('power',), ('members',)]},
+}
+
+
+async def current_version(connection):
+    await connection.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT now()
+        )
+    """)
+    return await connection.fetchval("SELECT coalesce(max(version), 0) FROM schema_migrations")
+
+
+async def migrate(connection):
+    """Applies every migration newer than the database, each in its own transaction."""
+    await connection.execute("SELECT pg_advisory_lock($1)", LOCK_ID)
+    try:
+        version = await current_version(connection)
+        for number, name, sql in MIGRATIONS:
+            if number <= version:
+                continue
+
+            async with connection.transaction():
+                await connection.execute(sql)
+                await connection.execute("INSERT INTO schema_migrations (version, name) VALUES($1, $2)",
+                                         number, name)
+            log.info('Applied migration %s: %s', number, name)
+    finally:
+        await connection.execute("SELECT pg_advisory_unlock($1)", LOCK_ID)
+
+
+async def check(connection):
+    """Compares the live database with ``EXPECTED``, returning a list of problems."""
+    problems = []
+
+    version = await current_version(connection)
+    if version < MIGRATIONS[-1][0]:
+        problems.append(f'schema is at version {version}, latest is {MIGRATIONS[-1][0]}')
+
+    columns = {}
+    for record in await connection.fetch("SELECT table_name, column_name, data_type FROM information_schema.columns "
+                                         "WHERE table_schema = current_schema()"):
+        columns.setdefault(record['table_name'], {})[record['column_name']] = record['data_type']
+
+    # Key columns of every index, in order, and whether it is the primary key.
+    indexes = {}
+    for record in await connection.fetch("""
+        SELECT t.relname AS table_name, i.indisprimary AS is_primary,
+               array_agg(a.attname::text ORDER BY k.n) AS columns
+        FROM pg_index i
+        JOIN pg_class t ON t.oid = i.indrelid
+        JOIN pg_namespace s ON s.oid = t.relnamespace AND s.nspname = current_schema()
+        CROSS JOIN LATERAL unnest(i.indkey::smallint[]) WITH ORDINALITY AS k(attnum, n)
+        JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = k.attnum
+        GROUP BY t.relname, i.indexrelid, i.indisprimary
+    """):
+        indexes.setdefault(record['table_name'], []).append((tuple(record['columns']), record['is_primary']))
+
+    for table, expected in EXPECTED.items():
+        live = columns.get(table)
+        if live is None:
+            problems.append(f'{table}: table is missing')
+            continue
+
+        for column, type_ in expected['columns'].items():
+            if column not in live:
+                problems.append(f'{table}.{column}: column is missing')
+            elif live[column] != type_:
+                problems.append(f'{table}.{column}: expected {type_}, found {live[column]}')
+
+        table_indexes = indexes.get(table, [])
+        key = expected.get('primary_key')
+        if key and (key, True) not in table_indexes:
+            problems.append(f'{table}: primary key ({", ".join(key)}) is missing')
+
+        for wanted in expected.get('indexes', ()):
+            # Any index whose leading columns match serves the lookup.
+            if not any(cols[:len(wanted)] == wanted for cols, _ in table_indexes):
+                problems.append(f'{table}: no index on ({", ".join(wanted)})')
+
+    return problems
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+
+import asyncpg
+
+log = logging.getLogger(__name__)
+
+
+class Notifier:
+    """Keeps in-process caches coherent across bot processes with LISTEN/NOTIFY.
+
+    Writers call ``publish`` after committing a change; every other process
+    receives it on a dedicated listening connection and runs the handler
+    registered for that kind. Notifications sent while the listener was
+    disconnected are lost, so the resync handlers run after every
+    (re)connect to rebuild the caches from the database.
+    """
+
+    def __init__(self, dsn, db, loop, *, channel='infamous_cache', interval=15):
+        self.dsn = dsn
+        self.db = db
+        self.loop = loop
+        self.channel = channel
+        self.interval = interval
+        self.origin = f'{socket.gethostname()}:{os.getpid()}'
+        self.handlers = {}
+        self.resync_handlers = []
+        self._conn = None
+        self._task = None
+
+    def register(self, kind, handler):
+        self.handlers[kind] = handler
+
+    def unregister(self, kind):
+        self.handlers.pop(kind, None)
+
+    def on_resync(self, handler):
+        self.resync_handlers.append(handler)
+
+    async def publish(self, kind, **data):
+        data.update(origin=self.origin, kind=kind)
+        await self.db.execute("SELECT pg_notify($1, $2)", self.channel, json.dumps(data))
+
+    def _receive(self, connection, pid, channel, payload):
+        data = json.loads(payload)
+        if data.pop('origin') == self.origin:
+            return
+
+        handler = self.handlers.get(data.pop('kind'))
+        if handler is not None:
+            result = handler(**data)
+            if asyncio.iscoroutine(result):
+                self.loop.create_task(result)
+
+    def start(self):
+        if self._task is None:
+            self._task = self.loop.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._conn is not None and not self._conn.is_closed():
+            await self._conn.close()
+
+    async def _run(self):
+        while True:
+            try:
+                self._conn = await asyncpg.connect(self.dsn)
+                await self._conn.add_listener(self.channel, self._receive)
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError):
+                await asyncio.sleep(self.interval)
+                continue
+
+            # One failed reload mustn't end the listener, or no notification would arrive again.
+            for handler in self.resync_handlers:
+                try:
+                    await handler()
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    log.exception('Resync handler %r failed', handler)
+
+            while True:
+                await asyncio.sleep(self.interval)
+                try:
+                    await self._conn.execute("SELECT 1")
+                except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError):
+                    break
+
+            if not self._conn.is_closed():
+                self._conn.terminate()
@@ -0,0 +1,79 @@
+import math
+
+
+class Curve:
+    """Cumulative xp needed to reach each level, with its inverse in closed form.
+
+    The SQL versions let a grant compute the new level in the same UPDATE
+    that adds the xp, so a big reward reaches every level it pays for at once.
+    """
+
+    def threshold(self, level):
+        raise NotImplementedError
+
+    def level(self, total):
+        raise NotImplementedError
+
+    def sql_threshold(self, level):
+        raise NotImplementedError
+
+    def sql_level(self, total):
+        raise NotImplementedError
+
+    def to_next(self, level, total):
+        """Xp still missing to go from ``level`` to the next one."""
+        return self.threshold(level + 1) - total
+
+
+class Linear(Curve):
+    """Every level costs ``step`` xp."""
+
+    def __init__(self, step):
+        self.step = step
+
+    def threshold(self, level):
+        return self.step * (level - 1)
+
+    def level(self, total):
+        return max(total, 0) // self.step + 1
+
+    def sql_threshold(self, level):
+        return f"({self.step} * (({level}) - 1))"
+
+    def sql_level(self, total):
+        return f"(GREATEST({total}, 0) / {self.step} + 1)"
+
+
+class Triangular(Curve):
+    """Level ``n`` costs ``step * n`` xp, so the thresholds grow quadratically."""
+
+    def __init__(self, step):
+        self.step = step
+
+    def threshold(self, level):
+        return self.step * level * (level - 1) // 2
+
+    def level(self, total):
+        level = int((1 + math.sqrt(1 + 8 * max(total, 0) / self.step)) / 2)
+        # The float square root can land one off for very large totals.
+        while self.threshold(level + 1) <= total:
+            level += 1
+        while level > 1 and self.threshold(level) > total:
+            level -= 1
+        return level
+
+    def sql_threshold(self, level):
+        return f"({self.step} * ({level}) * (({level}) - 1) / 2)"
+
+    def sql_level(self, total):
+        return f"floor((1 + sqrt(1 + 8.0 * GREATEST({total}, 0) / {self.step})) / 2)::int"
+
+
+# Superhuman profiles, abilities and guilds level up every 2000 xp, which is never reset.
+PROFILE = Linear(2000)
+ABILITY = Linear(2000)
+GUILD = Linear(2000)
+
+# RPG profiles and skill masteries need 50 xp times their level, counted from the last level up.
+RPG = Triangular(50)
+MASTERY = Triangular(50)
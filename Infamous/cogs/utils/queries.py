@@ -0,0 +1,226 @@
+import json
+from typing import List, Optional, Tuple
+
+from asyncpg import Record
+
+from .db import Database
+from .progression import ABILITY, GUILD, MASTERY, PROFILE, RPG
+
+# Every hot statement, prepared on each pool connection when it is opened.
+STATEMENTS = {
+    'settings': "SELECT * FROM settings WHERE guild=$1",
+    'disabled_commands': "SELECT * FROM disabled_commands WHERE guild=$1",
+
+    'profile': "SELECT * FROM profiles WHERE id=$1",
+    'profile_guild': "SELECT guild FROM profiles WHERE id=$1",
+    'profile_full': "SELECT p.*, coalesce((SELECT json_agg(json_build_object('ability', a.ability, 'level', a.level, "
+                    "'xp', a.xp, 'damage', a.damage, 'durability', a.durability) ORDER BY a.level DESC, a.ability) "
+                    "FROM abilities a WHERE a.id = p.id), '[]') AS abilities FROM profiles p WHERE p.id=$1",
+    'add_balance': "UPDATE profiles SET bal = bal + $2 WHERE id=$1 RETURNING bal",
+    'grant_profile': "WITH prev AS (SELECT level FROM profiles WHERE id=$1 FOR UPDATE) "
+                     "UPDATE profiles SET bal = bal + $2, xp = xp + $3, "
+                     f"level = GREATEST(level, {PROFILE.sql_level('xp + $3')}) "
+                     "WHERE id=$1 RETURNING (SELECT level FROM prev) AS old_level, level, xp",
+    'abilities': "SELECT * FROM abilities WHERE id=$1",
+    'ability': "SELECT * FROM abilities WHERE id=$1 AND ability=$2",
+    'grant_ability': "WITH prev AS (SELECT level FROM abilities WHERE id=$1 AND ability=$2 FOR UPDATE) "
+                     "UPDATE abilities SET xp = xp + $3, damage = damage + $4, durability = durability + $5, "
+                     f"level = GREATEST(level, {ABILITY.sql_level('xp + $3')}) "
+                     "WHERE id=$1 AND ability=$2 RETURNING (SELECT level FROM prev) AS old_level, level, xp",
+    'duel_abilities': "SELECT * FROM abilities WHERE (id=$1 AND ability = ANY($2)) OR (id=$3 AND ability = ANY($4))",
+    'guild': "SELECT * FROM guilds WHERE guild=$1",
+    'guild_leader': "SELECT leader FROM guilds WHERE guild=$1",
+    'guild_summary': "SELECT g.*, s.members, s.xp AS member_xp, s.power, s.top_members "
+                     "FROM guilds g LEFT JOIN guild_stats s ON s.guild = g.guild WHERE g.guild=$1",
+    'pay_guild': "WITH prev AS (SELECT id, level FROM profiles WHERE guild=$1 FOR UPDATE) "
+                 "UPDATE profiles p SET bal = p.bal + $2, xp = p.xp + $3, "
+                 f"level = GREATEST(p.level, {PROFILE.sql_level('p.xp + $3')}) "
+                 "FROM prev WHERE p.id = prev.id RETURNING p.id, prev.level AS old_level, p.level, p.xp",
+    'guild_ranking': "SELECT guild, leader, level, xp FROM guilds ORDER BY level DESC, xp DESC, guild LIMIT $1",
+    'grant_guild': "WITH prev AS (SELECT g.guild, g.level FROM guilds g JOIN profiles p ON p.guild = g.guild "
+                   "WHERE p.id=$1 FOR UPDATE OF g) "
+                   f"UPDATE guilds g SET xp = g.xp + $2, level = GREATEST(g.level, {GUILD.sql_level('g.xp + $2')}) "
+                   "FROM prev WHERE g.guild = prev.guild RETURNING g.guild, prev.level AS old_level, g.level, g.xp",
+
+    'rpg_profile': "SELECT * FROM rpg_profile WHERE id=$1",
+    'rpg_profile_full': "SELECT p.*, coalesce((SELECT json_agg(json_build_object('skill', m.skill, 'level', m.level) "
+                        "ORDER BY m.skill) FROM rpg_mastery m WHERE m.id = p.id), '[]') AS skills, "
+                        "coalesce((SELECT array_agg(i.name ORDER BY i.name) FROM rpg_inventory i "
+                        "WHERE i.owner = p.id), '{}') AS inventory FROM rpg_profile p WHERE p.id=$1",
+    'rpg_add_balance': "UPDATE rpg_profile SET bal = bal + $2 WHERE id=$1 RETURNING bal",
+    'grant_rpg': f"WITH prev AS (SELECT level, {RPG.sql_threshold('level')} + xp + $2 AS total "
+                 "FROM rpg_profile WHERE id=$1 FOR UPDATE), "
+                 f"reached AS (SELECT level AS old_level, total, {RPG.sql_level('total')} AS level FROM prev) "
+                 "UPDATE rpg_profile p SET level = reached.level, "
+                 f"xp = reached.total - {RPG.sql_threshold('reached.level')}, "
+                 "bal = p.bal + CASE WHEN reached.level > reached.old_level THEN $3 ELSE 0 END "
+                 "FROM reached WHERE p.id=$1 RETURNING reached.old_level, p.level, p.xp",
+    'rpg_skills': "SELECT * FROM rpg_mastery WHERE id=$1",
+    'rpg_mastery': "SELECT * FROM rpg_mastery WHERE id=$1 AND skill=$2",
+    'grant_mastery': f"WITH prev AS (SELECT level, {MASTERY.sql_threshold('level')} + xp + $3 AS total "
+                     "FROM rpg_mastery WHERE id=$1 AND skill=$2 FOR UPDATE), "
+                     f"reached AS (SELECT level AS old_level, total, {MASTERY.sql_level('total')} AS level FROM prev), "
+                     "mastery AS (UPDATE rpg_mastery m SET level = reached.level, "
+                     f"xp = reached.total - {MASTERY.sql_threshold('reached.level')} "
+                     "FROM reached WHERE m.id=$1 AND m.skill=$2 RETURNING reached.old_level, m.level, m.xp), "
+                     "paid AS (UPDATE rpg_profile SET bal = bal + $4 "
+                     "WHERE id=$1 AND EXISTS (SELECT 1 FROM mastery WHERE level > old_level)) "
+                     "SELECT * FROM mastery",
+    'rpg_duels': "SELECT * FROM rpg_duels WHERE id=$1",
+    'rpg_equipped': "SELECT i.* FROM rpg_profile p JOIN rpg_inventory i ON i.owner = p.id AND i.name = p.equipped "
+                    "WHERE p.id = ANY($1)",
+
+    'wiki_page': "SELECT * FROM wiki WHERE guild_id=$1 AND name=$2",
+    'wiki_view': "UPDATE wiki SET views = views + 1 WHERE guild_id=$1 AND name=$2 RETURNING views",
+}
+
+
+async def prepare(connection):
+    """Pool ``init`` callback."""
+    connection.statements = {name: await connection.prepare(query) for name, query in STATEMENTS.items()}
+
+
+async def _run(db, name, method, *args):
+    """Runs a statement on a pool, acquiring a connection, or on an already acquired connection."""
+    if isinstance(db, Database):
+        async with db.acquire() as connection:
+            return await connection.run_prepared(name, method, *args)
+    return await db.run_prepared(name, method, *args)
+
+
+async def settings(db, guild_id: int) -> Optional[Record]:
+    return await _run(db, 'settings', 'fetchrow', guild_id)
+
+
+async def disabled_commands(db, guild_id: int) -> List[Record]:
+    return await _run(db, 'disabled_commands', 'fetch', guild_id)
+
+
+async def profile(db, user_id: int) -> Optional[Record]:
+    return await _run(db, 'profile', 'fetchrow', user_id)
+
+
+async def profile_guild(db, user_id: int) -> Optional[str]:
+    return await _run(db, 'profile_guild', 'fetchval', user_id)
+
+
+async def add_balance(db, user_id: int, amount: int) -> Optional[int]:
+    """Adds (or with a negative amount removes) money, returning the new balance."""
+    return await _run(db, 'add_balance', 'fetchval', user_id, amount)
+
+
+async def profile_full(db, user_id: int) -> Tuple[Optional[Record], List[dict]]:
+    """A profile and its abilities, highest level first, in one query."""
+    row = await _run(db, 'profile_full', 'fetchrow', user_id)
+    if row is None:
+        return None, []
+    return row, json.loads(row['abilities'])
+
+
+async def grant_profile(db, user_id: int, money: int, xp: int) -> Optional[Record]:
+    """Pays money and xp, levelling up as far as the total xp reaches.
+
+    Returns ``old_level``, ``level`` and the total ``xp``.
+    """
+    return await _run(db, 'grant_profile', 'fetchrow', user_id, money, xp)
+
+
+async def abilities(db, user_id: int) -> List[Record]:
+    return await _run(db, 'abilities', 'fetch', user_id)
+
+
+async def ability(db, user_id: int, name: str) -> Optional[Record]:
+    return await _run(db, 'ability', 'fetchrow', user_id, name)
+
+
+async def grant_ability(db, user_id: int, name: str, xp: int, damage: int, durability: int) -> Optional[Record]:
+    return await _run(db, 'grant_ability', 'fetchrow', user_id, name, xp, damage, durability)
+
+
+async def duel_abilities(db, user1: int, abilities1: List[str], user2: int, abilities2: List[str]) -> List[Record]:
+    """The chosen abilities of both duelists in one query."""
+    return await _run(db, 'duel_abilities', 'fetch', user1, abilities1, user2, abilities2)
+
+
+async def guild(db, name: str) -> Optional[Record]:
+    return await _run(db, 'guild', 'fetchrow', name)
+
+
+async def guild_leader(db, name: str) -> Optional[int]:
+    return await _run(db, 'guild_leader', 'fetchval', name)
+
+
+async def guild_summary(db, name: str) -> Optional[Record]:
+    """A guild with the member aggregates kept in ``guild_stats``."""
+    return await _run(db, 'guild_summary', 'fetchrow', name)
+
+
+async def pay_guild(db, name: str, money: int, xp: int) -> List[Record]:
+    """Pays every member of a guild in one statement, with the same levelling as ``grant_profile``.
+
+    Returns ``id``, ``old_level``, ``level`` and the total ``xp`` of each member.
+    """
+    return await _run(db, 'pay_guild', 'fetch', name, money, xp)
+
+
+async def guild_ranking(db, limit: int) -> List[Record]:
+    return await _run(db, 'guild_ranking', 'fetch', limit)
+
+
+async def grant_guild(db, user_id: int, xp: int) -> Optional[Record]:
+    """Adds xp to the guild of a user, returning nothing if they aren't in one."""
+    return await _run(db, 'grant_guild', 'fetchrow', user_id, xp)
+
+
+async def rpg_profile(db, user_id: int) -> Optional[Record]:
+    return await _run(db, 'rpg_profile', 'fetchrow', user_id)
+
+
+async def rpg_profile_full(db, user_id: int) -> Tuple[Optional[Record], List[dict], List[str]]:
+    """An RPG profile with its skill masteries and the names in its inventory, in one query."""
+    row = await _run(db, 'rpg_profile_full', 'fetchrow', user_id)
+    if row is None:
+        return None, [], []
+    return row, json.loads(row['skills']), list(row['inventory'])
+
+
+async def rpg_add_balance(db, user_id: int, amount: int) -> Optional[int]:
+    return await _run(db, 'rpg_add_balance', 'fetchval', user_id, amount)
+
+
+async def grant_rpg(db, user_id: int, xp: int, money: int) -> Optional[Record]:
+    """Adds xp and levels up as far as it reaches, paying ``money`` if it did.
+
+    Returns ``old_level``, ``level`` and the ``xp`` left towards the next level.
+    """
+    return await _run(db, 'grant_rpg', 'fetchrow', user_id, xp, money)
+
+
+async def rpg_skills(db, user_id: int) -> List[Record]:
+    return await _run(db, 'rpg_skills', 'fetch', user_id)
+
+
+async def rpg_mastery(db, user_id: int, skill: str) -> Optional[Record]:
+    return await _run(db, 'rpg_mastery', 'fetchrow', user_id, skill)
+
+
+async def grant_mastery(db, user_id: int, skill: str, xp: int, money: int) -> Optional[Record]:
+    """Like ``grant_rpg`` for a skill mastery, the money going to the RPG profile."""
+    return await _run(db, 'grant_mastery', 'fetchrow', user_id, skill, xp, money)
+
+
+async def rpg_duels(db, user_id: int) -> Optional[Record]:
+    return await _run(db, 'rpg_duels', 'fetchrow', user_id)
+
+
+async def rpg_equipped(db, user_ids: List[int]) -> List[Record]:
+    """The equipped inventory item of each user, with ``owner`` telling them apart."""
+    return await _run(db, 'rpg_equipped', 'fetch', user_ids)
+
+
+async def wiki_page(db, guild_id: int, name: str) -> Optional[Record]:
+    return await _run(db, 'wiki_page', 'fetchrow', guild_id, name)
+
+
+async def wiki_view(db, guild_id: int, name: str) -> Optional[int]:
+    return await _run(db, 'wiki_view', 'fetchval', guild_id, name)
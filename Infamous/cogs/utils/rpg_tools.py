@@ -2,123 +2,55 @@ import asyncio
 
 import discord
 
-embed_color = 0x101010
-
-
-async def lvl(ctx, mon, msg1, msg2, user=None):
-    if not user:
-        user = ctx.author.id
-
-    async with ctx.bot.db.acquire() as db:
-        lvl_ = await db.fetchrow(
-            "SELECT * FROM rpg_profile WHERE id=$1", user)
-
-    if lvl_['xp'] >= lvl_['level'] * 50:
-        await ctx.send(
-            msg1
-        )
-        async with ctx.bot.db.acquire() as db:
-            await db.execute(
-                "UPDATE rpg_profile SET level = $1 WHERE id=$2",
-                lvl_['level'] + 1, user
-            )
-
-            await db.execute(
-                "UPDATE rpg_profile SET xp = 0 WHERE id=$1",
-                user
-            )
-
-            await db.execute(
-                "UPDATE rpg_profile SET bal = bal + $1 WHERE id=$2",
-                mon, user
-            )
-    else:
-        await ctx.send(msg2)
+from . import ledger, progression, queries
 
-
-async def mastery_lvl(ctx, mon, skill, msg1, msg2, user=None):
-    if not user:
-        user = ctx.author.id
-
-    async with ctx.bot.db.acquire() as db:
-        lvl_ = await db.fetchrow(
-            "SELECT * FROM rpg_mastery WHERE id=$1 AND skill=$2", user, skill)
-
-    if lvl_['xp'] >= lvl_['level'] * 50:
-        await ctx.send(
-            msg1
-        )
-        async with ctx.bot.db.acquire() as db:
-            await db.execute(
-                "UPDATE rpg_mastery SET level = $1 WHERE id=$2 AND skill=$3",
-                lvl_['level'] + 1, user, skill
-            )
-
-            await db.execute(
-                "UPDATE rpg_mastery SET xp = 0 WHERE id=$1 AND skill=$2",
-                user, skill
-            )
-
-            await db.execute(
-                "UPDATE rpg_profile SET bal = bal + $1 WHERE id=$2",
-                mon, user
-            )
-    else:
-        await ctx.send(msg2)
+embed_color = 0x101010
 
 
-async def add_xp(ctx, xp, user=None):
+async def lvl(ctx, mon, xp, msg1, msg2, user=None):
+    """Grants RPG xp, sending ``msg1`` and paying ``mon`` if it levels up and ``msg2`` otherwise."""
     if not user:
         user = ctx.author.id
 
-    async with ctx.bot.db.acquire() as db:
-        await db.execute(
-            "UPDATE rpg_profile SET xp = xp + $1 WHERE id = $2",
-            xp, user
-        )
+    grant = await queries.grant_rpg(ctx.bot.db, user, xp, mon)
+    if grant is not None:
+        leveled = grant['level'] > grant['old_level']
+        ctx.bot.ledger.record(user, ledger.RPG, 'reward', money=mon if leveled else 0, xp=xp)
+        await ctx.send(msg1 if leveled else msg2)
 
 
-async def add_mastery_xp(ctx, xp, skill, user=None):
+async def mastery_lvl(ctx, mon, xp, skill, msg1, msg2, user=None):
     if not user:
         user = ctx.author.id
 
-    async with ctx.bot.db.acquire() as db:
-        await db.execute(
-            "UPDATE rpg_mastery SET xp = xp + $1 WHERE skill = $2 AND id = $3",
-            xp, skill, user
-        )
+    grant = await queries.grant_mastery(ctx.bot.db, user, skill, xp, mon)
+    if grant is not None:
+        leveled = grant['level'] > grant['old_level']
+        ctx.bot.ledger.record(user, ledger.MASTERY, 'reward', xp=xp)
+        ctx.bot.ledger.record(user, ledger.RPG, 'reward', money=mon if leveled else 0)
+        await ctx.send(msg1 if leveled else msg2)
 
 
-async def add_money(ctx, mon, user=None):
+async def add_money(ctx, mon, user=None, reason='reward'):
     if not user:
         user = ctx.author
 
-    async with ctx.bot.db.acquire() as db:
-        await db.execute(
-            "UPDATE rpg_profile SET bal = bal + $1 WHERE id = $2",
-            mon, user.id
-        )
+    if await queries.rpg_add_balance(ctx.bot.db, user.id, mon) is not None:
+        ctx.bot.ledger.record(user.id, ledger.RPG, reason, money=mon)
 
 
 async def fetch_user(ctx, user=None):
     if not user:
         user = ctx.author.id
 
-    async with ctx.bot.db.acquire() as db:
-        p = await db.fetchrow("SELECT * FROM rpg_profile WHERE id=$1",
-                              user)
-    return p
+    return await queries.rpg_profile(ctx.bot.db, user)
 
 
 async def fetch_mastery(ctx, skill, user=None):
     if not user:
         user = ctx.author.id
 
-    async with ctx.bot.db.acquire() as db:
-        p = await db.fetchrow("SELECT * FROM rpg_mastery WHERE id=$1 AND skill=$2",
-                              user, skill)
-
-    return p
+    return await queries.rpg_mastery(ctx.bot.db, user, skill)
 
 
 def item_embed(item, thumbnail, current, max_):
@@ -141,7 +73,7 @@ async def lb_embed(ctx, pfp, current, max_):
     embed.description = f"**Level:** {pfp[2]} \n" \
                         f"**Class:** {pfp[1]} \n" \
                         f"**Main Skill:** {pfp[5]}"
-    duels = await ctx.bot.db.fetchrow("SELECT * FROM rpg_duels WHERE id=$1", member.id)
+    duels = await queries.rpg_duels(ctx.bot.db, member.id)
     if duels:
         embed.add_field(name="Fighting Statistics", value=f"**Wins:** {duels[1]} \n"
                                                           f"**Losses:** {duels[2]}", inline=True)
@@ -170,13 +102,12 @@ async def fetch_item(ctx, name, user=None, inv=None):
     return item
 
 
-async def remove_money(ctx, bal, user=None):
+async def remove_money(ctx, bal, user=None, reason='purchase'):
     if not user:
         user = ctx.author.id
 
-    async with ctx.bot.db.acquire() as db:
-        await db.execute("UPDATE rpg_profile SET bal = bal - $1 WHERE id=$2",
-                         bal, user)
+    if await queries.rpg_add_balance(ctx.bot.db, user, -bal) is not None:
+        ctx.bot.ledger.record(user, ledger.RPG, reason, money=-bal)
 
 
 def inventory_embed(ctx, info, thumbnail, current, max_):
@@ -197,8 +128,7 @@ async def fetch_skills(ctx, user=None):
     if not user:
         user = ctx.author
 
-    async with ctx.bot.db.acquire() as db:
-        skills = await db.fetch("SELECT * FROM rpg_mastery WHERE id=$1", user.id)
+    skills = await queries.rpg_skills(ctx.bot.db, user.id)
 
     p = []
     for i in skills:
@@ -244,7 +174,7 @@ async def lb(ctx, win, loss, user=None):
     if not user:
         user = ctx.author
 
-    data = await ctx.bot.db.fetch("SELECT * FROM rpg_duels WHERE id=$1", user.id)
+    data = await queries.rpg_duels(ctx.bot.db, user.id)
     if data:
         async with ctx.bot.db.acquire() as db:
             await db.execute("""UPDATE rpg_duels 
@@ -260,32 +190,39 @@ async def level2(ctx, mon, xp, user=None):
     if not user:
         user = ctx.author
 
-    async with ctx.bot.db.acquire() as db:
-        lvl_ = await db.fetchrow("SELECT * FROM profiles WHERE id=$1", user.id)
+    grant = await queries.grant_profile(ctx.bot.db, user.id, mon, xp)
+    if grant is None:
+        return
+    ctx.bot.ledger.record(user.id, ledger.PROFILE, 'reward', money=mon, xp=xp)
 
-    lvl_ = {"xp": lvl_[2] + xp, "lvl": lvl_[1]}
+    if grant['level'] > grant['old_level']:
+        await ctx.send(f"Congratulations {user.mention} you have leveled up to Level {grant['level']}.")
+    else:
+        await ctx.send(f"{user.mention} You have {progression.PROFILE.to_next(grant['level'], grant['xp'])}xp "
+                       f"left to the next level.")
 
-    if lvl_["xp"] >= lvl_["lvl"] * 2000:
-        await ctx.send(f"Congratulations {user.mention} you have leveled up to Level {lvl_['lvl'] + 1}.")
 
-        async with ctx.bot.db.acquire() as db:
-            await db.execute("UPDATE profiles SET level = level + 1, bal = bal + $1, xp = xp + $2 WHERE id=$3",
-                             mon, xp, user.id)
-    else:
-        await ctx.send(f"{user.mention} You have {lvl_['lvl'] * 2000 - lvl_['xp']}xp left to the next level.")
+async def pay_guild(ctx, name, mon, xp, reason='reward'):
+    """Pays every member of a guild at once; ``announce_level_ups`` tells them about it afterwards."""
+    paid = await queries.pay_guild(ctx.bot.db, name, mon, xp)
+    for row in paid:
+        ctx.bot.ledger.record(row['id'], ledger.PROFILE, reason, money=mon, xp=xp)
+    return paid
 
-        async with ctx.bot.db.acquire() as db:
-            await db.execute("UPDATE profiles SET bal = bal + $1, xp = xp + $2 WHERE id=$3",
-                             mon, xp, user.id)
+
+async def announce_level_ups(ctx, paid):
+    """Names the members of a ``pay_guild`` payout who levelled up, in one message."""
+    levelled = [f"<@{row['id']}> reached Level {row['level']}" for row in paid if row['level'] > row['old_level']]
+    if levelled:
+        more = f"\n...and {len(levelled) - 20} more" if len(levelled) > 20 else ""
+        await ctx.send("Congratulations! \n" + '\n'.join(levelled[:20]) + more)
 
 
 async def fetch_user2(ctx, user=None):
     if not user:
         user = ctx.author
 
-    async with ctx.bot.db.acquire() as db:
-        info = await db.fetchrow("SELECT * FROM profiles WHERE id=$1", user.id)
-    return info
+    return await queries.profile(ctx.bot.db, user.id)
 
 
 async def fetch_abilities(ctx, user=None):
@@ -293,10 +230,7 @@ async def fetch_abilities(ctx, user=None):
         user = ctx.author
     p = []
 
-    async with ctx.bot.db.acquire() as db:
-        abilities = await db.fetch("SELECT * FROM abilities WHERE id=$1", user.id)
-
-    for i in abilities:
+    for i in await queries.abilities(ctx.bot.db, user.id):
         p.append(i[1])
     return p
 
@@ -316,52 +250,30 @@ async def ability_level(ctx, xp, dmg, dur, ability, user=None):
     if not user:
         user = ctx.author
 
-    async with ctx.bot.db.acquire() as db:
-        lvl_ = await db.fetchrow("SELECT * FROM abilities WHERE id=$1 AND ability=$2", user.id, ability)
-
-    lvl_ = {"lvl": lvl_[2], "xp": lvl_[3] + xp}
-
-    if lvl_["xp"] >= lvl_["lvl"] * 2000:
-        await ctx.send(f"Congratulations {user.mention} you have leveled up {ability} to Level {lvl_['lvl'] + 1}.")
+    grant = await queries.grant_ability(ctx.bot.db, user.id, ability, xp, dmg, dur)
+    if grant is None:
+        return
+    ctx.bot.ledger.record(user.id, ledger.ABILITY, 'reward', xp=xp)
 
-        async with ctx.bot.db.acquire() as db:
-            await db.execute(
-                "UPDATE abilities SET level = level + 1, damage=damage + $1, "
-                "durability=durability + $2, xp = xp + $3 WHERE id=$4 AND ability=$5",
-                dmg, dur, xp, user.id, ability)
+    if grant['level'] > grant['old_level']:
+        await ctx.send(f"Congratulations {user.mention} you have leveled up {ability} to Level {grant['level']}.")
     else:
         await ctx.send(
-            f"{user.mention} You have {lvl_['lvl'] * 2000 - lvl_['xp']}xp left to upgrade your "
-            f"{ability} to the next level.")
-
-        async with ctx.bot.db.acquire() as db:
-            await db.execute("UPDATE abilities SET damage=damage + $1, "
-                             "durability=durability + $2, xp = xp + $3 WHERE id=$4 AND ability=$5",
-                             dmg, dur, xp, user.id, ability)
+            f"{user.mention} You have {progression.ABILITY.to_next(grant['level'], grant['xp'])}xp left to upgrade "
+            f"your {ability} to the next level.")
 
 
 async def guild_level(ctx, xp, user=None):
     if not user:
         user = ctx.author
 
-    async with ctx.bot.db.acquire() as db:
-        lvl_ = await db.fetchval("SELECT guild FROM profiles WHERE id=$1", user.id)
-        lvl_ = await db.fetchrow("SELECT * FROM guilds WHERE guild=$1", lvl_)
-
-    if not lvl_:
+    grant = await queries.grant_guild(ctx.bot.db, user.id, xp)
+    if grant is None:
         return await ctx.send("You currently aren't apart of a guild; therefore there are no guild rewards.")
-    else:
-        lvl_ = {"xp": lvl_[3] + xp, "lvl": lvl_[2], "name": lvl_[0]}
+    ctx.bot.ledger.record(user.id, ledger.GUILD, 'reward', xp=xp)
 
-    if lvl_["xp"] >= lvl_["lvl"] * 2000:
-        await ctx.send(f"{lvl_['name']} has leveled up to Level {lvl_['lvl'] + 1}.")
-
-        async with ctx.bot.db.acquire() as db:
-            await db.execute("UPDATE guilds SET level = level + 1, xp = xp + $1 WHERE guild=$2",
-                             xp, lvl_['name'])
+    if grant['level'] > grant['old_level']:
+        await ctx.send(f"{grant['guild']} has leveled up to Level {grant['level']}.")
     else:
-        await ctx.send(f"**{lvl_['name']}** needs {lvl_['lvl'] * 2000 - lvl_['xp']}xp left to the next level.")
-
-        async with ctx.bot.db.acquire() as db:
-            await db.execute("UPDATE guilds SET xp = xp + $1 WHERE guild=$2",
-                             xp, lvl_['name'])
+        await ctx.send(f"**{grant['guild']}** needs {progression.GUILD.to_next(grant['level'], grant['xp'])}xp "
+                       f"left to the next level.")
@@ -0,0 +1,167 @@
+import asyncio
+from collections import OrderedDict
+
+import asyncpg
+
+from . import queries
+
+
+class PrefixMatcher:
+    """The prefixes of a guild together with the mention variants, built once.
+
+    Prefixes are ordered longest first so ``>>`` wins over ``>``, and
+    ``candidates`` is a tuple so a single ``str.startswith`` rejects a message.
+    """
+
+    __slots__ = ('prefixes', 'candidates', 'as_list')
+
+    def __init__(self, prefixes, user_id):
+        self.prefixes = tuple(prefixes)
+        mentions = (f'<@{user_id}> ', f'<@!{user_id}> ')
+        self.candidates = tuple(sorted(set(self.prefixes), key=len, reverse=True)) + mentions
+        self.as_list = list(self.candidates)
+
+    def matches(self, content):
+        return content.startswith(self.candidates)
+
+
+class GuildSettings:
+    """The configuration of a single guild.
+
+    Disabled commands are kept as ``(scope, target, command)`` rules, where
+    scope is ``guild``, ``channel`` or ``role``. They are precomputed into
+    frozensets so checking an invocation doesn't depend on how many rules exist.
+    """
+
+    __slots__ = ('guild_id', 'prefixes', 'matcher', 'alerts', 'rules', 'disabled', 'channel_disabled',
+                 'role_disabled')
+
+    def __init__(self, guild_id, prefixes=(), alerts=True, rules=()):
+        self.guild_id = guild_id
+        self.prefixes = tuple(prefixes)
+        self.matcher = None
+        self.alerts = alerts
+        self.set_rules(rules)
+
+    @classmethod
+    def from_records(cls, record, rules):
+        return cls(record['guild'], record['prefixes'] or (), record['alerts'] is True,
+                   [(r['scope'], r['target'], r['command']) for r in rules])
+
+    def set_rules(self, rules):
+        self.rules = frozenset(rules)
+        self.disabled = frozenset(c for s, t, c in self.rules if s == 'guild')
+        self.channel_disabled = frozenset((t, c) for s, t, c in self.rules if s == 'channel')
+
+        roles = {}
+        for scope, target, command in self.rules:
+            if scope == 'role':
+                roles.setdefault(command, set()).add(target)
+        self.role_disabled = {command: frozenset(targets) for command, targets in roles.items()}
+
+    def is_disabled(self, command, channel_id, member):
+        if command in self.disabled or (channel_id, command) in self.channel_disabled:
+            return True
+
+        roles = self.role_disabled.get(command)
+        return roles is not None and any(role.id in roles for role in member.roles)
+
+
+class SettingsCache:
+    """Loads guild settings on first use and keeps the most recently used ones.
+
+    Concurrent lookups for a guild that isn't cached share a single query,
+    and the least recently used guild is evicted once ``max_size`` is hit.
+    Every write goes to the database first and then to the cached object,
+    and is published so other processes drop their copy of the guild.
+    """
+
+    def __init__(self, db, loop, *, notifier=None, max_size=2000):
+        self.db = db
+        self.loop = loop
+        self.notifier = notifier
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self._pending = {}
+
+    def __len__(self):
+        return len(self._cache)
+
+    def get_cached(self, guild_id):
+        return self._cache.get(guild_id)
+
+    async def get(self, guild_id):
+        try:
+            settings = self._cache[guild_id]
+        except KeyError:
+            pass
+        else:
+            self._cache.move_to_end(guild_id)
+            return settings
+
+        future = self._pending.get(guild_id)
+        if future is None:
+            future = self._pending[guild_id] = self.loop.create_task(self._load(guild_id))
+            future.add_done_callback(lambda f: self._pending.pop(guild_id, None))
+        return await asyncio.shield(future)
+
+    async def _load(self, guild_id):
+        async with self.db.acquire() as db:
+            record = await queries.settings(db, guild_id)
+            if record is None:
+                try:
+                    await db.execute("INSERT INTO settings (guild, alerts) VALUES($1, TRUE)", guild_id)
+                except asyncpg.UniqueViolationError:
+                    pass
+                rules = ()
+            else:
+                rules = await queries.disabled_commands(db, guild_id)
+
+        settings = GuildSettings.from_records(record, rules) if record else GuildSettings(guild_id)
+        self._cache[guild_id] = settings
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+        return settings
+
+    def evict(self, guild_id):
+        self._cache.pop(guild_id, None)
+
+    def clear(self):
+        self._cache.clear()
+
+    async def _publish(self, guild_id):
+        if self.notifier is not None:
+            await self.notifier.publish('settings', guild_id=guild_id)
+
+    async def set_prefixes(self, guild_id, prefixes):
+        settings = await self.get(guild_id)
+        async with self.db.acquire() as db:
+            await db.execute("UPDATE settings SET prefixes=$1 WHERE guild=$2", list(prefixes) or None, guild_id)
+        settings.prefixes = tuple(prefixes)
+        settings.matcher = None
+        await self._publish(guild_id)
+
+    async def set_alerts(self, guild_id, alerts):
+        settings = await self.get(guild_id)
+        async with self.db.acquire() as db:
+            await db.execute("UPDATE settings SET alerts=$1 WHERE guild=$2", alerts, guild_id)
+        settings.alerts = alerts
+        await self._publish(guild_id)
+
+    async def disable(self, guild_id, command, scope='guild', target=None):
+        settings = await self.get(guild_id)
+        target = guild_id if target is None else target
+        async with self.db.acquire() as db:
+            await db.execute("INSERT INTO disabled_commands VALUES($1, $2, $3, $4) ON CONFLICT DO NOTHING",
+                             guild_id, command, scope, target)
+        settings.set_rules(settings.rules | {(scope, target, command)})
+        await self._publish(guild_id)
+
+    async def enable(self, guild_id, command, scope='guild', target=None):
+        settings = await self.get(guild_id)
+        target = guild_id if target is None else target
+        async with self.db.acquire() as db:
+            await db.execute("DELETE FROM disabled_commands WHERE guild=$1 AND command=$2 AND scope=$3 "
+                             "AND target=$4", guild_id, command, scope, target)
+        settings.set_rules(settings.rules - {(scope, target, command)})
+        await self._publish(guild_id)
@@ -0,0 +1,151 @@
+import asyncio
+import collections
+import os
+import time
+
+import psutil
+
+_bars = '▁▂▃▄▅▆▇█'
+
+
+def count_lines(path):
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for file in files:
+            if file.endswith(".py"):
+                with open(os.path.join(root, file)) as f:
+                    total += sum(1 for _ in f)
+    return total
+
+
+def sparkline(values):
+    if not values:
+        return ''
+    low, high = min(values), max(values)
+    span = (high - low) or 1
+    return ''.join(_bars[int((v - low) / span * (len(_bars) - 1))] for v in values)
+
+
+class BotStats:
+    """Guild, channel and member counters kept current from gateway events.
+
+    Only the guilds of the shards run by this process are counted.
+
+    Counters are rebuilt with a single pass on ready and afterwards only
+    adjusted by events, so reading them is O(1). A background task samples
+    the process CPU and memory into a fixed size ring buffer.
+    """
+
+    def __init__(self, *, interval=60, samples=60):
+        self.interval = interval
+        self.history = collections.deque(maxlen=samples)
+        self.process = psutil.Process()
+        self.lines = 0
+        self._guilds = {}
+        self._task = None
+        self.reset()
+
+    def reset(self):
+        self.guilds = 0
+        self.channels = 0
+        self.users = 0
+        self.bots = 0
+        self.shard_guilds = collections.Counter()
+        self._guilds.clear()
+
+    @property
+    def humans(self):
+        return self.users - self.bots
+
+    def rebuild(self, bot):
+        self.reset()
+        for guild in bot.guilds:
+            self.add_guild(guild)
+
+    def add_guild(self, guild):
+        if guild.id in self._guilds:
+            self.remove_guild(guild)
+
+        bots = sum(1 for m in guild.members if m.bot)
+        counts = [len(guild.members), bots, len(guild.channels), guild.shard_id]
+        self._guilds[guild.id] = counts
+        self.shard_guilds[guild.shard_id] += 1
+        self.guilds += 1
+        self.users += counts[0]
+        self.bots += counts[1]
+        self.channels += counts[2]
+
+    def remove_guild(self, guild):
+        counts = self._guilds.pop(guild.id, None)
+        if counts is None:
+            return
+
+        self.shard_guilds[counts[3]] -= 1
+        self.guilds -= 1
+        self.users -= counts[0]
+        self.bots -= counts[1]
+        self.channels -= counts[2]
+
+    def _member(self, member, delta):
+        counts = self._guilds.get(member.guild.id)
+        if counts is None:
+            return
+
+        counts[0] += delta
+        self.users += delta
+        if member.bot:
+            counts[1] += delta
+            self.bots += delta
+
+    def add_member(self, member):
+        self._member(member, 1)
+
+    def remove_member(self, member):
+        self._member(member, -1)
+
+    def _channel(self, channel, delta):
+        counts = self._guilds.get(channel.guild.id)
+        if counts is not None:
+            counts[2] += delta
+            self.channels += delta
+
+    def add_channel(self, channel):
+        self._channel(channel, 1)
+
+    def remove_channel(self, channel):
+        self._channel(channel, -1)
+
+    def guild_counts(self, guild):
+        """Returns (humans, bots) for a guild."""
+        counts = self._guilds.get(guild.id)
+        if counts is None:
+            self.add_guild(guild)
+            counts = self._guilds[guild.id]
+        return counts[0] - counts[1], counts[1]
+
+    # From Modelmat
+    def sample(self):
+        cpu = self.process.cpu_percent() / psutil.cpu_count()
+        mem = self.process.memory_info().rss / 1024 ** 2
+        self.history.append((time.time(), cpu, mem))
+        return cpu, mem
+
+    def latest(self):
+        if not self.history:
+            return self.sample()
+        return self.history[-1][1:]
+
+    def trend(self):
+        """Returns sparklines of the sampled CPU and memory usage."""
+        return (sparkline([s[1] for s in self.history]),
+                sparkline([s[2] for s in self.history]))
+
+    def start(self, loop, path):
+        if self._task is None:
+            self._task = loop.create_task(self._run(loop, path))
+
+    async def _run(self, loop, path):
+        self.lines = await loop.run_in_executor(None, count_lines, path)
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,172 @@
+import asyncio
+import difflib
+import json
+import logging
+import random
+import re
+import string
+from collections import Counter
+
+import aiohttp
+import discord
+
+log = logging.getLogger(__name__)
+
+embed_color = 0x101010
+
+API_URL = "http://jservice.io/api/random?count={}"
+
+_tags = re.compile(r'<[^>]+>')
+_punctuation = str.maketrans('', '', string.punctuation)
+_articles = ('a ', 'an ', 'the ')
+
+
+def normalize(answer):
+    """Lowercases an answer and strips markup, punctuation and leading articles."""
+    answer = _tags.sub('', answer).lower().translate(_punctuation)
+    answer = ' '.join(answer.split())
+    for article in _articles:
+        if answer.startswith(article):
+            return answer[len(article):]
+    return answer
+
+
+def is_match(guess, answer, tolerance=0.85):
+    """Compares a raw guess against an already normalized answer."""
+    guess = normalize(guess)
+    if not guess:
+        return False
+    if guess == answer:
+        return True
+    return difflib.SequenceMatcher(None, guess, answer).ratio() >= tolerance
+
+
+def load_bank(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def clue(answer):
+    text = _tags.sub('', answer)
+    for c in ('a', 'e', 'i', 'o', 'u'):
+        text = text.replace(c, "-")
+    return text
+
+
+class QuestionBuffer:
+    """Keeps a queue of questions topped up in the background.
+
+    Questions come from jservice.io, falling back to the local bank
+    whenever the API is unreachable or returns junk.
+    """
+
+    def __init__(self, session, bank, *, size=10):
+        self.session = session
+        self.bank = bank
+        self.size = size
+        self._queue = asyncio.Queue(maxsize=size)
+        self._task = None
+        self._loop = None
+
+    def start(self, loop):
+        self._loop = loop
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._fill())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def get(self, timeout=60):
+        """The next question, raising ``asyncio.TimeoutError`` if none comes within ``timeout`` seconds."""
+        if self._loop is not None and self._task is not None and self._task.done():
+            self.start(self._loop)
+        return await asyncio.wait_for(self._queue.get(), timeout)
+
+    async def _fetch(self, count):
+        async with self.session.get(API_URL.format(count)) as r:
+            data = await r.json()
+
+        if not isinstance(data, list):
+            raise ValueError(f'Expected a list of questions, got {type(data).__name__}')
+        return [{"question": q['question'], "answer": q['answer']} for q in data if isinstance(q, dict)
+                and q.get('question') and q.get('answer') and not q.get('invalid_count')]
+
+    async def _fill(self):
+        while True:
+            try:
+                questions = await self._fetch(self.size)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError):
+                questions = []
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Anything else would end the task and leave every session waiting on an empty queue.
+                log.exception('Could not fetch trivia questions')
+                questions = []
+
+            if not questions:
+                if not self.bank:
+                    await asyncio.sleep(30)
+                    continue
+                questions = random.sample(self.bank, min(len(self.bank), self.size))
+
+            for question in questions:
+                await self._queue.put(question)
+
+
+class TriviaSession:
+    """A trivia game bound to one channel, played in rounds until nobody answers."""
+
+    def __init__(self, ctx, buffer, *, timeout=30, tolerance=0.85):
+        self.ctx = ctx
+        self.buffer = buffer
+        self.timeout = timeout
+        self.tolerance = tolerance
+        self.scores = Counter()
+        self.rounds = 0
+
+    async def run(self):
+        while True:
+            try:
+                question = await self.buffer.get()
+            except asyncio.TimeoutError:
+                await self.ctx.send("I couldn't find any questions right now, try again later.")
+                break
+            self.rounds += 1
+            answer = normalize(question['answer'])
+            display = _tags.sub('', question['answer'])
+
+            embed = discord.Embed(color=embed_color)
+            embed.title = f'Trivia Question #{self.rounds}'
+            embed.description = question['question']
+            embed.set_footer(text=f'Clue: {clue(question["answer"])}')
+            await self.ctx.send(embed=embed)
+
+            def check(m):
+                return m.channel == self.ctx.channel and not m.author.bot \
+                       and is_match(m.content, answer, self.tolerance)
+
+            try:
+                right = await self.ctx.bot.wait_for('message', check=check, timeout=self.timeout)
+            except asyncio.TimeoutError:
+                await self.ctx.send(f"Time's up! The answer was {display}!")
+                break
+            else:
+                self.scores[right.author] += 1
+                await self.ctx.send(f"{right.author.mention} is correct! The answer was {display}!")
+
+        if self.scores:
+            await self.ctx.send(embed=self.scoreboard())
+
+    def scoreboard(self):
+        embed = discord.Embed(color=embed_color)
+        embed.title = 'Trivia Scores'
+        embed.description = '\n'.join(f"**{user.display_name}:** {points}"
+                                      for user, points in self.scores.most_common(10))
+        embed.set_footer(text=f'{self.rounds} rounds played')
+        return embed
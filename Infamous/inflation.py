@@ -0,0 +1,235 @@
+"""Economy inflation report for the superhuman RPG.
+
+Simulates players following play profiles over a number of days with the
+rewards, cooldowns and prices the bot uses (``cogs.utils.constants``), all
+players at once as NumPy arrays. Every day a player plays they chain their
+expedition for as long as they play, take loot in the remaining hours, claim
+daily and the raffle, duel and drink, gamble part of their balance, buy the
+cheapest ability they don't own and master their main ability.
+
+Guild war payouts are left out since they depend on guilds, not players.
+
+Writes to the output directory:
+
+- ``days.csv``: per day and profile, balance percentiles, levels and the money held;
+- ``time_to_afford.csv``: per ability and profile, the median day by which a
+  player has earned its price and the share who did within the run.
+
+Needs NumPy, which the bot itself doesn't: ``pip install -r requirements-dev.txt``.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+import numpy as np
+
+from cogs.utils.constants import (EXPEDITIONS, MASTER_COOLDOWN, MASTER_PRICE_DIVISOR, RAFFLE_LEVEL, RAFFLE_PRIZES,
+                                  REWARDS, shop_items)
+from cogs.utils.progression import PROFILE
+
+DAY = 86400
+
+# share: fraction of players; play_chance: chance to play on a given day; hours: hours played that day;
+# loots, duels, drinks, gambles and masters: attempts per day played; stake: share of the balance gambled;
+# daily: claims daily and the raffle; buys: buys abilities as soon as they can.
+PROFILES = {
+    'casual': {'share': 0.6, 'play_chance': 0.4, 'hours': 1, 'expedition': 'adventure', 'loots': 1,
+               'daily': False, 'duels': 0, 'drinks': 1, 'gambles': 0, 'stake': 0.0, 'buys': True, 'masters': 0},
+    'regular': {'share': 0.3, 'play_chance': 0.8, 'hours': 3, 'expedition': 'mission', 'loots': 2,
+                'daily': True, 'duels': 1, 'drinks': 1, 'gambles': 1, 'stake': 0.1, 'buys': True, 'masters': 1},
+    'grinder': {'share': 0.1, 'play_chance': 1.0, 'hours': 10, 'expedition': 'odyssey', 'loots': 6,
+                'daily': True, 'duels': 3, 'drinks': 3, 'gambles': 3, 'stake': 0.25, 'buys': True, 'masters': 4}
+}
+
+
+def uniform_sums(rng, counts, low, high):
+    """The sum of ``counts[i]`` uniform draws from ``low`` to ``high`` for each player."""
+    most = int(counts.max(initial=0))
+    if not most:
+        return np.zeros(counts.size, dtype=np.int64)
+    draws = rng.integers(low, high + 1, (counts.size, most))
+    return np.where(np.arange(most) < counts[:, None], draws, 0).sum(axis=1)
+
+
+class Players:
+    """Every simulated player as columns of arrays."""
+
+    def __init__(self, profiles, n, rng):
+        self.names = list(profiles)
+        self.profile = rng.choice(len(profiles), n, p=[p['share'] for p in profiles.values()])
+
+        def column(key, dtype=None):
+            return np.array([p[key] for p in profiles.values()], dtype=dtype)[self.profile]
+
+        self.play_chance = column('play_chance', float)
+        self.hours = column('hours', float)
+        self.expedition = column('expedition')
+        self.loots = column('loots', np.int64)
+        self.daily = column('daily', bool)
+        self.duels = column('duels', np.int64)
+        self.drinks = column('drinks', np.int64)
+        self.gambles = column('gambles', np.int64)
+        self.stake = column('stake', float)
+        self.buys = column('buys', bool)
+        self.masters = column('masters', np.int64)
+
+        self.prices = np.array([item[0] for item in shop_items.values()], dtype=np.int64)
+        self.bal = np.zeros(n, dtype=np.int64)
+        self.xp = np.zeros(n, dtype=np.int64)
+        self.earned = np.zeros(n, dtype=np.int64)
+        self.owned = np.zeros((n, len(shop_items)), dtype=bool)
+        self.main = rng.integers(0, len(shop_items), n)
+        self.owned[np.arange(n), self.main] = True
+
+    @property
+    def level(self):
+        return np.vectorize(PROFILE.level)(self.xp)
+
+    def pay(self, money, xp):
+        self.bal += money
+        self.earned += money
+        self.xp += xp
+
+    def reward(self, rng, name, counts):
+        reward = REWARDS[name]
+        self.pay(uniform_sums(rng, counts, *reward.money), uniform_sums(rng, counts, *reward.xp))
+
+    def raffle(self, rng, playing):
+        prize = np.where(playing, rng.integers(0, len(RAFFLE_PRIZES), playing.size), -1)
+
+        money = prize == RAFFLE_PRIZES.index('Money')
+        self.reward(rng, 'raffle', money.astype(np.int64))
+
+        level = prize == RAFFLE_PRIZES.index('Level')
+        self.pay(level * RAFFLE_LEVEL, level * RAFFLE_LEVEL)
+
+        # A free ability the player doesn't have yet; "Master" only changes ability stats.
+        ability = (prize == RAFFLE_PRIZES.index('Ability')) & ~self.owned.all(axis=1)
+        choice = np.where(self.owned, -1, rng.random(self.owned.shape)).argmax(axis=1)
+        self.owned[ability, choice[ability]] = True
+
+    def gamble(self, rng, playing):
+        for attempt in range(int(self.gambles.max(initial=0))):
+            stake = np.where(playing & (attempt < self.gambles), (self.bal * self.stake).astype(np.int64), 0)
+            self.bal += np.where(rng.random(self.bal.size) < 0.5, stake, -stake)
+
+    def spend(self, playing):
+        while True:
+            cheapest = np.where(self.owned, np.iinfo(np.int64).max, self.prices).min(axis=1)
+            buying = playing & self.buys & ~self.owned.all(axis=1) & (self.bal >= cheapest)
+            if not buying.any():
+                break
+            choice = np.where(self.owned, np.iinfo(np.int64).max, self.prices).argmin(axis=1)
+            self.owned[buying, choice[buying]] = True
+            self.bal -= np.where(buying, cheapest, 0)
+
+        cost = self.prices[self.main] // MASTER_PRICE_DIVISOR
+        for attempt in range(int(self.masters.max(initial=0))):
+            mastering = playing & (attempt < self.masters) & (self.bal >= cost)
+            self.bal -= np.where(mastering, cost, 0)
+
+    def play_day(self, rng):
+        playing = rng.random(self.bal.size) < self.play_chance
+        seconds = np.where(playing, self.hours * 3600, 0)
+
+        for name in EXPEDITIONS:
+            runs = np.where(self.expedition == name, seconds // REWARDS[name].cooldown, 0).astype(np.int64)
+            self.reward(rng, name, runs)
+
+        # Loot waits for the expedition to finish, so it only fits in the hours left.
+        free = (DAY - seconds) // REWARDS['loot'].cooldown
+        self.reward(rng, 'loot', np.where(playing, np.minimum(self.loots, free), 0).astype(np.int64))
+
+        claiming = playing & self.daily
+        self.reward(rng, 'daily', claiming.astype(np.int64))
+        self.raffle(rng, claiming)
+
+        for name, attempts in (('duel', self.duels), ('drink', self.drinks)):
+            self.reward(rng, name, rng.binomial(np.where(playing, attempts, 0), 0.5))
+
+        self.gamble(rng, playing)
+        self.spend(playing)
+
+
+def load_profiles(path):
+    if path is None:
+        return PROFILES
+
+    with open(path) as f:
+        profiles = {name: dict(PROFILES['regular'], **profile) for name, profile in json.load(f).items()}
+
+    total = sum(p['share'] for p in profiles.values())
+    for name, profile in profiles.items():
+        profile['share'] /= total
+        if profile['expedition'] not in EXPEDITIONS:
+            raise ValueError(f"{name}: expedition must be one of {', '.join(EXPEDITIONS)}")
+        if profile['masters'] * MASTER_COOLDOWN > profile['hours'] * 3600 + MASTER_COOLDOWN:
+            raise ValueError(f"{name}: can't master {profile['masters']} times in {profile['hours']} hours")
+    return profiles
+
+
+def main(args):
+    profiles = load_profiles(args.profiles)
+    rng = np.random.default_rng(args.seed)
+    players = Players(profiles, args.players, rng)
+    abilities = list(shop_items)
+    os.makedirs(args.out, exist_ok=True)
+
+    afforded = np.full((args.players, len(abilities)), -1)
+    rows = []
+    report = {1, 7, 30, args.days}
+    for day in range(1, args.days + 1):
+        players.play_day(rng)
+        afforded[(afforded < 0) & (players.earned[:, None] >= players.prices)] = day
+
+        for index, name in enumerate(players.names):
+            mask = players.profile == index
+            bal, level = players.bal[mask], players.level[mask]
+            p10, p50, p90, p99 = np.percentile(bal, [10, 50, 90, 99]) if mask.any() else (0, 0, 0, 0)
+            rows.append((day, name, int(mask.sum()), int(p10), int(p50), int(p90), int(p99),
+                         round(float(bal.mean()), 1) if mask.any() else 0,
+                         int(np.median(level)) if mask.any() else 0, int(level.max(initial=0)),
+                         round(float(players.owned[mask].sum(axis=1).mean()), 2) if mask.any() else 0,
+                         int(bal.sum())))
+
+        if day in report:
+            print(f'Day {day}: ${int(players.bal.sum()):,} held, median level {int(np.median(players.level))}')
+            for row in rows[-len(players.names):]:
+                print(f'  {row[1]:<10} balance p50 ${row[4]:>9,} p90 ${row[5]:>9,} p99 ${row[6]:>9,}  '
+                      f'level p50 {row[8]:>3} max {row[9]:>3}  {row[10]:>5} abilities')
+
+    with open(os.path.join(args.out, 'days.csv'), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['day', 'profile', 'players', 'bal_p10', 'bal_p50', 'bal_p90', 'bal_p99', 'bal_mean',
+                         'level_p50', 'level_max', 'abilities_mean', 'money_held'])
+        writer.writerows(rows)
+
+    print(f'Days until earning the price of an ability (median, share within {args.days} days):')
+    with open(os.path.join(args.out, 'time_to_afford.csv'), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['ability', 'price', 'profile', 'median_day', 'share_afforded'])
+        for j, ability in enumerate(abilities):
+            line = []
+            for index, name in enumerate(players.names):
+                days = afforded[players.profile == index, j]
+                reached = days[days > 0]
+                median = int(np.median(reached)) if reached.size else ''
+                share = reached.size / days.size if days.size else 0
+                writer.writerow([ability, players.prices[j], name, median, f'{share:.4f}'])
+                line.append(f'{name} {median or "-":>4} ({share:4.0%})')
+            print(f'  {ability:<20} ${players.prices[j]:>6,}  ' + '  '.join(line))
+
+    print(f'Written to {args.out}')
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulates how balances and levels grow across play profiles.')
+    parser.add_argument('--players', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--profiles', help="JSON file of profiles, missing fields default to the regular profile")
+    parser.add_argument('--out', default='inflation', help="output directory")
+    sys.exit(main(parser.parse_args()))
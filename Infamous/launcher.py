@@ -0,0 +1,125 @@
+import json
+import math
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+MAIN = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'Main.py')
+
+# Discord allows one IDENTIFY every 5 seconds per bot.
+IDENTIFY_DELAY = 5.5
+
+
+def recommended_shards(token):
+    request = urllib.request.Request('https://discordapp.com/api/v7/gateway/bot',
+                                     headers={'Authorization': f'Bot {token}', 'User-Agent': 'Infamous'})
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)['shards']
+
+
+def split_shards(shard_count, workers):
+    """Splits the shard ids into at most ``workers`` contiguous ranges."""
+    per_worker = math.ceil(shard_count / workers)
+    return [list(range(i, min(i + per_worker, shard_count))) for i in range(0, shard_count, per_worker)]
+
+
+class Worker:
+    """A bot process owning a range of shards."""
+
+    def __init__(self, cluster_id, shard_ids, shard_count):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.process = None
+        self.started = 0
+        self.failures = 0
+        self.restart_at = None
+
+    def __str__(self):
+        return f'Cluster {self.cluster_id} (shards {self.shard_ids[0]}-{self.shard_ids[-1]})'
+
+    def start(self):
+        env = dict(os.environ,
+                   CLUSTER_ID=str(self.cluster_id),
+                   SHARD_IDS=','.join(map(str, self.shard_ids)),
+                   SHARD_COUNT=str(self.shard_count))
+        self.process = subprocess.Popen([sys.executable, MAIN], env=env)
+        self.started = time.monotonic()
+        self.restart_at = None
+        print(f'{self} started with pid {self.process.pid}', file=sys.stderr)
+
+    def check(self, now):
+        """Schedules a restart with exponential backoff when the process has exited."""
+        if self.restart_at is not None:
+            if now >= self.restart_at:
+                self.start()
+            return
+
+        code = self.process.poll()
+        if code is None:
+            return
+
+        # A worker that survived for a while gets a clean slate.
+        self.failures = self.failures + 1 if now - self.started < 60 else 0
+        delay = min(2 ** self.failures, 300)
+        self.restart_at = now + delay
+        print(f'{self} exited with code {code}, restarting in {delay}s', file=sys.stderr)
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+
+    def wait(self, timeout):
+        if self.process is not None:
+            try:
+                self.process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class Launcher:
+    """Spawns one worker process per shard range and restarts the ones that crash."""
+
+    def __init__(self, workers, shard_count):
+        self.workers = [Worker(i, shard_ids, shard_count)
+                        for i, shard_ids in enumerate(split_shards(shard_count, workers))]
+        self.running = True
+
+    def shutdown(self, *args):
+        self.running = False
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.shutdown)
+        signal.signal(signal.SIGINT, self.shutdown)
+
+        for worker in self.workers:
+            if not self.running:
+                break
+            worker.start()
+            time.sleep(IDENTIFY_DELAY * len(worker.shard_ids))
+
+        while self.running:
+            now = time.monotonic()
+            for worker in self.workers:
+                worker.check(now)
+            time.sleep(1)
+
+        for worker in self.workers:
+            worker.stop()
+        for worker in self.workers:
+            worker.wait(30)
+
+
+def main():
+    shard_count = os.getenv('SHARD_COUNT')
+    shard_count = int(shard_count) if shard_count else recommended_shards(os.getenv('TOKEN'))
+    workers = int(os.getenv('WORKERS', os.cpu_count() or 1))
+
+    Launcher(min(workers, shard_count), shard_count).run()
+
+
+if __name__ == '__main__':
+    main()
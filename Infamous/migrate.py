@@ -0,0 +1,30 @@
+import argparse
+import asyncio
+import os
+import sys
+
+import asyncpg
+
+from cogs.utils import migrations
+
+
+async def main(check):
+    connection = await asyncpg.connect(os.getenv('DATABASE_URL'))
+    try:
+        if not check:
+            await migrations.migrate(connection)
+
+        problems = await migrations.check(connection)
+    finally:
+        await connection.close()
+
+    for problem in problems:
+        print(problem)
+    print(f'{len(problems)} problem(s) found.' if problems else 'The database matches the expected schema.')
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Migrates the database, or with --check only compares it.')
+    parser.add_argument('--check', action='store_true', help="report differences without migrating")
+    sys.exit(asyncio.get_event_loop().run_until_complete(main(parser.parse_args().check)))